@@ -0,0 +1,3 @@
+"""
+Бенчмарки конвертера и генератор синтетических входных файлов
+"""
@@ -0,0 +1,338 @@
+"""
+Набор бенчмарков конвертера CSV → XML
+Ответственность: время этапов CSVProcessor и BatchProcessor, строки в секунду
+и пиковая память на синтетических входных файлах
+
+Запуск из папки проекта (нужен config.json):
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --suite full --json bench.json
+    python -m benchmarks.run_benchmarks --rows 1000000 --shapes wide deep --jobs 1 4
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from .synthetic import DEEP_CHAIN_DEPTH, TREE_SHAPES, generate_org_csv, synthetic_file_name
+
+BENCHMARK_FOLDER_UID = '00000000-0000-4000-8000-000000000000'
+
+# Этапы файла (FileRunStats): probe - анализ входного файла, scan - чтение CSV,
+# hierarchy - построение иерархии, datagroups/roles - запись XML
+STAGES = ('probe', 'scan', 'hierarchy', 'datagroups', 'roles')
+
+
+class BenchmarkCase(NamedTuple):
+    """Параметры входных данных одного замера."""
+    rows: int
+    shape: str = 'mixed'
+    orgs: int = 1
+    encoding: str = 'utf-8'
+    depth: int = DEEP_CHAIN_DEPTH
+
+    def describe(self) -> str:
+        shape = f"deep({self.depth})" if self.shape == 'deep' else self.shape
+        return f"{shape} {self.rows} стр, орг. {self.orgs}, {self.encoding}"
+
+
+# Наборы замеров: quick - минуты, full - до 5 млн строк (десятки минут, гигабайты XML)
+SUITES: Dict[str, List[BenchmarkCase]] = {
+    'quick': [
+        BenchmarkCase(1000),
+        BenchmarkCase(100000),
+        BenchmarkCase(100000, 'wide'),
+        # Цепочки глубины 1000: ~500 связей DataItems на строку
+        BenchmarkCase(10000, 'deep'),
+        BenchmarkCase(100000, 'mixed', 200, 'cp1251'),
+    ],
+}
+SUITES['full'] = SUITES['quick'] + [
+    BenchmarkCase(1000000),
+    BenchmarkCase(100000, 'deep'),
+    BenchmarkCase(1000000, 'mixed', 200, 'cp1251'),
+    BenchmarkCase(5000000, 'wide', 50),
+]
+
+
+def _peak_rss() -> Dict[str, Optional[int]]:
+    """Пиковый объём резидентной памяти процесса и его дочерних процессов, байт."""
+    try:
+        import resource
+    except ImportError:
+        return {'self': _peak_rss_windows(), 'children': None}
+    # ru_maxrss: килобайты в Linux, байты в macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return {'self': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+            'children': children * scale or None}
+
+
+def _peak_rss_windows() -> Optional[int]:
+    """PeakWorkingSetSize текущего процесса (Windows)."""
+    try:
+        import ctypes
+        from ctypes import wintypes
+    except ImportError:
+        return None
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                    ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                    ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                    ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                    ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize
+
+
+def _output_size(directory: str) -> int:
+    """Суммарный размер XML в папке."""
+    return sum(entry.stat().st_size for entry in os.scandir(directory)
+               if '.xml' in entry.name and not entry.name.endswith('.tmp'))
+
+
+def _run_csv_processor(csv_path: str, work_dir: str) -> Dict:
+    """Один файл через CSVProcessor.process_csv_file_stream."""
+    from modules.csv_processor import create_csv_processor
+    from modules.logger_manager import get_logger_manager, LoggerConfig
+    from modules.run_report import FileRunStats
+
+    processor = create_csv_processor()
+    logger_manager = get_logger_manager()
+    log_path = os.path.join(work_dir, 'benchmark.log')
+    logger = logger_manager.create_logger(log_path, log_file_path=log_path, config=LoggerConfig())
+    stats = FileRunStats(os.path.basename(csv_path))
+    xml_path = os.path.join(work_dir, os.path.splitext(os.path.basename(csv_path))[0] + '.xml')
+
+    started = time.perf_counter()
+    success = processor.process_csv_file_stream(
+        BENCHMARK_FOLDER_UID, csv_path, xml_path, logger, stats=stats)
+    total = time.perf_counter() - started
+    logger_manager.remove_logger(log_path)
+    logger_manager.flush()
+    return {'success': success, 'total': total, 'stages': stats.stages, 'file': stats.to_dict()}
+
+
+def _run_batch_processor(work_dir: str, jobs: int) -> Dict:
+    """Все CSV папки через BatchProcessor (как main.py, с логами и манифестом)."""
+    from main import process_all_csv_from_list
+    from modules.csv_reader import get_csv_files
+
+    started = time.perf_counter()
+    results = process_all_csv_from_list(
+        BENCHMARK_FOLDER_UID, work_dir, sorted(get_csv_files(work_dir, [])),
+        max_workers=jobs, force=True)
+    total = time.perf_counter() - started
+    # При нескольких процессах время этапов - сумма по файлам, больше общего
+    report = results.report.to_dict()
+    return {'success': all(results.values()), 'total': total,
+            'stages': report['totals']['stages'], 'report': report}
+
+
+def _measure(connection, processor: str, csv_paths: List[str], work_dir: str, jobs: int) -> None:
+    """Точка входа дочернего процесса: замер и отправка результата родителю."""
+    # Консольный вывод логов (и рабочих процессов пакета) уходит в os.devnull:
+    # форматирование остаётся в замере, как при запуске из CLI
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 2)
+    os.close(devnull)
+    try:
+        if processor == 'csv':
+            result = _run_csv_processor(csv_paths[0], work_dir)
+        else:
+            result = _run_batch_processor(work_dir, jobs)
+        result['peak_rss'] = _peak_rss()
+        result['xml_bytes'] = _output_size(work_dir)
+        connection.send(result)
+    except Exception as e:
+        connection.send({'error': f"{type(e).__name__}: {e}"})
+    finally:
+        connection.close()
+
+
+def _measure_in_subprocess(processor: str, csv_paths: List[str], work_dir: str, jobs: int) -> Dict:
+    """Замер в отдельном процессе: пиковая память не зависит от предыдущих замеров."""
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure, args=(sender, processor, csv_paths, work_dir, jobs))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {'error': 'процесс замера завершился без результата'}
+    process.join()
+    return result
+
+
+def prepare_inputs(case: BenchmarkCase, data_dir: str, parts: int = 1) -> List[str]:
+    """
+    Создаёт входные CSV замера или берёт их из кэша data_dir.
+
+    Args:
+        case: параметры входных данных
+        data_dir: папка кэша сгенерированных файлов
+        parts: число файлов, между которыми делятся строки (для пакета)
+
+    Returns:
+        List[str]: пути к CSV
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    paths = []
+    for part in range(parts):
+        rows = case.rows // parts + (1 if part < case.rows % parts else 0)
+        path = os.path.join(data_dir, synthetic_file_name(
+            rows, case.shape, case.orgs, case.encoding, part, case.depth))
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            generate_org_csv(tmp_path, rows, case.shape, case.orgs, case.encoding, seed=part,
+                             depth=case.depth)
+            os.replace(tmp_path, path)
+        paths.append(path)
+    return paths
+
+
+def _link_or_copy(source: str, target: str) -> None:
+    """Жёсткая ссылка на файл кэша (копия, если ссылки не поддерживаются)."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def run_case(case: BenchmarkCase, processor: str, data_dir: str, jobs: int = 1,
+             batch_files: int = 4, repeat: int = 1) -> Dict:
+    """
+    Выполняет замер одного набора данных одним процессором.
+
+    Args:
+        case: параметры входных данных
+        processor: csv (CSVProcessor, один файл) или batch (BatchProcessor,
+            строки поделены на batch_files файлов)
+        data_dir: папка кэша сгенерированных файлов
+        jobs: число процессов пакета (только batch)
+        batch_files: число файлов пакета
+        repeat: число повторов; в результат идёт самый быстрый
+
+    Returns:
+        Dict: параметры замера, время этапов и всего (с), строк/с, пиковая
+        память (байт), размер XML (байт) или error
+    """
+    csv_paths = prepare_inputs(case, data_dir, 1 if processor == 'csv' else batch_files)
+    best = None
+    for _ in range(max(1, repeat)):
+        work_dir = tempfile.mkdtemp(prefix='csv2xml_bench_')
+        try:
+            for path in csv_paths:
+                _link_or_copy(path, os.path.join(work_dir, os.path.basename(path)))
+            result = _measure_in_subprocess(processor, csv_paths, work_dir, jobs)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        if 'error' in result:
+            best = result
+            break
+        if best is None or result['total'] < best['total']:
+            best = result
+
+    best.update(case._asdict(), processor=processor, jobs=jobs if processor == 'batch' else 1,
+                files=len(csv_paths), csv_bytes=sum(os.path.getsize(x) for x in csv_paths))
+    if 'total' in best:
+        best['rows_per_sec'] = case.rows / best['total'] if best['total'] else 0.0
+    return best
+
+
+def format_result(result: Dict) -> str:
+    """Строка таблицы результатов."""
+    name = BenchmarkCase(result['rows'], result['shape'], result['orgs'], result['encoding'],
+                         result.get('depth', DEEP_CHAIN_DEPTH)).describe()
+    processor = result['processor'] if result['processor'] == 'csv' else f"batch x{result['jobs']}"
+    if 'error' in result:
+        return f"{name:<36} {processor:<9} ОШИБКА: {result['error']}"
+    stages = ' '.join(
+        f"{result['stages'][x]:7.2f}" if x in result['stages'] else f"{'-':>7}" for x in STAGES)
+    # Пик процесса замера или самого тяжёлого рабочего процесса пакета
+    peak = max(x or 0 for x in result['peak_rss'].values())
+    peak = f"{peak / 2**20:8.0f}" if peak else f"{'-':>8}"
+    status = '' if result['success'] else '  (файл не обработан)'
+    return (f"{name:<36} {processor:<9} {stages} {result['total']:8.2f} "
+            f"{result['rows_per_sec']:9.0f} {peak} {result['xml_bytes'] / 2**20:8.1f}{status}")
+
+
+def format_header() -> str:
+    """Заголовок таблицы результатов."""
+    stages = ' '.join(f"{x[:7]:>7}" for x in STAGES)
+    return (f"{'данные':<36} {'процессор':<9} {stages} {'всего, с':>8} "
+            f"{'строк/с':>9} {'пик, МБ':>8} {'XML, МБ':>8}")
+
+
+def parse_arguments(argv: List[str] = None) -> argparse.Namespace:
+    """Разбирает аргументы командной строки бенчмарков."""
+    parser = argparse.ArgumentParser(description='Бенчмарки конвертера CSV → XML')
+    parser.add_argument('--suite', choices=sorted(SUITES), default='quick',
+                        help='готовый набор замеров (если не заданы --rows/--shapes/--orgs/--encodings)')
+    parser.add_argument('--rows', type=int, nargs='+', help='число строк (1000 ... 5000000)')
+    parser.add_argument('--shapes', nargs='+', choices=sorted(TREE_SHAPES), help='формы дерева')
+    parser.add_argument('--orgs', type=int, nargs='+', help='число организаций')
+    parser.add_argument('--encodings', nargs='+', help='кодировки входных файлов (utf-8, cp1251)')
+    parser.add_argument('--depth', type=int, default=DEEP_CHAIN_DEPTH,
+                        help='глубина цепочек формы deep')
+    parser.add_argument('--processors', nargs='+', choices=['csv', 'batch'], default=['csv', 'batch'],
+                        help='CSVProcessor (один файл) и/или BatchProcessor (пакет)')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1],
+                        help='число процессов пакета (можно несколько значений)')
+    parser.add_argument('--batch-files', type=int, default=4,
+                        help='на сколько файлов делятся строки в замере пакета')
+    parser.add_argument('--repeat', type=int, default=1, help='повторов замера (берётся лучший)')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'csv2xml_bench'),
+                        help='папка кэша сгенерированных CSV')
+    parser.add_argument('--json', dest='json_file', help='сохранить результаты в JSON')
+    return parser.parse_args(argv)
+
+
+def select_cases(options: argparse.Namespace) -> List[BenchmarkCase]:
+    """Замеры из аргументов: декартово произведение заданных значений или набор --suite."""
+    if not any((options.rows, options.shapes, options.orgs, options.encodings)):
+        return SUITES[options.suite]
+    return [BenchmarkCase(*values, depth=options.depth) for values in itertools.product(
+        options.rows or [100000], options.shapes or ['mixed'],
+        options.orgs or [1], options.encodings or ['utf-8'])]
+
+
+def main(argv: List[str] = None) -> int:
+    """Запускает замеры и печатает таблицу результатов."""
+    options = parse_arguments(argv)
+    if not os.path.exists('config.json'):
+        print("Запустите бенчмарки из папки проекта: нужен config.json", file=sys.stderr)
+        return 2
+
+    results = []
+    print(format_header())
+    for case in select_cases(options):
+        for processor in options.processors:
+            for jobs in (options.jobs if processor == 'batch' else [1]):
+                result = run_case(case, processor, options.data_dir, jobs,
+                                  options.batch_files, options.repeat)
+                print(format_result(result), flush=True)
+                results.append(result)
+
+    if options.json_file:
+        with open(options.json_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 1 if any('error' in x or not x['success'] for x in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Генератор синтетических CSV с иерархией подразделений
+Ответственность: воспроизводимые входные файлы для бенчмарков (форма дерева,
+число организаций, кодировка, объём)
+"""
+
+import argparse
+import csv
+import random
+import uuid
+from collections import deque
+from typing import Dict, List, Tuple
+
+# Форма дерева: (минимум, максимум) непосредственных потомков подразделения.
+# wide - 2-3 уровня с сотнями потомков, mixed - типичная оргструктура,
+# deep - цепочки с единственным потомком глубиной depth, каждая от корня
+# организации (при обходе в ширину глубина росла бы лишь логарифмически)
+TREE_SHAPES: Dict[str, Tuple[int, int]] = {
+    'wide': (20, 200),
+    'mixed': (2, 8),
+    'deep': (1, 1),
+}
+
+# Глубина цепочки формы deep по умолчанию: на такой глубине рекурсивный
+# обход упирался в предел рекурсии Python. С рекурсивным доступом цепочка
+# глубины d даёт ~d²/2 связей Privilege.DataItems
+DEEP_CHAIN_DEPTH = 1000
+
+CSV_FIELDS = ['org_name', 'dep_name', 'dep_uid', 'dep_headdep_uid']
+
+_ORG_KINDS = ['АО', 'ООО', 'ПАО', 'Филиал ПАО', 'МУП']
+_ORG_WORDS = ['Энерго', 'Сеть', 'Гидро', 'Тепло', 'Транс', 'Север', 'Юг', 'Восток', 'Урал', 'Сибирь']
+_DEP_KINDS = ['Управление', 'Служба', 'Отдел', 'Сектор', 'Группа', 'Цех', 'Лаборатория', 'Участок']
+_DEP_SUBJECTS = [
+    'релейной защиты', 'эксплуатации', 'диспетчерского управления', 'учёта электроэнергии',
+    'информационных технологий', 'охраны труда', 'капитального ремонта', 'подстанций',
+    'линий электропередачи', 'метрологии', 'закупок', 'режимов',
+]
+
+
+def org_name(index: int) -> str:
+    """Название организации с номером index (только символы cp1251)."""
+    count = len(_ORG_WORDS)
+    word = _ORG_WORDS[index % count] + _ORG_WORDS[(index // count + 1) % count].lower()
+    return f'{_ORG_KINDS[index % len(_ORG_KINDS)]} "{word}" №{index + 1}'
+
+
+def _dep_name(rng: random.Random, index: int) -> str:
+    """Название подразделения; часть названий с кавычками и точкой с запятой."""
+    name = f'{rng.choice(_DEP_KINDS)} {rng.choice(_DEP_SUBJECTS)} №{index}'
+    if index % 97 == 0:
+        name += '; резерв'
+    elif index % 89 == 0:
+        name = f'{name} "Центр"'
+    return name
+
+
+def _new_uid(rng: random.Random) -> str:
+    """UUID4 из генератора rng: одинаковый seed - одинаковые UID."""
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def generate_org_csv(
+    csv_file_path: str,
+    rows: int,
+    shape: str = 'mixed',
+    orgs: int = 1,
+    encoding: str = 'utf-8',
+    seed: int = 0,
+    delimiter: str = ';',
+    extra_columns: int = 0,
+    depth: int = None
+) -> int:
+    """
+    Записывает CSV с синтетической иерархией подразделений.
+
+    У каждой организации один корень без dep_headdep_uid, затем его
+    потомки: в порядке обхода в ширину, а для формы deep - цепочками
+    (родитель всегда раньше потомка). Строки делятся между организациями
+    поровну.
+
+    Args:
+        csv_file_path: путь к создаваемому CSV
+        rows: число строк данных
+        shape: форма дерева - ключ TREE_SHAPES
+        orgs: число организаций (отдельных деревьев)
+        encoding: кодировка файла (utf-8, utf-8-sig, cp1251)
+        seed: начальное значение генератора
+        delimiter: разделитель
+        extra_columns: число дополнительных колонок, которые конвертер не
+            читает (как в реальных выгрузках)
+        depth: глубина цепочки для формы deep (None - DEEP_CHAIN_DEPTH)
+
+    Returns:
+        int: число записанных строк данных
+
+    Raises:
+        ValueError: неизвестная форма дерева
+    """
+    if shape not in TREE_SHAPES:
+        raise ValueError(f"Неизвестная форма дерева: {shape} "
+                         f"(допустимые: {', '.join(TREE_SHAPES)})")
+    min_children, max_children = TREE_SHAPES[shape]
+    depth = max(1, depth or DEEP_CHAIN_DEPTH)
+    rng = random.Random(seed)
+    orgs = max(1, min(orgs, rows))
+    fields = CSV_FIELDS + [f'extra_{i + 1}' for i in range(extra_columns)]
+    written = 0
+
+    with open(csv_file_path, 'w', encoding=encoding, newline='') as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        writer.writerow(fields)
+        for org_index in range(orgs):
+            name = org_name(org_index)
+            org_rows = rows // orgs + (1 if org_index < rows % orgs else 0)
+            root_uid = _new_uid(rng)
+            extra = [f'{org_index}-{i}' for i in range(extra_columns)]
+            writer.writerow([name, 'Аппарат управления', root_uid, ''] + extra)
+            written += 1
+            org_rows -= 1
+
+            if shape == 'deep':
+                parent_uid, level = root_uid, 0
+                while org_rows > 0:
+                    if level == depth:
+                        parent_uid, level = root_uid, 0
+                    dep_uid = _new_uid(rng)
+                    writer.writerow([name, _dep_name(rng, written), dep_uid, parent_uid] + extra)
+                    parent_uid = dep_uid
+                    level += 1
+                    written += 1
+                    org_rows -= 1
+                continue
+
+            parents = deque([root_uid])
+            while org_rows > 0:
+                parent_uid = parents.popleft()
+                for _ in range(min(org_rows, rng.randint(min_children, max_children))):
+                    dep_uid = _new_uid(rng)
+                    writer.writerow([name, _dep_name(rng, written), dep_uid, parent_uid] + extra)
+                    parents.append(dep_uid)
+                    written += 1
+                    org_rows -= 1
+    return written
+
+
+def synthetic_file_name(rows: int, shape: str, orgs: int, encoding: str, seed: int = 0,
+                        depth: int = None) -> str:
+    """Имя файла по параметрам генерации (для кэша сгенерированных файлов)."""
+    if shape == 'deep':
+        shape = f"deep{depth or DEEP_CHAIN_DEPTH}"
+    return f"{shape}_{rows}r_{orgs}org_{encoding.replace('-', '')}_s{seed}.csv"
+
+
+def parse_arguments(argv: List[str] = None) -> argparse.Namespace:
+    """Разбирает аргументы командной строки генератора."""
+    parser = argparse.ArgumentParser(
+        description='Генерация синтетического CSV с иерархией подразделений')
+    parser.add_argument('csv_file', help='путь к создаваемому CSV')
+    parser.add_argument('--rows', type=int, default=100000, help='число строк данных')
+    parser.add_argument('--shape', choices=sorted(TREE_SHAPES), default='mixed',
+                        help='форма дерева')
+    parser.add_argument('--orgs', type=int, default=1, help='число организаций')
+    parser.add_argument('--encoding', default='utf-8', help='кодировка (utf-8, cp1251)')
+    parser.add_argument('--seed', type=int, default=0, help='начальное значение генератора')
+    parser.add_argument('--extra-columns', type=int, default=0,
+                        help='дополнительные колонки, не читаемые конвертером')
+    parser.add_argument('--depth', type=int, default=DEEP_CHAIN_DEPTH,
+                        help='глубина цепочки для формы deep')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    options = parse_arguments()
+    count = generate_org_csv(options.csv_file, options.rows, options.shape, options.orgs,
+                             options.encoding, options.seed, extra_columns=options.extra_columns,
+                             depth=options.depth)
+    print(f"Записано строк: {count} → {options.csv_file}")
@@ -4,20 +4,25 @@
 """
 
 
-from typing import List, Callable
+from typing import TYPE_CHECKING, List, Callable
+import signal
 import sys
-import os
 
 # Добавляем путь к папке modules в системный путь
 # modules_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modules')
 # sys.path.insert(0, modules_path)
 
-# Импортируем модули из папки modules
-from modules.csv_reader import get_csv_files
-from modules.csv_processor import create_batch_processor
-from modules.file_manager import create_file_manager, create_cli_manager
-from modules.logger_manager import create_logger_manager, LoggerConfig
+# Импортируем модули из папки modules. Здесь - только лёгкие: обработка
+# (lxml, chardet, пул процессов), логи и отслеживание папки импортируются
+# в функциях, чтобы --help, ошибки аргументов и пустая папка не ждали их
+from modules.file_manager import create_file_manager, create_cli_manager, FileManager
 from modules.config_manager import get_config_value
+from modules.progress import ProgressEvent, format_progress
+from modules.cancellation import CancellationToken
+from modules.compression import check_compression
+
+if TYPE_CHECKING:
+    from modules.csv_processor import BatchProcessor
 
 
 def process_all_csv_from_list(
@@ -25,8 +30,18 @@ def process_all_csv_from_list(
     csv_dir: str,
     file_list: List[str],
     log_callback: Callable[[str], None] = None,
-    allow_headdep_recursive=get_config_value(
-        'csv_processing.allow_headdep_recursive')
+    allow_headdep_recursive: bool = None,
+    max_workers: int = 1,
+    force: bool = False,
+    difference_model: bool = None,
+    previous_dir: str = None,
+    progress_callback: Callable[[ProgressEvent], None] = None,
+    cancel: CancellationToken = None,
+    file_timeout: float = None,
+    compression: str = None,
+    profile: str = None,
+    file_manager: FileManager = None,
+    batch_processor: 'BatchProcessor' = None
 ) -> dict:
     """
     Обрабатывает список CSV файлов через пакетный процессор.
@@ -36,20 +51,49 @@ def process_all_csv_from_list(
         csv_dir: директория с CSV файлами
         file_list: список файлов для обработки
         log_callback: callback для логов UI
-        allow_headdep_recursive: разрешить рекурсивный доступ
+        allow_headdep_recursive: разрешить рекурсивный доступ (None - из
+            config.json)
+        max_workers: число параллельных процессов (1 - последовательно)
+        force: обработать все файлы, даже если XML актуален по манифесту
+        difference_model: формировать разностную модель [имя].diff.xml
+            (None - из config.json)
+        previous_dir: папка с предыдущими версиями CSV/XML для сравнения
+            (None - существующие XML в csv_dir)
+        progress_callback: callback хода обработки (ProgressEvent), не чаще
+            раза в 0.25 с
+        cancel: токен отмены (cancel() можно вызвать из другого потока)
+        file_timeout: лимит времени на файл, секунд (None - из config.json,
+            0 - без лимита)
+        compression: сжатие выходных XML: gzip, zstd или 'none' (None - из
+            config.json)
+        profile: профилирование каждого файла: cpu (cProfile) или mem
+            (tracemalloc); файлы профиля сохраняются рядом с логами
+        file_manager: менеджер файлов csv_dir (None - создаётся новый)
+        batch_processor: пакетный процессор (None - создаётся новый); режим
+            отслеживания передаёт одни и те же между пакетами
 
     Returns:
-        dict: результаты обработки
+        dict: результаты обработки (BatchResults; up_to_date - пропущенные по
+        манифесту, cancelled - прерванные отменой, skipped - не начатые из-за отмены,
+        report - отчёт о запуске RunReport, report.path - сохранённый JSON)
     """
+    from modules.csv_processor import create_batch_processor
+    from modules.logger_manager import get_logger_manager, LoggerConfig
+
+    if allow_headdep_recursive is None:
+        allow_headdep_recursive = get_config_value('csv_processing.allow_headdep_recursive')
+
     # Создаем менеджеры
-    file_manager = create_file_manager(csv_dir)
-    logger_manager = create_logger_manager()
-    batch_processor = create_batch_processor()
+    if file_manager is None:
+        file_manager = create_file_manager(csv_dir)
+    logger_manager = get_logger_manager()
+    if batch_processor is None:
+        batch_processor = create_batch_processor()
 
     # Создаем директорию для логов
     log_dir = file_manager.create_log_directory()
 
-    # Фабрика логгеров
+    # Фабрика логгеров: логгер файла закрывается сразу после его обработки
     def logger_factory(filename: str):
         log_path = file_manager.get_log_path(filename)
         config = LoggerConfig()
@@ -60,52 +104,383 @@ def process_all_csv_from_list(
 
     # Обрабатываем файлы
     results = batch_processor.process_file_list(
-        folder_uid, csv_dir, file_list, logger_factory, allow_headdep_recursive
+        folder_uid, csv_dir, file_list, logger_factory, allow_headdep_recursive,
+        max_workers=max_workers, log_path_factory=file_manager.get_log_path,
+        force=force, difference_model=difference_model,
+        previous_dir=previous_dir,
+        logger_release=lambda filename: logger_manager.remove_logger(
+            file_manager.get_log_path(filename)),
+        progress_callback=progress_callback,
+        cancel=cancel, file_timeout=file_timeout, compression=compression,
+        profile=profile, profile_dir=log_dir
+    )
+
+    # Логи в режиме очереди дописываются до возврата результатов
+    logger_manager.flush()
+    save_run_report(file_manager, results, log_callback)
+    return results
+
+
+def save_run_report(file_manager: FileManager, results: dict,
+                    log_callback: Callable[[str], None] = None) -> None:
+    """Сохраняет JSON-отчёт о запуске (время этапов и счётчики по файлам) в папку логов."""
+    report_name = get_config_value('file_management.run_report_file')
+    if report_name and getattr(results, 'report', None) is not None:
+        try:
+            report_path = results.report.save(
+                file_manager.get_run_report_path(report_name))
+            if log_callback:
+                log_callback(f"Отчёт о запуске: {report_path}\n")
+        except OSError as e:
+            if log_callback:
+                log_callback(f"Не удалось сохранить отчёт о запуске: {e}\n")
+
+
+def process_consolidated_from_list(
+    folder_uid: str,
+    csv_dir: str,
+    file_list: List[str],
+    log_callback: Callable[[str], None] = None,
+    allow_headdep_recursive: bool = None,
+    output_name: str = None,
+    split_by_org: bool = False,
+    cancel: CancellationToken = None,
+    compression: str = None
+) -> dict:
+    """
+    Собирает список CSV в сводную модель (или модель на организацию).
+
+    Подразделения всех файлов попадают в общий индекс, поэтому родитель
+    (dep_headdep_uid) может находиться в другом файле. Лог - [имя]_[дата].log,
+    модели - [имя].xml или [имя]_[организация].xml в csv_dir.
+
+    Args:
+        folder_uid: UID папки для ролей
+        csv_dir: директория с CSV файлами
+        file_list: список файлов для обработки
+        log_callback: callback для логов UI
+        allow_headdep_recursive: разрешить рекурсивный доступ (None - из
+            config.json)
+        output_name: имя сводной модели (None - consolidated)
+        split_by_org: отдельная модель на каждую организацию
+        cancel: токен отмены (cancel() можно вызвать из другого потока)
+        compression: сжатие моделей: gzip, zstd или 'none' (None - из config.json)
+
+    Returns:
+        dict: результаты по входным файлам (ConsolidatedResults; outputs -
+        записанные модели, report - отчёт о запуске RunReport)
+    """
+    from modules.consolidation import create_consolidated_processor, CONSOLIDATED_NAME
+    from modules.logger_manager import get_logger_manager, LoggerConfig
+
+    if allow_headdep_recursive is None:
+        allow_headdep_recursive = get_config_value('csv_processing.allow_headdep_recursive')
+    output_name = output_name or CONSOLIDATED_NAME
+    file_manager = create_file_manager(csv_dir)
+    logger_manager = get_logger_manager()
+    file_manager.create_log_directory()
+
+    log_path = file_manager.get_log_path(output_name)
+    logger = logger_manager.create_logger(
+        log_path, log_file_path=log_path,
+        ui_callback=log_callback, config=LoggerConfig()
     )
+    try:
+        results = create_consolidated_processor().process_file_list(
+            folder_uid, csv_dir, file_list, logger, output_name=output_name,
+            split_by_org=split_by_org,
+            allow_headdep_recursive=allow_headdep_recursive,
+            compression=compression, cancel=cancel
+        )
+    finally:
+        logger_manager.remove_logger(log_path)
 
+    logger_manager.flush()
+    save_run_report(file_manager, results, log_callback)
     return results
 
 
+def watch_csv_folder(
+    folder_uid: str,
+    csv_dir: str,
+    log_callback: Callable[[str], None] = None,
+    allow_headdep_recursive: bool = None,
+    max_workers: int = 1,
+    force: bool = False,
+    difference_model: bool = None,
+    progress_callback: Callable[[ProgressEvent], None] = None,
+    cancel: CancellationToken = None,
+    file_timeout: float = None,
+    compression: str = None,
+    profile: str = None,
+    settle_time: float = None,
+    poll_interval: float = None,
+    backend: str = None,
+    batch_callback: Callable[[dict], None] = None
+) -> int:
+    """
+    Режим отслеживания: обрабатывает новые и изменённые CSV, пока не отменён.
+
+    Сначала обрабатываются CSV, уже лежащие в папке (актуальные по манифесту
+    пропускаются), затем - каждый новый или изменённый файл после окончания
+    записи. Менеджер файлов и пакетный процессор создаются один раз;
+    конфигурация и модули не перезагружаются между пакетами.
+
+    Args:
+        folder_uid: UID папки для ролей
+        csv_dir: директория с CSV файлами
+        log_callback: callback для логов UI
+        allow_headdep_recursive: разрешить рекурсивный доступ (None - из
+            config.json)
+        max_workers: число параллельных процессов (1 - последовательно)
+        force: обрабатывать файлы, даже если XML актуален по манифесту
+        difference_model: формировать разностную модель [имя].diff.xml
+            (None - из config.json)
+        progress_callback: callback хода обработки (ProgressEvent)
+        cancel: токен отмены; отмена прерывает текущий пакет и завершает
+            отслеживание
+        file_timeout: лимит времени на файл, секунд (None - из config.json)
+        compression: сжатие выходных XML (None - из config.json)
+        profile: профилирование каждого файла: cpu или mem
+        settle_time: сколько секунд файл не должен меняться до обработки
+            (None - из config.json)
+        poll_interval: период опроса папки, секунд (None - из config.json)
+        backend: auto | watchdog | poll (None - из config.json)
+        batch_callback: получает результаты каждого пакета (BatchResults)
+
+    Returns:
+        int: число обработанных пакетов
+
+    Raises:
+        ValueError: неизвестный способ отслеживания или не установлен watchdog
+    """
+    from modules.csv_processor import create_batch_processor
+    from modules.watcher import create_folder_watcher
+
+    if allow_headdep_recursive is None:
+        allow_headdep_recursive = get_config_value('csv_processing.allow_headdep_recursive')
+    if cancel is None:
+        cancel = CancellationToken()
+    file_manager = create_file_manager(csv_dir)
+    batch_processor = create_batch_processor()
+    watcher = create_folder_watcher(
+        file_manager,
+        get_config_value('file_management.watch_settle_time', 2.0) if settle_time is None else settle_time,
+        get_config_value('file_management.watch_poll_interval', 1.0) if poll_interval is None else poll_interval,
+        backend or get_config_value('file_management.watch_backend'))
+
+    def log(msg: str):
+        if log_callback:
+            log_callback(msg)
+
+    watcher.start()
+    log(f"Отслеживание папки {file_manager.base_directory} "
+        f"({'события файловой системы' if watcher.backend == 'watchdog' else 'опрос'}, "
+        f"ожидание окончания записи {watcher.settle_time:g} с)")
+    batches = 0
+    try:
+        while not cancel.cancelled:
+            try:
+                ready = watcher.poll()
+            except Exception as e:
+                # Сетевая папка может быть временно недоступна
+                log(f"Ошибка проверки папки: {e}")
+                ready = []
+            if ready:
+                log(f"Новые и изменённые файлы: {', '.join(ready)}")
+                results = process_all_csv_from_list(
+                    folder_uid, csv_dir, ready, log_callback=log_callback,
+                    allow_headdep_recursive=allow_headdep_recursive,
+                    max_workers=max_workers, force=force,
+                    difference_model=difference_model,
+                    progress_callback=progress_callback, cancel=cancel,
+                    file_timeout=file_timeout, compression=compression,
+                    profile=profile, file_manager=file_manager,
+                    batch_processor=batch_processor
+                )
+                batches += 1
+                if batch_callback:
+                    batch_callback(results)
+                continue
+            watcher.wait(cancel=cancel)
+    finally:
+        watcher.stop()
+    return batches
+
+
+def print_batch_results(results: dict) -> None:
+    """Выводит итоги пакета в консоль."""
+    successful = sum(1 for success in results.values() if success)
+    total = len(results)
+    print(f"Обработано файлов: {successful}/{total}")
+    report = getattr(results, 'report', None)
+    if report is not None and report.totals()['rows_read']:
+        totals = report.totals()
+        print(f"Строк прочитано: {totals['rows_read']} (отклонено: {totals['rows_rejected']}), "
+              f"ролей: {totals['roles']}, {totals['rows_per_sec']:.0f} стр/с за {report.elapsed:.1f} с")
+    up_to_date = getattr(results, 'up_to_date', [])
+    if up_to_date:
+        print(f"Актуальны (пропущены): {len(up_to_date)}")
+    cancelled = getattr(results, 'cancelled', []) + getattr(results, 'skipped', [])
+    if cancelled:
+        print(f"Отменено (XML не изменён): {len(cancelled)}")
+        for filename in cancelled:
+            print(f"  - {filename}")
+
+    failed = [x for x, success in results.items() if not success and x not in cancelled]
+    if failed:
+        print("Ошибки в файлах:")
+        for filename in failed:
+            print(f"  - {filename}")
+
+
 def debug_cli():
     """CLI для пакетного запуска."""
     # Создаем менеджеры
     cli_manager = create_cli_manager()
-    logger_manager = create_logger_manager()
 
     # Получаем параметры
-    folder_uid, csv_dir = cli_manager.get_cli_parameters()
+    options = cli_manager.parse_cli_arguments()
+    folder_uid, csv_dir = cli_manager.get_cli_parameters(options)
 
     # Создаем файловый менеджер
     file_manager = create_file_manager(csv_dir)
 
-    # Проверяем и получаем список файлов
-    csv_files = cli_manager.validate_and_list_files(file_manager)
-    if not csv_files:
+    # Проверяем и получаем список файлов (в режиме отслеживания папка может быть пуста)
+    if options.watch:
+        if not file_manager.validate_directory():
+            print(f"Папка не найдена: {file_manager.base_directory}")
+            return
+    else:
+        csv_files = cli_manager.validate_and_list_files(file_manager)
+        if not csv_files:
+            return
+    if options.watch and (options.consolidate or options.split_by_org):
+        print("Ошибка: сводная модель (--consolidate) не поддерживается в режиме --watch")
         return
+    if options.consolidate or options.split_by_org:
+        unsupported = [name for name, value in (
+            ('--jobs', options.jobs != 1), ('--force', options.force),
+            ('--diff', options.diff), ('--diff-from', options.diff_from),
+            ('--timeout', options.timeout is not None), ('--profile', options.profile)
+        ) if value]
+        if unsupported:
+            print(f"Ошибка: сводная модель (--consolidate) не поддерживает "
+                  f"{', '.join(unsupported)}")
+            return
+    try:
+        check_compression(options.compress)
+        if options.watch:
+            from modules.watcher import check_watch_backend
+            check_watch_backend(options.watch_backend
+                                or get_config_value('file_management.watch_backend'))
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        return
+
+    # Строка прогресса выводится в stderr поверх себя, только в терминал
+    progress_width = 0
+
+    def clear_progress():
+        nonlocal progress_width
+        if progress_width:
+            sys.stderr.write('\r' + ' ' * progress_width + '\r')
+            sys.stderr.flush()
+            progress_width = 0
 
     def cli_log(msg):
+        clear_progress()
         print(msg, end='' if msg.endswith('\n') else '\n')
 
+    def cli_progress(event: ProgressEvent):
+        nonlocal progress_width
+        line = format_progress(event)
+        sys.stderr.write('\r' + line.ljust(progress_width))
+        sys.stderr.flush()
+        progress_width = len(line)
+
+    # Первый Ctrl+C отменяет пакет (текущий файл прерывается, XML не меняется)
+    # и завершает отслеживание, повторный - прерывает программу
+    cancel = CancellationToken()
+
+    def on_interrupt(signum, frame):
+        clear_progress()
+        print("Отмена обработки... (повторный Ctrl+C - немедленный выход)")
+        cancel.cancel()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    signal.signal(signal.SIGINT, on_interrupt)
+
+    if options.consolidate or options.split_by_org:
+        results = process_consolidated_from_list(
+            folder_uid, csv_dir, csv_files,
+            log_callback=cli_log,
+            allow_headdep_recursive=True,
+            output_name=options.output_name,
+            split_by_org=options.split_by_org,
+            cancel=cancel, compression=options.compress
+        )
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        clear_progress()
+        print_batch_results(results)
+        if results.outputs:
+            print(f"Сводные модели ({results.departments} подразделений, "
+                  f"с родителем из другого файла: {results.cross_file_links}):")
+            for xml_file_path in results.outputs:
+                print(f"  - {xml_file_path}")
+        cli_manager.print_completion_message()
+        return
+
+    if options.watch:
+        def on_batch(results):
+            clear_progress()
+            print_batch_results(results)
+            print("-" * 25)
+
+        print("Режим отслеживания: новые и изменённые CSV обрабатываются автоматически "
+              "(Ctrl+C - выход)")
+        watch_csv_folder(
+            folder_uid, csv_dir, log_callback=cli_log,
+            allow_headdep_recursive=True,
+            max_workers=max(1, options.jobs),
+            force=options.force,
+            difference_model=True if options.diff else None,
+            progress_callback=cli_progress if sys.stderr.isatty() else None,
+            cancel=cancel, file_timeout=options.timeout,
+            compression=options.compress, profile=options.profile,
+            settle_time=options.settle, poll_interval=options.poll_interval,
+            backend=options.watch_backend, batch_callback=on_batch
+        )
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        clear_progress()
+        cli_manager.print_completion_message()
+        return
+
     # Обрабатываем файлы
     results = process_all_csv_from_list(
         folder_uid, csv_dir, csv_files,
         log_callback=cli_log,
-        allow_headdep_recursive=True
+        allow_headdep_recursive=True,
+        max_workers=max(1, options.jobs),
+        force=options.force,
+        difference_model=True if options.diff or options.diff_from else None,
+        previous_dir=options.diff_from,
+        progress_callback=cli_progress if sys.stderr.isatty() else None,
+        cancel=cancel, file_timeout=options.timeout,
+        compression=options.compress, profile=options.profile
     )
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    clear_progress()
 
     # Выводим результаты
-    successful = sum(1 for success in results.values() if success)
-    total = len(results)
-    print(f"Обработано файлов: {successful}/{total}")
-
-    if successful < total:
-        print("Ошибки в файлах:")
-        for filename, success in results.items():
-            if not success:
-                print(f"  - {filename}")
-
+    print_batch_results(results)
     cli_manager.print_completion_message()
 
 
 if __name__ == '__main__':
+    # Нужно для пула процессов в собранном .exe (вне .exe freeze_support ничего
+    # не делает, а импорт multiprocessing заметно удлиняет запуск)
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()
     debug_cli()
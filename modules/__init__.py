@@ -2,12 +2,62 @@
 Инициализация пакета модулей
 """
 
-# Импортируем по одному, чтобы избежать циклических зависимостей
-from .csv_reader import *
-from .xml_generator import *
-from .file_manager import *
-from .logger_manager import *
-from .csv_processor import *
-
+# Версия объявляется до импорта модулей: её читает манифест пакетной обработки
 __version__ = "1.0.0"
-__author__ = "Your Name"
\ No newline at end of file
+__author__ = "Your Name"
+
+# Подмодули в порядке прежних звёздочных импортов (при совпадении имён
+# действует последний). Они загружаются при первом обращении к имени из
+# пакета: "from modules.file_manager import ..." не тянет lxml, chardet и
+# остальные модули, что ускоряет запуск CLI
+_SUBMODULES = (
+    'compression',
+    'uid_provider',
+    'hierarchy',
+    'input_probe',
+    'difference_model',
+    'csv_reader',
+    'xml_generator',
+    'file_manager',
+    'logger_manager',
+    'progress',
+    'cancellation',
+    'run_report',
+    'profiling',
+    'csv_processor',
+    'watcher',
+    'consolidation',
+)
+
+_exports = None
+
+
+def _load_exports() -> dict:
+    """Импортирует подмодули по одному и собирает их публичные имена."""
+    global _exports
+    if _exports is None:
+        from importlib import import_module
+        exports = {}
+        for name in _SUBMODULES:
+            module = import_module(f'.{name}', __name__)
+            names = getattr(module, '__all__', None)
+            if names is None:
+                names = [x for x in vars(module) if not x.startswith('_')]
+            exports.update((x, getattr(module, x)) for x in names)
+        _exports = exports
+    return _exports
+
+
+def __getattr__(name: str):
+    if name == '__all__':
+        return list(_load_exports())
+    if name.startswith('__'):
+        raise AttributeError(name)
+    try:
+        return _load_exports()[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_load_exports()))
\ No newline at end of file
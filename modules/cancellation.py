@@ -0,0 +1,83 @@
+"""
+Модуль отмены обработки
+Ответственность: кооперативная отмена пакета и лимит времени на файл
+"""
+
+import threading
+import time
+
+
+class OperationCancelled(Exception):
+    """Обработка прервана: отмена пакета или превышение лимита времени."""
+
+
+class CancellationToken:
+    """
+    Признак отмены, проверяемый обработкой между блоками строк.
+
+    cancel() можно вызывать из любого потока (кнопка UI, обработчик
+    Ctrl+C). Дочерний токен (child) отменяется вместе с родителем и
+    может иметь свой лимит времени - так задаётся бюджет на один файл.
+    В рабочие процессы пула передаётся multiprocessing.Event (event).
+    """
+
+    def __init__(self, parent: 'CancellationToken' = None, timeout: float = None, event=None):
+        """
+        Инициализация токена.
+
+        Args:
+            parent: родительский токен (отмена родителя отменяет этот токен)
+            timeout: лимит времени в секундах от создания токена (None или 0 - без лимита)
+            event: объект с is_set()/set() (по умолчанию threading.Event)
+        """
+        self._parent = parent
+        self._event = event if event is not None else threading.Event()
+        self.timeout = timeout or None
+        self._deadline = time.monotonic() + timeout if timeout else None
+
+    def cancel(self) -> None:
+        """Отменяет обработку (из любого потока)."""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """True, если отменён этот токен или родитель (лимит времени не учитывается)."""
+        if self._event.is_set():
+            return True
+        return self._parent is not None and self._parent.cancelled
+
+    @property
+    def timed_out(self) -> bool:
+        """True, если истёк лимит времени этого токена или родителя."""
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            return True
+        return self._parent is not None and self._parent.timed_out
+
+    def check(self) -> None:
+        """
+        Проверяет отмену и лимит времени.
+
+        Raises:
+            OperationCancelled: обработка отменена или истёк лимит времени
+        """
+        if self.cancelled:
+            raise OperationCancelled("обработка отменена")
+        if self.timed_out:
+            raise OperationCancelled(
+                f"превышен лимит времени ({self._effective_timeout():g} с)")
+
+    def child(self, timeout: float = None) -> 'CancellationToken':
+        """Создает дочерний токен с собственным лимитом времени."""
+        return CancellationToken(self, timeout)
+
+    def _effective_timeout(self) -> float:
+        """Лимит времени, который истёк (свой или родителя)."""
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            return self.timeout
+        return self._parent._effective_timeout() if self._parent is not None else 0.0
+
+
+# Фабричные функции для удобства
+def create_cancellation_token(timeout: float = None) -> CancellationToken:
+    """Создает токен отмены обработки."""
+    return CancellationToken(timeout=timeout)
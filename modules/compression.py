@@ -0,0 +1,138 @@
+"""
+Модуль сжатия выходных файлов
+Ответственность: потоковая запись и чтение XML через gzip или zstd
+"""
+
+import gzip
+import io
+from typing import BinaryIO, Optional
+
+# Суффиксы сжатых файлов: [имя].xml.gz, [имя].xml.zst
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+# Уровни по умолчанию: быстрые, для повторяющегося XML сжатие всё равно высокое
+DEFAULT_COMPRESSION_LEVELS = {'gzip': 1, 'zstd': 3}
+
+# Размер буфера перед компрессором: объединяет мелкие записи шаблонов
+_BUFFER_SIZE = 1 << 20
+
+
+class _GzipOutput(gzip.GzipFile):
+    """Поток gzip поверх открытого файла: close() закрывает и сам файл."""
+
+    def close(self):
+        raw_file = self.fileobj
+        try:
+            super().close()
+        finally:
+            if raw_file is not None:
+                raw_file.close()
+
+
+def _import_zstandard():
+    """Импортирует необязательный модуль zstandard."""
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError(
+            "Для сжатия zstd нужен пакет zstandard (pip install zstandard)") from None
+    return zstandard
+
+
+def check_compression(compression: Optional[str]) -> Optional[str]:
+    """
+    Проверяет метод сжатия и доступность его модуля.
+
+    Args:
+        compression: gzip | zstd | None (пустая строка или 'none' - без сжатия)
+
+    Returns:
+        Optional[str]: метод сжатия или None
+
+    Raises:
+        ValueError: неизвестный метод или не установлен zstandard
+    """
+    if not compression or compression == 'none':
+        return None
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Неизвестный метод сжатия: {compression} "
+                         f"(допустимые: {', '.join(COMPRESSION_SUFFIXES)})")
+    if compression == 'zstd':
+        _import_zstandard()
+    return compression
+
+
+def compression_suffix(compression: Optional[str]) -> str:
+    """Суффикс файла для метода сжатия ('' без сжатия)."""
+    return COMPRESSION_SUFFIXES.get(compression, '') if compression else ''
+
+
+def compression_from_path(file_path: str) -> Optional[str]:
+    """Определяет метод сжатия по суффиксу файла."""
+    lower = str(file_path).lower()
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if lower.endswith(suffix):
+            return compression
+    return None
+
+
+def strip_compression_suffix(file_path: str) -> str:
+    """Путь без суффикса сжатия: a.xml.gz -> a.xml."""
+    compression = compression_from_path(file_path)
+    if compression is None:
+        return str(file_path)
+    return str(file_path)[:-len(COMPRESSION_SUFFIXES[compression])]
+
+
+def open_output(file_path: str, compression: str = None, level: int = None) -> BinaryIO:
+    """
+    Открывает файл для потоковой записи, при необходимости через компрессор.
+
+    Args:
+        file_path: путь к файлу
+        compression: gzip | zstd | None (None - по суффиксу file_path)
+        level: уровень сжатия (None - DEFAULT_COMPRESSION_LEVELS)
+
+    Returns:
+        BinaryIO: буферизованный файл; close() завершает поток сжатия
+    """
+    compression = compression or compression_from_path(file_path)
+    if compression is None:
+        return open(file_path, 'wb', buffering=_BUFFER_SIZE)
+    if level is None:
+        level = DEFAULT_COMPRESSION_LEVELS[compression]
+
+    if compression == 'gzip':
+        # mtime=0 и пустое имя в заголовке (пишется во временный файл):
+        # одинаковое содержимое даёт одинаковый файл
+        raw_file = open(file_path, 'wb')
+        raw = _GzipOutput(filename='', fileobj=raw_file, mode='wb',
+                          compresslevel=level, mtime=0)
+    elif compression == 'zstd':
+        zstandard = _import_zstandard()
+        # threads=-1: сжатие в потоках libzstd параллельно с генерацией XML
+        raw = zstandard.ZstdCompressor(level=level, threads=-1).stream_writer(
+            open(file_path, 'wb'), closefd=True)
+    else:
+        raise ValueError(f"Неизвестный метод сжатия: {compression}")
+    return io.BufferedWriter(raw, _BUFFER_SIZE)
+
+
+def open_input(file_path: str) -> BinaryIO:
+    """
+    Открывает файл для чтения с распаковкой по суффиксу (.gz, .zst).
+
+    Args:
+        file_path: путь к файлу
+
+    Returns:
+        BinaryIO: файл с распакованным содержимым
+    """
+    compression = compression_from_path(file_path)
+    if compression == 'gzip':
+        return gzip.open(file_path, 'rb')
+    if compression == 'zstd':
+        zstandard = _import_zstandard()
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(file_path, 'rb'), closefd=True)
+    return open(file_path, 'rb')
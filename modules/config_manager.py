@@ -43,7 +43,8 @@ class ConfigManager:
                 "model_version": "2025-03-04(11.7.1.7)",
                 "model_name": "Access",
                 "role_template": "Чтение записей под подр-ю {org_name}\\{dep_name}",
-                "allow_headdep_recursive": True
+                "allow_headdep_recursive": True,
+                "single_pass_ingest": True
             },
 
             "xml_generation": {
@@ -56,13 +57,20 @@ class ConfigManager:
 
             "file_management": {
                 "exclude_files": ["sample.csv"],
-                "log_directory": "log"
+                "log_directory": "log",
+                "manifest_file": ".csv2xml_manifest.json",
+                "run_report_file": "run_report.json",
+                "watch_backend": "auto",
+                "watch_poll_interval": 1.0,
+                "watch_settle_time": 2.0
             },
 
             "logging": {
                 "level": "INFO",
                 "format": "%(asctime)s [%(levelname)s]: %(message)s",
-                "date_format": "%Y-%m-%d %H:%M:%S"
+                "date_format": "%Y-%m-%d %H:%M:%S",
+                "queue_mode": True,
+                "row_logging": "full"
             }
         }
 
@@ -0,0 +1,529 @@
+"""
+Модуль сводной модели нескольких CSV
+Ответственность: общий индекс подразделений файлов пакета, одна модель
+(или модель на организацию) с родителями из любого файла
+"""
+
+import logging
+import os
+import re
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from .csv_reader import iter_csv_rows, make_department_record, DepartmentRecord, PROGRESS_STEP
+from .hierarchy import HierarchyStore
+from .input_probe import probe_csv_input, save_probe_caches
+from .uid_provider import create_uid_provider
+from .xml_generator import create_access_generator
+from .cancellation import CancellationToken, OperationCancelled
+from .run_report import FileRunStats, RunReport
+from .compression import check_compression, compression_suffix
+from .config_manager import get_config_value
+from .csv_processor import CSVProcessor, BatchResults, _remove_file
+
+# Имя сводной модели по умолчанию: [имя].xml или [имя]_[организация].xml
+CONSOLIDATED_NAME = 'consolidated'
+
+# Сколько повторов dep_uid логировать построчно (остальные - только числом)
+_DUPLICATE_EXAMPLES = 10
+
+# Символы, недопустимые в именах файлов Windows
+_UNSAFE_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]+')
+
+
+class DepartmentIndex:
+    """
+    Общий индекс подразделений нескольких CSV.
+
+    Файлы читаются потоково по одному; хранятся только записи
+    DepartmentRecord (для повторяющегося dep_uid - последняя), связи
+    родитель → потомки и номер файла, где подразделение встретилось
+    впервые. Строки CSV не хранятся: память зависит от числа
+    подразделений, а не от объёма входных файлов. Родитель подразделения
+    может находиться в любом файле индекса.
+    """
+
+    def __init__(self, required_fields: List[str], parent_field: str = None):
+        """
+        Инициализация индекса.
+
+        Args:
+            required_fields: обязательные поля (третье - ключ подразделения)
+            parent_field: поле с UID родителя
+        """
+        self.required_fields = required_fields
+        self.parent_field = parent_field
+        self.dep_info: Dict[str, DepartmentRecord] = {}
+        self.dep_tree: Dict[str, set] = {}
+        # Номер файла (self.files) по номеру подразделения в порядке dep_info
+        self.sources = array('I')
+        self.files: List[str] = []
+        self.duplicates = 0
+        self._strings: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.dep_info)
+
+    def add_file(
+        self,
+        csv_file_path: str,
+        encoding: str,
+        delimiter: str = ';',
+        logger: logging.Logger = None,
+        progress: Callable[[int, int], None] = None
+    ) -> int:
+        """
+        Добавляет подразделения CSV в индекс.
+
+        Args:
+            csv_file_path: путь к CSV файлу
+            encoding: кодировка файла
+            delimiter: разделитель
+            logger: логгер ошибок строк (опционально)
+            progress: вызывается каждые PROGRESS_STEP строк с (прочитано
+                строк, прочитано байт) (опционально)
+
+        Returns:
+            int: число валидных строк файла
+        """
+        file_index = len(self.files)
+        self.files.append(csv_file_path)
+        dep_info, dep_tree, strings = self.dep_info, self.dep_tree, self._strings
+        key_field = self.required_fields[2] if len(self.required_fields) > 2 else None
+        parent_field = self.parent_field
+        rows = 0
+
+        for line_num, row in iter_csv_rows(
+                csv_file_path, encoding, self.required_fields, logger, delimiter, progress):
+            rows += 1
+            record_id = row[key_field] if key_field else None
+            if not record_id:
+                continue
+            if record_id in dep_info:
+                self.duplicates += 1
+                if logger and self.duplicates <= _DUPLICATE_EXAMPLES:
+                    logger.warning("Строка %d: подразделение %s уже есть в индексе, "
+                                   "используется последняя запись", line_num, record_id)
+            else:
+                self.sources.append(file_index)
+            dep_info[record_id] = make_department_record(row, strings)
+
+            if parent_field and parent_field in row:
+                parent_id = row[parent_field].strip()
+                if parent_id:
+                    parent_id = strings.setdefault(parent_id, parent_id)
+                    dep_tree.setdefault(parent_id, set()).add(record_id)
+        return rows
+
+    def build_store(self) -> HierarchyStore:
+        """
+        Строит иерархию всех файлов и освобождает словарь связей.
+
+        Returns:
+            HierarchyStore: узлы 0..len-1 - подразделения в порядке dep_info
+        """
+        store = HierarchyStore(self.dep_tree, self.dep_info)
+        self.dep_tree = {}
+        self._strings = {}
+        return store
+
+    def count_parent_links(self, store: HierarchyStore) -> tuple:
+        """
+        Считает связи с родителем по файлам.
+
+        Returns:
+            tuple: (родитель в другом файле, родитель не найден ни в одном файле)
+        """
+        cross_file = missing = 0
+        sources = self.sources
+        for node, record in enumerate(self.dep_info.values()):
+            parent_uid = record.get('dep_headdep_uid')
+            if not parent_uid or not parent_uid.strip():
+                continue
+            parent = store.node(parent_uid.strip())
+            if not 0 <= parent < store.ordered:
+                missing += 1
+            elif sources[parent] != sources[node]:
+                cross_file += 1
+        return cross_file, missing
+
+
+class ConsolidatedResults(BatchResults):
+    """
+    Результаты сводной обработки {имя CSV: успех}.
+
+    Файл успешен, если он прочитан и все сводные модели записаны.
+
+    Attributes:
+        outputs: пути к записанным сводным моделям
+        departments: подразделений в общем индексе
+        cross_file_links: подразделений с родителем из другого файла
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.outputs: List[str] = []
+        self.departments = 0
+        self.cross_file_links = 0
+
+
+class ConsolidatedProcessor(CSVProcessor):
+    """
+    Сводная обработка: несколько CSV → одна модель или модель на организацию.
+
+    Все файлы сначала читаются в общий индекс (DepartmentIndex), поэтому
+    dep_headdep_uid, рекурсивный доступ и headdep_name разрешаются через
+    границы файлов. Роль формируется одна на подразделение (повтор dep_uid
+    в другом файле не даёт второй роли с тем же UID). В режиме
+    организаций DataGroup подразделения пишется в модель его организации,
+    а роль ссылается на DataGroup по UID, даже если поддерево выходит за
+    организацию.
+    """
+
+    def __init__(self):
+        """Инициализация процессора."""
+        super().__init__()
+        self.compression = get_config_value('xml_generation.compression')
+
+    def process_file_list(
+        self,
+        folder_uid: str,
+        csv_dir: str,
+        file_list: List[str],
+        logger: logging.Logger,
+        output_name: str = CONSOLIDATED_NAME,
+        split_by_org: bool = False,
+        allow_headdep_recursive: bool = True,
+        compression: str = None,
+        cancel: CancellationToken = None
+    ) -> ConsolidatedResults:
+        """
+        Собирает CSV в общий индекс и пишет сводные модели в csv_dir.
+
+        Args:
+            folder_uid: UID папки для ролей
+            csv_dir: директория с CSV файлами
+            file_list: список файлов (порядок задаёт порядок подразделений)
+            logger: логгер сводной обработки
+            output_name: имя модели: [имя].xml или [имя]_[организация].xml
+            split_by_org: отдельная модель на каждую организацию (org_name)
+            allow_headdep_recursive: разрешить рекурсивный доступ
+            compression: сжатие моделей - gzip, zstd или '' (None -
+                xml_generation.compression из config.json)
+            cancel: токен отмены; после отмены модели не записываются
+
+        Returns:
+            ConsolidatedResults: итог по входным файлам, пути моделей;
+            results.report - отчёт о запуске (входные файлы и модели)
+
+        Raises:
+            ValueError: неизвестный метод сжатия или не установлен zstandard
+        """
+        compression = check_compression(
+            self.compression if compression is None else compression)
+        results = ConsolidatedResults()
+        report = RunReport(csv_dir, folder_uid, {
+            'consolidated': 'org' if split_by_org else 'single',
+            'output_name': output_name,
+            'allow_headdep_recursive': bool(allow_headdep_recursive),
+            'compression': compression,
+        })
+        input_stats = {x: FileRunStats(x) for x in file_list}
+        output_stats: List[FileRunStats] = []
+        index = DepartmentIndex(self.required_fields, self.parent_field)
+
+        logger.info(f"Сводная обработка: файлов {len(file_list)} → "
+                    f"{'модель на организацию' if split_by_org else 'одна модель'} {output_name}")
+        try:
+            for csv_filename in file_list:
+                results[csv_filename] = self._index_file(
+                    index, str(Path(csv_dir) / csv_filename), logger,
+                    input_stats[csv_filename], cancel)
+
+            if len(index):
+                outputs_ok = self._write_models(
+                    index, folder_uid, csv_dir, logger, output_name, split_by_org,
+                    allow_headdep_recursive, compression, cancel, results, output_stats)
+            else:
+                logger.warning("Во входных файлах нет подразделений: сводная модель не записана")
+                outputs_ok = False
+        except OperationCancelled as e:
+            logger.warning(f"Сводная обработка прервана: {e}. Модели не изменены")
+            for csv_filename in file_list:
+                stats = input_stats[csv_filename]
+                if stats.status == 'pending':
+                    results.skipped.append(csv_filename)
+                    stats.finish('skipped')
+                else:
+                    results.cancelled.append(csv_filename)
+            outputs_ok = False
+        finally:
+            save_probe_caches()
+
+        for csv_filename in file_list:
+            results[csv_filename] = bool(results.get(csv_filename)) and outputs_ok
+        report.add_files(input_stats[x] for x in file_list)
+        report.add_files(output_stats)
+        report.finish()
+        results.report = report
+        return results
+
+    def _index_file(
+        self,
+        index: DepartmentIndex,
+        csv_file_path: str,
+        logger: logging.Logger,
+        stats: FileRunStats,
+        cancel: CancellationToken = None
+    ) -> bool:
+        """Читает один CSV в общий индекс: True, если файл прочитан."""
+        stats.start(csv_file_path)
+        stats.stage('probe')
+        try:
+            probe = probe_csv_input(
+                csv_file_path, self.required_fields, self.default_delimiter,
+                cache=self._get_probe_cache(csv_file_path)
+            )
+        except Exception as e:
+            logger.error(f"Ошибка чтения CSV-файла {csv_file_path}: {e}")
+            stats.finish('failed')
+            return False
+        if probe.missing_fields:
+            logger.error(f"В заголовке CSV-файла {csv_file_path} нет обязательных полей: "
+                         f"{', '.join(probe.missing_fields)}")
+            stats.finish('failed')
+            return False
+
+        def on_rows(rows: int, bytes_read: int) -> None:
+            stats.rows_read = rows
+            if cancel is not None:
+                cancel.check()
+
+        stats.stage('scan')
+        before = len(index)
+        try:
+            rows = index.add_file(
+                csv_file_path, probe.encoding, probe.delimiter, logger, on_rows)
+        except OperationCancelled:
+            stats.finish('cancelled')
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка чтения CSV-файла {csv_file_path}: {e}")
+            stats.finish('failed')
+            return False
+        stats.rows_read = max(stats.rows_read, rows)
+        stats.rows_rejected = stats.rows_read - rows
+        logger.info(f"Файл {Path(csv_file_path).name} ({probe.encoding}, {probe.delimiter!r}): "
+                    f"строк {rows}, новых подразделений {len(index) - before}")
+        stats.finish('ok')
+        return True
+
+    def _write_models(
+        self,
+        index: DepartmentIndex,
+        folder_uid: str,
+        csv_dir: str,
+        logger: logging.Logger,
+        output_name: str,
+        split_by_org: bool,
+        allow_headdep_recursive: bool,
+        compression: Optional[str],
+        cancel: Optional[CancellationToken],
+        results: ConsolidatedResults,
+        output_stats: List[FileRunStats]
+    ) -> bool:
+        """Строит общую иерархию и пишет модели: True, если записаны все."""
+        store = index.build_store()
+        for cycle in store.format_cycles():
+            logger.warning(f"Обнаружен цикл в иерархии подразделений: {cycle}")
+        cross_file, missing = index.count_parent_links(store)
+        results.departments, results.cross_file_links = len(index), cross_file
+        logger.info(f"Общий индекс: подразделений {len(index)}, с родителем из другого файла "
+                    f"{cross_file}, родитель не найден {missing}, повторов dep_uid "
+                    f"{index.duplicates}, иерархия {store.nbytes() / 2**20:.1f} МБ")
+        if missing:
+            logger.warning(f"У {missing} подразделений родитель (dep_headdep_uid) не найден "
+                           f"ни в одном входном файле")
+
+        suffix = compression_suffix(compression)
+        try:
+            uid_provider = create_uid_provider(
+                self.uid_mode, scope=folder_uid,
+                mapping_file=self._get_uid_mapping_file(str(Path(csv_dir) / f"{output_name}.xml")))
+        except Exception as e:
+            logger.error(f"Ошибка инициализации UID: {e}")
+            return False
+
+        records = list(index.dep_info.values())
+        try:
+            # UID всех DataGroup - заранее: роль может ссылаться на DataGroup другой модели
+            datagroup_uids = [uid_provider.uid('DataGroup', x) for x in store.uids[:store.ordered]]
+            if split_by_org:
+                groups = _group_by_org(records)
+                names = _org_file_names(groups)
+                models = [(f"{output_name}_{names[org]}", nodes) for org, nodes in groups.items()]
+                logger.info(f"Организаций: {len(models)}")
+            else:
+                models = [(output_name, range(len(records)))]
+
+            all_ok = True
+            for model_name, nodes in models:
+                xml_file_path = str(Path(csv_dir) / f"{model_name}.xml{suffix}")
+                stats = FileRunStats(Path(xml_file_path).name)
+                output_stats.append(stats)
+                if self._write_model(
+                        xml_file_path, model_name, nodes, index, store, records, datagroup_uids,
+                        uid_provider, folder_uid, logger, allow_headdep_recursive,
+                        compression, cancel, stats):
+                    results.outputs.append(xml_file_path)
+                else:
+                    all_ok = False
+            return all_ok
+        finally:
+            uid_provider.close()
+
+    def _write_model(
+        self,
+        xml_file_path: str,
+        model_name: str,
+        nodes: Sequence[int],
+        index: DepartmentIndex,
+        store: HierarchyStore,
+        records: List[DepartmentRecord],
+        datagroup_uids: List[str],
+        uid_provider,
+        folder_uid: str,
+        logger: logging.Logger,
+        allow_headdep_recursive: bool,
+        compression: Optional[str],
+        cancel: Optional[CancellationToken],
+        stats: FileRunStats
+    ) -> bool:
+        """Пишет одну модель из подразделений nodes (номера узлов store)."""
+        dep_info, uids = index.dep_info, store.uids
+        xml_generator = create_access_generator(uid_provider)
+        row_interval = self.row_log_policy.row_interval(logger)
+        roles_added = data_item_links = 0
+        stats.start()
+
+        def headdep_name_of(record: DepartmentRecord) -> Optional[str]:
+            dep_headdep_uid = record.get('dep_headdep_uid', None)
+            if not dep_headdep_uid:
+                return None
+            return dep_info.get(dep_headdep_uid, {}).get('dep_name', '')
+
+        def iter_datagroups():
+            for position, node in enumerate(nodes):
+                if cancel is not None and position % PROGRESS_STEP == 0:
+                    cancel.check()
+                record, dep_uid = records[node], uids[node]
+                yield (record.get('org_name', ''), record.get('dep_name', ''), dep_uid,
+                       datagroup_uids[node], headdep_name_of(record),
+                       uid_provider.uid('ObjectReference', dep_uid))
+
+        def iter_roles():
+            nonlocal roles_added, data_item_links
+            stats.stage('roles')
+            for node in nodes:
+                record, dep_uid = records[node], uids[node]
+                org_name, dep_name = record.get('org_name', ''), record.get('dep_name', '')
+                headdep_name = headdep_name_of(record)
+                if allow_headdep_recursive and store.has_children(node):
+                    data_items_uids = [datagroup_uids[x] for x in store.ordered_subtree(node)]
+                else:
+                    data_items_uids = [datagroup_uids[node]]
+
+                if row_interval and roles_added % row_interval == 0:
+                    if headdep_name:
+                        role_name = self.role_template_with_headdep.format(
+                            org_name=org_name, headdep_name=headdep_name, dep_name=dep_name)
+                    else:
+                        role_name = self.role_template.format(
+                            org_name=org_name, dep_name=dep_name)
+                    logger.info("Добавляется роль: %s, dep_uid=%s (%s)", role_name, dep_uid,
+                                Path(index.files[index.sources[node]]).name)
+                data_item_links += len(data_items_uids)
+                yield (org_name, dep_name, folder_uid, data_items_uids, headdep_name,
+                       uid_provider.uid('Role', dep_uid), uid_provider.uid('Privilege', dep_uid))
+                roles_added += 1
+                if cancel is not None and roles_added % PROGRESS_STEP == 0:
+                    cancel.check()
+
+        def generate_head(xf):
+            xml_generator.add_full_model(
+                xf, self.model_version, self.model_name,
+                uid_provider.uid('FullModel', model_name))
+
+        def generate_content(xf):
+            generate_head(xf)
+            for record in iter_datagroups():
+                xml_generator.add_data_group(xf, *record)
+            for record in iter_roles():
+                xml_generator.add_role_with_privilege(xf, *record)
+
+        def write_body(write):
+            for record in iter_datagroups():
+                xml_generator.write_data_group(write, *record)
+            for record in iter_roles():
+                xml_generator.write_role_with_privilege(write, *record)
+
+        stats.stage('datagroups')
+        tmp_xml_path = f"{xml_file_path}.{os.getpid()}.tmp"
+        try:
+            if self.use_xml_templates:
+                xml_generator.generate_xml_raw(
+                    tmp_xml_path, generate_head, write_body, compression=compression)
+            else:
+                xml_generator.generate_xml(
+                    tmp_xml_path, generate_content, compression=compression)
+            os.replace(tmp_xml_path, xml_file_path)
+            stats.bytes_written = os.path.getsize(xml_file_path)
+            logger.info(f"Сводная модель сохранена: {xml_file_path} (подразделений "
+                        f"{len(nodes)}, связей Privilege.DataItems: {data_item_links})")
+            stats.finish('ok')
+            return True
+        except OperationCancelled:
+            stats.finish('cancelled')
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка генерации XML-файла {xml_file_path}: {e}")
+            stats.finish('failed')
+            return False
+        finally:
+            _remove_file(tmp_xml_path)
+            stats.datagroups = len(nodes)
+            stats.roles = roles_added
+            stats.data_item_links = data_item_links
+
+
+def _group_by_org(records: Iterable[DepartmentRecord]) -> Dict[str, array]:
+    """Номера подразделений по организациям (в порядке первого появления)."""
+    groups: Dict[str, array] = {}
+    for node, record in enumerate(records):
+        org_name = record.get('org_name', '')
+        nodes = groups.get(org_name)
+        if nodes is None:
+            nodes = groups[org_name] = array('i')
+        nodes.append(node)
+    return groups
+
+
+def _org_file_names(org_names: Iterable[str]) -> Dict[str, str]:
+    """Части имён файлов для организаций: без недопустимых символов, уникальные."""
+    names: Dict[str, str] = {}
+    used = set()
+    for org_name in org_names:
+        base = _UNSAFE_FILENAME_CHARS.sub('_', org_name).strip(' .') or 'org'
+        name, counter = base, 2
+        while name.lower() in used:
+            name, counter = f"{base}_{counter}", counter + 1
+        used.add(name.lower())
+        names[org_name] = name
+    return names
+
+
+# Фабричные функции для удобства
+def create_consolidated_processor() -> ConsolidatedProcessor:
+    """Создает процессор сводной модели."""
+    return ConsolidatedProcessor()
@@ -4,16 +4,36 @@
 """
 
 import logging
-from typing import List, Dict, Set, Callable
-import lxml.etree as etree
+import os
+import multiprocessing
+import signal
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import List, Dict, Callable, Optional, Tuple
 
 # Импортируем необходимые модули с относительными путями
 from .csv_reader import (
-    read_encoding, iter_csv_rows, collect_csv_structure,
-    collect_all_children, check_required_fields, gen_uid
+    iter_csv_rows, collect_csv_structure, collect_csv_data, PROGRESS_STEP
 )
+from .hierarchy import HierarchyStore
+from .input_probe import (
+    probe_csv_input, get_probe_cache, save_probe_caches, take_probe_cache_entries,
+    merge_probe_cache_entries
+)
+from .uid_provider import create_uid_provider
+from .manifest import BatchManifest, hash_config
+from .difference_model import load_model_objects, ModelComparer, ModelDifference
 from .xml_generator import create_access_generator
 from .config_manager import get_config_value
+from .logger_manager import get_logger_manager, RowLogPolicy
+from .progress import ProgressReporter, ProgressEvent
+from .cancellation import CancellationToken, OperationCancelled
+from .run_report import FileRunStats, RunReport
+from .profiling import FileProfiler, check_profile_mode, create_file_profiler
+from .compression import (
+    COMPRESSION_SUFFIXES, check_compression, compression_from_path, compression_suffix, strip_compression_suffix
+)
 
 
 class CSVProcessor:
@@ -29,6 +49,25 @@ class CSVProcessor:
         self.role_template_with_headdep = get_config_value('csv_processing.role_template_with_headdep') or \
             "Чтение записей по подр-ю {org_name}\\{headdep_name}\\{dep_name}"
         self.parent_field = get_config_value('csv_processing.parent_field')
+        single_pass = get_config_value('csv_processing.single_pass_ingest')
+        self.single_pass_ingest = True if single_pass is None else bool(
+            single_pass)
+        self.default_delimiter = get_config_value(
+            'csv_processing.default_delimiter') or ';'
+        self.probe_cache_name = get_config_value(
+            'csv_processing.probe_cache_file')
+        use_templates = get_config_value('xml_generation.use_templates')
+        self.use_xml_templates = True if use_templates is None else bool(
+            use_templates)
+        self.uid_mode = get_config_value('xml_generation.uid_mode') or 'random'
+        self.xml_workers = get_config_value(
+            'xml_generation.parallel_workers') or 1
+        self.xml_chunk_size = get_config_value(
+            'xml_generation.parallel_chunk_size') or 2000
+        self.difference_model = bool(
+            get_config_value('xml_generation.difference_model'))
+        self.row_log_policy = RowLogPolicy()
+        self.file_timeout = get_config_value('csv_processing.file_timeout') or None
 
     def process_csv_file_stream(
         self,
@@ -36,42 +75,252 @@ class CSVProcessor:
         csv_file_path: str,
         xml_file_path: str,
         logger: logging.Logger,
-        allow_headdep_recursive: bool = True
+        allow_headdep_recursive: bool = True,
+        single_pass: bool = None,
+        xml_workers: int = None,
+        difference_model: bool = None,
+        previous_path: str = None,
+        uid_mapping_file: str = None,
+        progress: ProgressReporter = None,
+        cancel: CancellationToken = None,
+        timeout: float = None,
+        stats: FileRunStats = None,
+        profiler: FileProfiler = None
     ) -> bool:
         """
         Потоковая обработка CSV-файла с генерацией XML.
+
+        XML пишется во временный файл и заменяет xml_file_path только после
+        успешной генерации: при ошибке, отмене или превышении лимита времени
+        прежний XML остаётся без изменений.
+
+        Args:
+            folder_uid: UID папки для ролей
+            csv_file_path: путь к CSV файлу
+            xml_file_path: путь к выходному XML файлу
+            logger: логгер файла
+            allow_headdep_recursive: разрешить рекурсивный доступ
+            single_pass: однопроходное чтение CSV (None - из config.json);
+                при False файл читается дважды, без хранения строк в памяти
+            xml_workers: число процессов для сериализации XML фрагментами
+                (None - из config.json, 1 - потоковая запись в одном процессе);
+                только без шаблонов XML (use_templates)
+            difference_model: дополнительно сформировать md:DifferenceModel
+                относительно предыдущей версии (None - из config.json)
+            previous_path: предыдущая версия - XML модели или входной CSV
+                (None - существующий xml_file_path до перезаписи)
+            uid_mapping_file: файл соответствий UID режима persistent
+                (None - рядом с xml_file_path)
+            progress: отчёт о ходе обработки (опционально)
+            cancel: токен отмены пакета, проверяется каждые PROGRESS_STEP строк
+                (опционально)
+            timeout: лимит времени на файл в секундах (None - из config.json,
+                0 - без лимита)
+            stats: время этапов и счётчики файла для отчёта о запуске
+                (опционально)
+            profiler: профилировщик файла (cProfile или tracemalloc со
+                снимками после чтения CSV и после записи XML); опционально
+
+        Returns:
+            bool: True если файл обработан успешно; False при ошибке или отмене
         """
+        if timeout is None:
+            timeout = self.file_timeout
+        token = None
+        if cancel is not None or timeout:
+            token = CancellationToken(cancel, timeout)
+
+        if progress is not None:
+            progress.begin_file(csv_file_path)
+        if stats is not None:
+            stats.start(csv_file_path)
+            stats.stage('probe')
+        if profiler is not None:
+            profiler.start()
+        success = False
+        status = 'failed'
+        try:
+            success = self._process_csv_file_stream(
+                folder_uid, csv_file_path, xml_file_path, logger,
+                allow_headdep_recursive, single_pass, xml_workers,
+                difference_model, previous_path, uid_mapping_file, progress, token,
+                stats, profiler)
+            if success:
+                status = 'ok'
+        except OperationCancelled as e:
+            # Отмена пакета - предупреждение, превышение лимита времени - ошибка файла
+            log = logger.warning if token.cancelled else logger.error
+            log(f"Обработка файла {csv_file_path} прервана: {e}. XML не изменён")
+            status = 'cancelled' if token.cancelled else 'timeout'
+        finally:
+            if progress is not None:
+                progress.end_file(success)
+            if stats is not None:
+                stats.finish(status)
+            if profiler is not None:
+                self._save_profile(profiler, logger)
+        return success
+
+    @staticmethod
+    def _save_profile(profiler: FileProfiler, logger: logging.Logger) -> None:
+        """Останавливает профилировщик и сообщает в лог, куда сохранён профиль."""
+        try:
+            output_files = profiler.stop()
+        except Exception as e:
+            logger.error(f"Ошибка сохранения профиля: {e}")
+            return
+        kind = 'CPU' if profiler.mode == 'cpu' else 'памяти'
+        logger.info(f"Профиль {kind} сохранён: {', '.join(output_files)}")
+
+    def _process_csv_file_stream(
+        self,
+        folder_uid: str,
+        csv_file_path: str,
+        xml_file_path: str,
+        logger: logging.Logger,
+        allow_headdep_recursive: bool,
+        single_pass: bool,
+        xml_workers: int,
+        difference_model: bool,
+        previous_path: str,
+        uid_mapping_file: str,
+        progress: ProgressReporter = None,
+        token: CancellationToken = None,
+        stats: FileRunStats = None,
+        profiler: FileProfiler = None
+    ) -> bool:
+        """Обработка файла (см. process_csv_file_stream)."""
+        if single_pass is None:
+            single_pass = self.single_pass_ingest
+        if xml_workers is None:
+            xml_workers = self.xml_workers
+        if difference_model is None:
+            difference_model = self.difference_model
+
         logger.info(f"Старт обработки файла {csv_file_path} → {xml_file_path}")
 
         try:
-            encoding = read_encoding(csv_file_path)
+            probe = probe_csv_input(
+                csv_file_path, self.required_fields, self.default_delimiter,
+                cache=self._get_probe_cache(csv_file_path)
+            )
         except Exception as e:
             logger.error(f"Ошибка чтения CSV-файла {csv_file_path}: {e}")
             return False
 
-        # Собираем информацию о структуре
-        dep_info, dep_tree = collect_csv_structure(
-            csv_file_path, encoding, self.required_fields, self.parent_field, logger
-        )
-        headdep_uids = set(dep_tree.keys())
-        datagroup_map = {}
-        roles_added = 0
+        encoding, delimiter = probe.encoding, probe.delimiter
+        logger.info(f"Кодировка: {encoding}{' (BOM)' if probe.has_bom else ''}, "
+                    f"разделитель: {delimiter!r}")
+        if probe.missing_fields:
+            logger.error(f"В заголовке CSV-файла {csv_file_path} нет обязательных полей: "
+                         f"{', '.join(probe.missing_fields)}")
+            return False
 
-        # Создаем генератор XML
-        xml_generator = create_access_generator()
-        NSMAP = xml_generator.namespaces
+        def stage(name: str) -> None:
+            """Смена этапа: в отчёте о ходе обработки и в статистике файла."""
+            if progress is not None:
+                progress.stage(name)
+            if stats is not None:
+                stats.stage(name)
 
-        def generate_content(xf):
-            """Генератор контента для XML файла."""
-            nonlocal roles_added
+        # Собираем информацию о структуре; отмена проверяется вместе с прогрессом
+        def on_rows(rows: int, bytes_read: int) -> None:
+            if stats is not None:
+                stats.rows_read = rows
+            if token is not None:
+                token.check()
+            if progress is not None:
+                progress.rows_read(rows, bytes_read)
+
+        rows_progress = None
+        if progress is not None or token is not None or stats is not None:
+            rows_progress = on_rows
+        stage('scan')
+        try:
+            if single_pass:
+                # Один проход: строки для ролей сохраняются вместе со структурой
+                dep_info, dep_tree, csv_rows = collect_csv_data(
+                    csv_file_path, encoding, self.required_fields,
+                    self.parent_field, logger, delimiter, rows_progress
+                )
+            else:
+                dep_info, dep_tree = collect_csv_structure(
+                    csv_file_path, encoding, self.required_fields,
+                    self.parent_field, logger, delimiter, rows_progress
+                )
+                csv_rows = None
+        except OperationCancelled:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка чтения CSV-файла {csv_file_path}: {e}")
+            return False
 
-            # Добавляем FullModel
-            fullmodel_uid = xml_generator.add_full_model(
-                xf, self.model_version, self.model_name
+        if profiler is not None:
+            profiler.checkpoint('scan')
+        stage('hierarchy')
+        # Связи иерархии на целых номерах строятся один раз на весь файл:
+        # подразделения dep_info получают номера 0..N-1 в порядке документа
+        hierarchy_store = HierarchyStore(dep_tree, dep_info)
+        # Словарь множеств больше не нужен: связи берутся из hierarchy_store
+        del dep_tree
+        for cycle in hierarchy_store.format_cycles():
+            logger.warning(
+                f"Обнаружен цикл в иерархии подразделений: {cycle}")
+
+        # Глубина и оценка объёма выходных связей - по обходу хранилища
+        # (только для леса: иначе размеры поддеревьев требуют их обхода)
+        if hierarchy_store.is_forest:
+            links_estimate = sum(
+                hierarchy_store.subtree_size(i)
+                if allow_headdep_recursive and hierarchy_store.has_children(i) else 1
+                for i in range(hierarchy_store.ordered)
             )
+            logger.info(f"Иерархия: подразделений {len(dep_info)}, "
+                        f"максимальная глубина {hierarchy_store.max_depth()}, "
+                        f"ожидаемо связей Privilege.DataItems: ~{links_estimate}")
+        else:
+            logger.info(f"Иерархия: подразделений {len(dep_info)} "
+                        f"(несколько родителей или циклы)")
+        # UID DataGroup по номеру подразделения в hierarchy_store
+        datagroup_uids: List[Optional[str]] = [None] * len(dep_info)
+        roles_added = 0
+        headdep_roles = recursive_roles = data_item_links = 0
+        if self.row_log_policy.mode != 'full':
+            logger.info(f"Логирование строк: {self.row_log_policy.describe()}")
 
-            # Добавляем DataGroup для каждого подразделения
-            for dep_uid, info in dep_info.items():
+        # Предыдущая версия читается до перезаписи XML и до создания поставщика UID:
+        # модель входного снимка в режиме persistent дополняет файл соответствий
+        previous_model = None
+        if difference_model:
+            stage('difference')
+            previous_model = self._load_previous_model(
+                folder_uid, previous_path or xml_file_path, xml_file_path, logger,
+                allow_headdep_recursive, single_pass, token
+            )
+        # Объекты новой версии сравниваются с предыдущей по мере генерации XML:
+        # записанный документ повторно не читается, в памяти - только изменения
+        comparer = ModelComparer(previous_model[1]) if previous_model is not None else None
+
+        # Поставщик UID: области уникальности - папка ролей, FullModel - по имени файла
+        try:
+            uid_provider = create_uid_provider(
+                self.uid_mode, scope=folder_uid,
+                mapping_file=uid_mapping_file or self._get_uid_mapping_file(
+                    xml_file_path)
+            )
+        except Exception as e:
+            logger.error(f"Ошибка инициализации UID: {e}")
+            return False
+        source_name = Path(csv_file_path).stem
+
+        # Создаем генератор XML
+        xml_generator = create_access_generator(uid_provider)
+
+        def iter_datagroups():
+            """Записи DataGroup (аргументы add_data_group) для каждого подразделения."""
+            for index, (dep_uid, info) in enumerate(dep_info.items()):
+                if token is not None and index % PROGRESS_STEP == 0:
+                    token.check()
                 org_name = info.get('org_name', '')
                 dep_name = info.get('dep_name', '')
                 dep_headdep_uid = info.get('dep_headdep_uid', None)
@@ -83,14 +332,30 @@ class CSVProcessor:
                     headdep_info = dep_info.get(dep_headdep_uid, {})
                     headdep_name = headdep_info.get('dep_name', '')
 
-                datagroup_uid = gen_uid()
-                dg_uid, objref_uid = xml_generator.add_data_group(
-                    xf, org_name, dep_name, dep_uid, datagroup_uid, headdep_name
-                )
-                datagroup_map[dep_uid] = dg_uid
+                datagroup_uid = uid_provider.uid('DataGroup', dep_uid)
+                objectref_uid = uid_provider.uid('ObjectReference', dep_uid)
+                datagroup_uids[index] = datagroup_uid
+                record = (org_name, dep_name, dep_uid, datagroup_uid, headdep_name,
+                          objectref_uid)
+                if comparer is not None:
+                    comparer.add_all(xml_generator.data_group_objects(*record))
+                yield record
+
+        def iter_roles():
+            """Записи Role (аргументы add_role_with_privilege) по строкам CSV."""
+            nonlocal roles_added, headdep_roles, recursive_roles, data_item_links
+            row_interval = self.row_log_policy.row_interval(logger)
+            stage('roles')
 
             # Обрабатываем строки CSV и создаем роли
-            for line_num, row in iter_csv_rows(csv_file_path, encoding, self.required_fields, logger):
+            if csv_rows is not None:
+                rows_iter = csv_rows
+            else:
+                rows_iter = iter_csv_rows(
+                    csv_file_path, encoding, self.required_fields, logger,
+                    delimiter)
+
+            for index, (line_num, row) in enumerate(rows_iter):
                 dep_uid = row['dep_uid']
                 org_name = row.get('org_name', '')
                 dep_name = row.get('dep_name', '')
@@ -107,48 +372,265 @@ class CSVProcessor:
                     headdep_name = headdep_info.get('dep_name', '')
 
                 # Формируем список DataGroups для данной роли
-                if dep_uid in headdep_uids and allow_headdep_recursive:
-                    # Рекурсивный доступ ко всем потомкам
-                    all_included = collect_all_children(dep_tree, dep_uid)
-                    data_items_uids = [datagroup_map[x]
-                                       for x in all_included if x in datagroup_map]
+                node = hierarchy_store.node(dep_uid)
+                if allow_headdep_recursive and node >= 0 and hierarchy_store.has_children(node):
+                    # Рекурсивный доступ ко всем потомкам; порядок DataGroup как в документе
+                    data_items_uids = [datagroup_uids[x]
+                                       for x in hierarchy_store.ordered_subtree(node)]
+                    recursive_roles += 1
                 else:
                     # Доступ только к текущему подразделению
-                    if dep_uid in datagroup_map:
-                        data_items_uids = [datagroup_map[dep_uid]]
+                    if 0 <= node < hierarchy_store.ordered:
+                        data_items_uids = [datagroup_uids[node]]
 
-                # Формируем название роли
-                if headdep_name:
-                    role_name = self.role_template_with_headdep.format(
-                        org_name=org_name, headdep_name=headdep_name, dep_name=dep_name
-                    )
-                else:
-                    role_name = self.role_template.format(
-                        org_name=org_name, dep_name=dep_name
-                    )
+                # Логирование информации о роли (название формируется только для лога)
+                if row_interval and index % row_interval == 0:
+                    if headdep_name:
+                        role_name = self.role_template_with_headdep.format(
+                            org_name=org_name, headdep_name=headdep_name, dep_name=dep_name
+                        )
+                    else:
+                        role_name = self.role_template.format(
+                            org_name=org_name, dep_name=dep_name
+                        )
 
-                # Логирование информации о роли
-                if dep_headdep_uid:
-                    logger.info(f"Строка {line_num}: Добавляется роль: {role_name}, "
-                                f"headdep_uid={dep_headdep_uid}, dep_uid={dep_uid}")
-                else:
-                    logger.info(f"Строка {line_num}: Добавляется роль: {role_name}, "
-                                f"dep_uid={dep_uid}")
+                    if dep_headdep_uid:
+                        logger.info("Строка %d: Добавляется роль: %s, headdep_uid=%s, dep_uid=%s",
+                                    line_num, role_name, dep_headdep_uid, dep_uid)
+                    else:
+                        logger.info("Строка %d: Добавляется роль: %s, dep_uid=%s",
+                                    line_num, role_name, dep_uid)
 
-                # Создаем роль с привилегиями
-                xml_generator.add_role_with_privilege(
-                    xf, org_name, dep_name, folder_uid, data_items_uids, headdep_name
-                )
+                if headdep_name:
+                    headdep_roles += 1
+                data_item_links += len(data_items_uids)
+
+                record = (org_name, dep_name, folder_uid, data_items_uids, headdep_name,
+                          uid_provider.uid('Role', dep_uid),
+                          uid_provider.uid('Privilege', dep_uid))
+                if comparer is not None:
+                    comparer.add_all(xml_generator.role_objects(*record))
+                yield record
                 roles_added += 1
+                if roles_added % PROGRESS_STEP == 0:
+                    if token is not None:
+                        token.check()
+                    if progress is not None:
+                        progress.roles_emitted(roles_added)
+
+        def generate_head(xf):
+            """Начало документа: FullModel."""
+            xml_generator.add_full_model(
+                xf, self.model_version, self.model_name,
+                uid_provider.uid('FullModel', source_name)
+            )
+
+        def generate_content(xf):
+            """Генератор контента для XML файла."""
+            generate_head(xf)
+
+            # Добавляем DataGroup для каждого подразделения
+            for record in iter_datagroups():
+                xml_generator.add_data_group(xf, *record)
+
+            # Создаем роли с привилегиями
+            for record in iter_roles():
+                xml_generator.add_role_with_privilege(xf, *record)
+
+        def write_body(write):
+            """Тело документа из предвычисленных шаблонов."""
+            for record in iter_datagroups():
+                xml_generator.write_data_group(write, *record)
+            for record in iter_roles():
+                xml_generator.write_role_with_privilege(write, *record)
 
+        if self.use_xml_templates:
+            datagroup_method, role_method = 'write_data_group', 'write_role_with_privilege'
+        else:
+            datagroup_method, role_method = 'add_data_group', 'add_role_with_privilege'
+
+        stage('datagroups')
+        # Документ пишется во временный файл рядом с итоговым и заменяет его целиком;
+        # сжатие (.xml.gz, .xml.zst) - по имени итогового файла
+        tmp_xml_path = f"{xml_file_path}.{os.getpid()}.tmp"
+        compression = compression_from_path(xml_file_path)
+        if xml_workers > 1 and self.use_xml_templates:
+            # Записи готовит этот процесс, а шаблонная сериализация дешевле передачи
+            # блоков в пул: параллельная запись только медленнее (см. readme)
+            logger.info("xml_generation.parallel_workers не применяется при "
+                        "use_templates: XML пишется в одном процессе")
+            xml_workers = 1
         try:
-            xml_generator.generate_xml(xml_file_path, generate_content)
+            if xml_workers > 1 and len(dep_info) > self.xml_chunk_size:
+                logger.info(f"Параллельная генерация XML: процессов {xml_workers}, "
+                            f"блок {self.xml_chunk_size} записей")
+                xml_generator.generate_xml_parallel(
+                    tmp_xml_path, generate_head,
+                    [(datagroup_method, iter_datagroups()),
+                     (role_method, iter_roles())],
+                    max_workers=xml_workers, chunk_size=self.xml_chunk_size,
+                    compression=compression
+                )
+            elif self.use_xml_templates:
+                xml_generator.generate_xml_raw(
+                    tmp_xml_path, generate_head, write_body, compression=compression)
+            else:
+                xml_generator.generate_xml(
+                    tmp_xml_path, generate_content, compression=compression)
+            os.replace(tmp_xml_path, xml_file_path)
+            if profiler is not None:
+                profiler.checkpoint('emit')
+            if progress is not None:
+                progress.roles_emitted(roles_added)
+            if stats is not None:
+                # Каждая валидная строка CSV даёт одну роль
+                stats.rows_rejected = max(0, stats.rows_read - roles_added)
+                stats.bytes_written = os.path.getsize(xml_file_path)
+            if self.row_log_policy.log_summary:
+                logger.info(f"Роли: {roles_added} (с головным подразделением: {headdep_roles}, "
+                            f"с рекурсивным доступом: {recursive_roles}), "
+                            f"связей Privilege.DataItems: {data_item_links}")
             logger.info(f"Завершена обработка файла. Всего добавлено ролей: {roles_added}. "
                         f"XML сохранён: {xml_file_path}")
-            return True
+        except OperationCancelled:
+            raise
         except Exception as e:
             logger.error(f"Ошибка генерации XML-файла {xml_file_path}: {e}")
             return False
+        finally:
+            uid_provider.close()
+            # После успешной замены временного файла уже нет
+            _remove_file(tmp_xml_path)
+            if stats is not None:
+                # При ошибке или отмене - сколько успели сформировать
+                stats.datagroups = len(datagroup_uids) - datagroup_uids.count(None)
+                stats.roles = roles_added
+                stats.data_item_links = data_item_links
+
+        if comparer is not None:
+            stage('difference')
+            diff_file_path = self._get_difference_file(xml_file_path)
+            try:
+                self._write_difference_model(
+                    xml_generator, previous_model[0], comparer.finish(),
+                    diff_file_path, logger)
+                if stats is not None:
+                    stats.bytes_written += os.path.getsize(diff_file_path)
+            except Exception as e:
+                logger.error(
+                    f"Ошибка генерации разностной модели {diff_file_path}: {e}")
+                return False
+        return True
+
+    def _load_previous_model(
+        self,
+        folder_uid: str,
+        previous_path: str,
+        xml_file_path: str,
+        logger: logging.Logger,
+        allow_headdep_recursive: bool,
+        single_pass: bool,
+        token: CancellationToken = None
+    ):
+        """
+        Читает объекты предыдущей версии модели.
+
+        Входной CSV снимок сначала преобразуется во временный XML с теми же
+        UID (тот же folder_uid и файл соответствий), затем читается как XML.
+
+        Returns:
+            Tuple[Optional[str], Dict] | None: (rdf:about FullModel, объекты)
+            или None, если разностную модель сформировать нельзя
+        """
+        if self.uid_mode not in ('deterministic', 'persistent'):
+            logger.warning(f"Разностная модель требует стабильных UID (xml_generation.uid_mode "
+                           f"deterministic или persistent), текущий режим: {self.uid_mode}. "
+                           f"Формируется только полная модель")
+            return None
+        if not os.path.exists(previous_path):
+            logger.info(f"Предыдущая версия {previous_path} не найдена: "
+                        f"формируется только полная модель")
+            return None
+
+        try:
+            if Path(previous_path).suffix.lower() != '.csv':
+                return load_model_objects(previous_path)
+
+            logger.info(f"Построение модели предыдущего снимка {previous_path}")
+            fd, tmp_path = tempfile.mkstemp(
+                suffix='.xml', dir=os.path.dirname(os.path.abspath(xml_file_path)))
+            os.close(fd)
+            try:
+                if not self.process_csv_file_stream(
+                        folder_uid, previous_path, tmp_path, logger,
+                        allow_headdep_recursive, single_pass, xml_workers=1,
+                        difference_model=False,
+                        uid_mapping_file=self._get_uid_mapping_file(xml_file_path),
+                        cancel=token, timeout=0):
+                    logger.error(
+                        f"Не удалось построить модель предыдущего снимка {previous_path}")
+                    return None
+                return load_model_objects(tmp_path)
+            finally:
+                os.remove(tmp_path)
+        except Exception as e:
+            logger.error(f"Ошибка чтения предыдущей версии {previous_path}: {e}")
+            return None
+
+    def _write_difference_model(
+        self,
+        xml_generator,
+        previous_about: Optional[str],
+        difference: ModelDifference,
+        diff_file_path: str,
+        logger: logging.Logger
+    ) -> None:
+        """Пишет md:DifferenceModel по разнице с предыдущей версией."""
+        xml_generator.generate_difference_model(
+            diff_file_path, difference, previous_about,
+            self.model_version, self.model_name
+        )
+        logger.info(f"Разностная модель ({difference.format_counts()}) "
+                    f"сохранена: {diff_file_path}")
+
+    def _get_difference_file(self, xml_file_path: str) -> str:
+        """Файл разностной модели: рядом с XML полной модели, с тем же сжатием."""
+        model_path = Path(strip_compression_suffix(xml_file_path))
+        return str(model_path.with_suffix('.diff.xml')) + compression_suffix(
+            compression_from_path(xml_file_path))
+
+    def _get_uid_mapping_file(self, xml_file_path: str) -> str:
+        """Файл соответствий UID режима persistent: рядом с XML (не зависит от сжатия)."""
+        return str(Path(strip_compression_suffix(xml_file_path)).with_suffix('.uids.json'))
+
+    def _get_probe_cache(self, csv_file_path: str):
+        """Кэш анализа входных файлов в папке логов рядом с CSV."""
+        if not self.probe_cache_name:
+            return get_probe_cache()
+        log_directory = get_config_value('file_management.log_directory') or 'log'
+        cache_file = Path(csv_file_path).parent / log_directory / self.probe_cache_name
+        return get_probe_cache(str(cache_file))
+
+
+class BatchResults(dict):
+    """
+    Результаты пакетной обработки {имя файла: успех} в порядке списка файлов.
+
+    Attributes:
+        up_to_date: файлы, пропущенные по манифесту (XML актуален)
+        cancelled: файлы, обработка которых прервана отменой пакета
+            (XML не изменён, в словаре - False)
+        skipped: файлы, до которых обработка не дошла из-за отмены
+            (в словаре - False)
+        report: отчёт о запуске - время этапов и счётчики по файлам
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.up_to_date: List[str] = []
+        self.cancelled: List[str] = []
+        self.skipped: List[str] = []
+        self.report: Optional[RunReport] = None
 
 
 class BatchProcessor:
@@ -157,6 +639,9 @@ class BatchProcessor:
     def __init__(self):
         """Инициализация пакетного процессора."""
         self.csv_processor = CSVProcessor()
+        self.manifest_name = get_config_value(
+            'file_management.manifest_file')
+        self.compression = get_config_value('xml_generation.compression')
 
     def process_file_list(
         self,
@@ -164,30 +649,204 @@ class BatchProcessor:
         csv_dir: str,
         file_list: List[str],
         logger_factory: Callable[[str], logging.Logger],
-        allow_headdep_recursive: bool = True
-    ) -> Dict[str, bool]:
+        allow_headdep_recursive: bool = True,
+        max_workers: int = 1,
+        log_path_factory: Callable[[str], str] = None,
+        force: bool = False,
+        difference_model: bool = None,
+        previous_dir: str = None,
+        logger_release: Callable[[str], None] = None,
+        progress_callback: Callable[[ProgressEvent], None] = None,
+        cancel: CancellationToken = None,
+        file_timeout: float = None,
+        compression: str = None,
+        profile: str = None,
+        profile_dir: str = None
+    ) -> BatchResults:
         """
         Обрабатывает список CSV файлов.
 
+        Файлы, которые не изменились с прошлого успешного запуска (по
+        манифесту в csv_dir), пропускаются и попадают в results.up_to_date.
+
         Args:
             folder_uid: UID папки для ролей
             csv_dir: директория с CSV файлами
             file_list: список файлов для обработки
             logger_factory: фабрика логгеров
             allow_headdep_recursive: разрешить рекурсивный доступ
+            max_workers: число параллельных процессов (1 - последовательно)
+            log_path_factory: путь к лог-файлу по имени CSV; обязателен для
+                параллельного режима, т.к. рабочие процессы пишут лог сами
+            force: обработать все файлы, не сверяясь с манифестом
+            difference_model: формировать [имя].diff.xml относительно
+                предыдущей версии (None - из config.json); манифест при
+                этом не проверяется
+            previous_dir: папка с предыдущими версиями ([имя].csv или
+                [имя].xml); None - существующие XML в csv_dir. Если задана,
+                манифест не проверяется
+            logger_release: закрывает логгер файла по имени CSV после его
+                обработки (освобождает файл лога до конца пакета)
+            progress_callback: получатель ProgressEvent о ходе обработки
+                пакета (вызывается из текущего потока не чаще раза в 0.25 с)
+            cancel: токен отмены пакета; после отмены текущие файлы
+                прерываются (results.cancelled), остальные не начинаются
+                (results.skipped)
+            file_timeout: лимит времени на файл в секундах (None - из
+                config.json, 0 - без лимита); файл, не уложившийся в лимит,
+                считается ошибкой
+            compression: сжатие выходных XML - gzip ([имя].xml.gz), zstd
+                ([имя].xml.zst, нужен пакет zstandard) или '' - без сжатия
+                (None - xml_generation.compression из config.json)
+            profile: профилирование каждого файла - cpu (cProfile,
+                [имя]_[дата].prof) или mem (снимки tracemalloc после чтения
+                CSV и после записи XML, [имя]_[дата].mem.txt); None - без
+                профилирования
+            profile_dir: папка для файлов профиля (None - папка лога файла
+                из log_path_factory, без неё - csv_dir)
 
         Returns:
-            Dict[str, bool]: результаты обработки файлов
+            BatchResults: результаты обработки файлов (в порядке file_list);
+            results.report - отчёт о запуске (RunReport)
+
+        Raises:
+            ValueError: неизвестный метод сжатия, не установлен zstandard
+                или неизвестный режим профилирования
         """
-        from pathlib import Path
+        compression = check_compression(
+            self.compression if compression is None else compression)
+        profile = check_profile_mode(profile)
+        if difference_model is None:
+            difference_model = self.csv_processor.difference_model
+        if profile and not profile_dir:
+            profile_dir = (os.path.dirname(os.path.abspath(log_path_factory(file_list[0])))
+                           if log_path_factory and file_list else csv_dir)
+        report = RunReport(csv_dir, folder_uid, {
+            'max_workers': max_workers,
+            'allow_headdep_recursive': bool(allow_headdep_recursive),
+            'force': bool(force),
+            'difference_model': difference_model,
+            'compression': compression,
+            'file_timeout': file_timeout,
+            'profile': profile,
+        })
+        file_stats = {x: FileRunStats(x) for x in file_list}
+        manifest = self._open_manifest(
+            csv_dir, folder_uid, allow_headdep_recursive)
+        progress = None
+        if progress_callback is not None:
+            progress = ProgressReporter(progress_callback)
+            progress.begin_batch(
+                _get_file_paths(csv_dir, x)[0] for x in file_list)
+
+        up_to_date = []
+        pending = []
+        for csv_filename in file_list:
+            csv_file_path, xml_file_path = _get_file_paths(
+                csv_dir, csv_filename, compression)
+            # Модель различий сравнивает с XML прошлого запуска и пишется
+            # заново при каждом запуске, поэтому манифест тогда не применяется
+            if manifest and not force and not previous_dir and not difference_model \
+                    and manifest.is_up_to_date(csv_filename, csv_file_path, xml_file_path):
+                logger_factory(csv_filename).info(
+                    f"Файл {csv_filename} не изменился с прошлого запуска: "
+                    f"XML актуален, обработка пропущена")
+                if logger_release:
+                    logger_release(csv_filename)
+                if progress is not None:
+                    progress.skip_file(csv_file_path)
+                file_stats[csv_filename].start(csv_file_path)
+                file_stats[csv_filename].finish('up_to_date')
+                up_to_date.append(csv_filename)
+            else:
+                pending.append(csv_filename)
+
+        try:
+            if max_workers > 1 and len(pending) > 1 and log_path_factory:
+                processed = self._process_file_list_parallel(
+                    folder_uid, csv_dir, pending, logger_factory,
+                    allow_headdep_recursive, max_workers, log_path_factory,
+                    difference_model, previous_dir, logger_release, progress,
+                    cancel, file_timeout, compression, file_stats,
+                    profile, profile_dir
+                )
+            else:
+                processed = self._process_file_list_sequential(
+                    folder_uid, csv_dir, pending, logger_factory,
+                    allow_headdep_recursive, difference_model, previous_dir,
+                    logger_release, progress, cancel, file_timeout, compression,
+                    file_stats, profile, profile_dir
+                )
+
+            if manifest:
+                for csv_filename, success in processed.items():
+                    if success:
+                        manifest.record(
+                            csv_filename, *_get_file_paths(csv_dir, csv_filename, compression))
+                    else:
+                        manifest.forget(csv_filename)
+        finally:
+            if manifest:
+                manifest.save()
+            # Кэш анализа входных файлов пишется один раз на пакет
+            save_probe_caches()
 
+        # processed: True/False - итог файла, None - прерван отменой, нет ключа - не начат
+        results = BatchResults()
+        for csv_filename in file_list:
+            if csv_filename in processed:
+                success = processed[csv_filename]
+                if success is None:
+                    results.cancelled.append(csv_filename)
+                results[csv_filename] = bool(success)
+            elif csv_filename in pending:
+                results.skipped.append(csv_filename)
+                results[csv_filename] = False
+                file_stats[csv_filename].finish('skipped')
+            else:
+                results[csv_filename] = True
+        results.up_to_date = up_to_date
+
+        report.add_files(file_stats[x] for x in file_list)
+        report.finish()
+        results.report = report
+        return results
+
+    def _open_manifest(self, csv_dir: str, folder_uid: str, allow_headdep_recursive: bool):
+        """Открывает манифест в csv_dir (None если манифест отключён)."""
+        if not self.manifest_name:
+            return None
+        config_hash = hash_config(
+            {'allow_headdep_recursive': bool(allow_headdep_recursive)})
+        return BatchManifest(
+            str(Path(csv_dir) / self.manifest_name), config_hash, folder_uid)
+
+    def _process_file_list_sequential(
+        self,
+        folder_uid: str,
+        csv_dir: str,
+        file_list: List[str],
+        logger_factory: Callable[[str], logging.Logger],
+        allow_headdep_recursive: bool,
+        difference_model: bool = None,
+        previous_dir: str = None,
+        logger_release: Callable[[str], None] = None,
+        progress: ProgressReporter = None,
+        cancel: CancellationToken = None,
+        file_timeout: float = None,
+        compression: str = None,
+        file_stats: Dict[str, FileRunStats] = None,
+        profile: str = None,
+        profile_dir: str = None
+    ) -> Dict[str, Optional[bool]]:
+        """Обрабатывает файлы по очереди в текущем процессе."""
         results = {}
 
         for csv_filename in file_list:
-            # Формируем пути
-            csv_file_path = str(Path(csv_dir) / csv_filename)
-            xml_filename = Path(csv_filename).stem + '.xml'
-            xml_file_path = str(Path(csv_dir) / xml_filename)
+            if cancel is not None and cancel.cancelled:
+                break
+            csv_file_path, xml_file_path = _get_file_paths(
+                csv_dir, csv_filename, compression)
 
             # Создаем логгер для этого файла
             logger = logger_factory(csv_filename)
@@ -195,13 +854,208 @@ class BatchProcessor:
             # Обрабатываем файл
             success = self.csv_processor.process_csv_file_stream(
                 folder_uid, csv_file_path, xml_file_path, logger,
-                allow_headdep_recursive=allow_headdep_recursive
+                allow_headdep_recursive=allow_headdep_recursive,
+                difference_model=difference_model,
+                previous_path=_get_previous_path(previous_dir, csv_filename),
+                progress=progress, cancel=cancel, timeout=file_timeout,
+                stats=file_stats.get(csv_filename) if file_stats else None,
+                profiler=create_file_profiler(profile, profile_dir, csv_file_path)
+                if profile else None
             )
+            if logger_release:
+                logger_release(csv_filename)
 
+            if not success and cancel is not None and cancel.cancelled:
+                success = None
             results[csv_filename] = success
 
         return results
 
+    def _process_file_list_parallel(
+        self,
+        folder_uid: str,
+        csv_dir: str,
+        file_list: List[str],
+        logger_factory: Callable[[str], logging.Logger],
+        allow_headdep_recursive: bool,
+        max_workers: int,
+        log_path_factory: Callable[[str], str],
+        difference_model: bool = None,
+        previous_dir: str = None,
+        logger_release: Callable[[str], None] = None,
+        progress: ProgressReporter = None,
+        cancel: CancellationToken = None,
+        file_timeout: float = None,
+        compression: str = None,
+        file_stats: Dict[str, FileRunStats] = None,
+        profile: str = None,
+        profile_dir: str = None
+    ) -> Dict[str, Optional[bool]]:
+        """
+        Обрабатывает файлы в пуле процессов.
+
+        Каждый файл обрабатывается в отдельном рабочем процессе со своим
+        логгером, пишущим в тот же [имя]_[дата].log. Ошибка или падение
+        процесса на одном файле отмечает только этот файл как неуспешный.
+        Отмена передаётся рабочим процессам через multiprocessing.Event;
+        ещё не начатые файлы снимаются с очереди. Статистика файла
+        (FileRunStats) и новые записи кэша анализа возвращаются из рабочего
+        процесса вместе с итогом; профиль файла рабочий процесс сохраняет сам.
+        """
+        futures = {}
+        cancel_event = multiprocessing.Event() if cancel is not None else None
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(cancel_event,)) as executor:
+            for csv_filename in file_list:
+                csv_file_path, xml_file_path = _get_file_paths(
+                    csv_dir, csv_filename, compression)
+                futures[csv_filename] = executor.submit(
+                    _process_file_in_worker, folder_uid, csv_file_path,
+                    xml_file_path, log_path_factory(csv_filename),
+                    allow_headdep_recursive, difference_model,
+                    _get_previous_path(previous_dir, csv_filename), file_timeout,
+                    profile, profile_dir
+                )
+
+            results = {}
+            for csv_filename in file_list:
+                future = futures[csv_filename]
+                while cancel is not None and not future.done():
+                    if cancel.cancelled:
+                        cancel_event.set()
+                        for other in futures.values():
+                            other.cancel()
+                        break
+                    wait([future], timeout=0.1)
+                if future.cancelled():
+                    continue
+
+                try:
+                    success, stats, probe_entries = future.result()
+                    error = None
+                    merge_probe_cache_entries(probe_entries)
+                    if file_stats is not None:
+                        file_stats[csv_filename] = stats
+                except Exception as e:
+                    success = False
+                    error = e
+                    if file_stats is not None:
+                        file_stats[csv_filename].finish('failed')
+                # Ход обработки внутри рабочих процессов не передаётся: учитываются целые файлы
+                if progress is not None:
+                    progress.begin_file(_get_file_paths(csv_dir, csv_filename)[0])
+                    progress.end_file(success)
+
+                # Рабочий процесс уже закрыл лог-файл, дописываем итог
+                logger = logger_factory(csv_filename)
+                if error is not None:
+                    logger.error(
+                        f"Сбой рабочего процесса при обработке {csv_filename}: {error}")
+                else:
+                    logger.info(f"Файл {csv_filename} обработан в рабочем процессе: "
+                                f"{'успешно' if success else 'с ошибкой'}")
+                if logger_release:
+                    logger_release(csv_filename)
+                if not success and cancel is not None and cancel.cancelled:
+                    success = None
+                results[csv_filename] = success
+
+        return results
+
+
+def _remove_file(file_path: str) -> None:
+    """Удаляет файл, если он есть (временный файл прерванной записи)."""
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+
+def _get_file_paths(csv_dir: str, csv_filename: str, compression: str = None) -> tuple:
+    """Формирует пути к CSV и выходному XML файлу (с суффиксом сжатия)."""
+    csv_file_path = str(Path(csv_dir) / csv_filename)
+    xml_filename = Path(csv_filename).stem + '.xml' + compression_suffix(compression)
+    xml_file_path = str(Path(csv_dir) / xml_filename)
+    return csv_file_path, xml_file_path
+
+
+def _get_previous_path(previous_dir: str, csv_filename: str):
+    """Предыдущая версия файла в previous_dir: входной CSV или XML модели (в т.ч. сжатый)."""
+    if not previous_dir:
+        return None
+    csv_path = Path(previous_dir) / csv_filename
+    if csv_path.exists():
+        return str(csv_path)
+    xml_path = Path(previous_dir) / (Path(csv_filename).stem + '.xml')
+    for suffix in ('',) + tuple(COMPRESSION_SUFFIXES.values()):
+        candidate = Path(str(xml_path) + suffix)
+        if candidate.exists():
+            return str(candidate)
+    return str(xml_path)
+
+
+# Состояние рабочего процесса: создаётся один раз на процесс
+_worker_processor = None
+_worker_logger_manager = None
+_worker_cancel = None
+
+
+def _init_worker(cancel_event=None) -> None:
+    """Инициализация рабочего процесса пула: токен отмены пакета."""
+    global _worker_cancel
+    _worker_cancel = None
+    if cancel_event is not None:
+        # Ctrl+C получает вся группа процессов: отменой управляет родитель через cancel_event
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        _worker_cancel = CancellationToken(event=cancel_event)
+
+
+def _process_file_in_worker(
+    folder_uid: str,
+    csv_file_path: str,
+    xml_file_path: str,
+    log_path: str,
+    allow_headdep_recursive: bool,
+    difference_model: bool = None,
+    previous_path: str = None,
+    timeout: float = None,
+    profile: str = None,
+    profile_dir: str = None
+) -> Tuple[bool, FileRunStats, Dict[str, Dict[str, dict]]]:
+    """
+    Обрабатывает один файл в рабочем процессе пула.
+
+    Returns:
+        Tuple: (успех, статистика файла, новые записи кэша анализа - их
+        сохраняет родительский процесс)
+    """
+    global _worker_processor, _worker_logger_manager
+    if _worker_processor is None:
+        _worker_processor = CSVProcessor()
+        _worker_logger_manager = get_logger_manager()
+
+    logger = _worker_logger_manager.create_logger(
+        log_path, log_file_path=log_path)
+    stats = FileRunStats(os.path.basename(csv_file_path))
+    try:
+        # Вложенный пул внутри рабочего процесса не создаём
+        success = _worker_processor.process_csv_file_stream(
+            folder_uid, csv_file_path, xml_file_path, logger,
+            allow_headdep_recursive=allow_headdep_recursive, xml_workers=1,
+            difference_model=difference_model, previous_path=previous_path,
+            cancel=_worker_cancel, timeout=timeout, stats=stats,
+            profiler=create_file_profiler(profile, profile_dir, csv_file_path)
+            if profile else None
+        )
+        return success, stats, take_probe_cache_entries()
+    except Exception as e:
+        logger.error(f"Необработанная ошибка при обработке {csv_file_path}: {e}")
+        stats.finish('failed')
+        return False, stats, take_probe_cache_entries()
+    finally:
+        # Закрываем файл лога, чтобы родительский процесс мог дописать итог
+        _worker_logger_manager.remove_logger(log_path)
+
 
 # Фабричные функции для удобства
 def create_csv_processor() -> CSVProcessor:
@@ -224,7 +1078,6 @@ def process_csv_file_stream(
     allow_headdep_recursive: bool = True
 ):
     """Совместимость с предыдущей версией."""
-    from pathlib import Path
     processor = CSVProcessor()
     csv_file_path = str(Path(csv_dir) / csv_filename)
     xml_filename = Path(csv_filename).stem + '.xml'
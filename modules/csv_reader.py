@@ -3,10 +3,9 @@
 Масштабируемый для любого проекта
 """
 
-import chardet
 import csv
 import os
-from typing import Dict, List, Tuple, Generator, Any
+from typing import Dict, List, Tuple, Generator, Any, Callable
 # Вместо констант:
 from .config_manager import get_config_value
 
@@ -15,19 +14,74 @@ from .config_manager import get_config_value
 # DEFAULT_DELIMITER = get_config_value('csv_processing.default_delimiter')
 # DEFAULT_EXCLUDE_FILES = get_config_value('file_management.exclude_files')
 
-# Добавьте в начало файла modules/csv_reader.py:
-import uuid
+from .uid_provider import gen_uid
 
+# Шаг (в строках) вызова progress при чтении CSV
+PROGRESS_STEP = 1024
 
-def gen_uid() -> str:
-    """Генерирует уникальный идентификатор."""
-    return str(uuid.uuid4())
+
+class DepartmentRecord:
+    """
+    Компактная запись подразделения: только поля, которые читает обработчик.
+
+    Заменяет строку csv.DictReader в info_dict и в строках однопроходного
+    чтения: доступ row['поле'] и row.get('поле', default) сохранён, прочие
+    колонки CSV не хранятся.
+    """
+
+    __slots__ = ('dep_uid', 'dep_name', 'org_name', 'dep_headdep_uid')
+
+    def __init__(self, dep_uid: str, dep_name: str, org_name: str, dep_headdep_uid: str = None):
+        self.dep_uid = dep_uid
+        self.dep_name = dep_name
+        self.org_name = org_name
+        self.dep_headdep_uid = dep_headdep_uid
+
+    def __getitem__(self, field: str):
+        if field not in DepartmentRecord.__slots__:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field: str, default=None):
+        """Значение поля или default, если поля нет или оно пустое (None)."""
+        if field not in DepartmentRecord.__slots__:
+            return default
+        value = getattr(self, field)
+        return default if value is None else value
+
+    def __repr__(self) -> str:
+        return (f"DepartmentRecord(dep_uid={self.dep_uid!r}, dep_name={self.dep_name!r}, "
+                f"org_name={self.org_name!r}, dep_headdep_uid={self.dep_headdep_uid!r})")
+
+
+def make_department_record(row: dict, strings: Dict[str, str] = None) -> DepartmentRecord:
+    """
+    Создает запись подразделения из строки CSV.
+
+    Args:
+        row: строка csv.DictReader
+        strings: словарь для общих экземпляров повторяющихся строк
+            (организации и UID родителей); живёт столько же, сколько записи
+
+    Returns:
+        DepartmentRecord: запись подразделения
+    """
+    org_name = row.get('org_name')
+    headdep_uid = row.get('dep_headdep_uid')
+    if strings is not None:
+        if org_name is not None:
+            org_name = strings.setdefault(org_name, org_name)
+        if headdep_uid is not None:
+            headdep_uid = strings.setdefault(headdep_uid, headdep_uid)
+    return DepartmentRecord(row.get('dep_uid'), row.get('dep_name'), org_name, headdep_uid)
 
 
 def read_encoding(file_path: str) -> str:
     """Определяет кодировку файла."""
     with open(file_path, 'rb') as f:
         rawdata = f.read(10000)
+    # chardet импортируется долго, а нужен только без кэша параметров входа
+    import chardet
     encoding = chardet.detect(rawdata)['encoding']
     if encoding is None:
         raise ValueError(f"Не удалось определить кодировку файла {file_path}")
@@ -48,7 +102,8 @@ def iter_csv_rows(
     encoding: str,
     required_fields: list,
     logger: Any = None,
-    delimiter: str = ';'
+    delimiter: str = ';',
+    progress: Callable[[int, int], None] = None
 ) -> Generator[Tuple[int, Dict], None, None]:
     """
     Генератор: итерирует валидные строки CSV с номером строки.
@@ -59,6 +114,8 @@ def iter_csv_rows(
         required_fields: список обязательных полей
         logger: объект логгера (опционально)
         delimiter: разделитель в CSV (по умолчанию ';')
+        progress: вызывается каждые PROGRESS_STEP строк с (прочитано строк,
+            прочитано байт) (опционально)
 
     Yields:
         Tuple[int, Dict]: номер строки и словарь с данными строки
@@ -66,11 +123,13 @@ def iter_csv_rows(
     with open(csv_file_path, encoding=encoding) as csvfile:
         reader = csv.DictReader(csvfile, delimiter=delimiter)
         for line_num, row in enumerate(reader, start=2):
+            if progress is not None and line_num % PROGRESS_STEP == 0:
+                progress(line_num - 1, csvfile.buffer.tell())
             ok, err_msg = check_required_fields(row, required_fields)
             if not ok:
                 if logger:
                     logger.error(
-                        f"Строка {line_num}: {err_msg}. Строка: {row}")
+                        "Строка %d: %s. Строка: %s", line_num, err_msg, row)
                 continue
             yield line_num, row
 
@@ -81,7 +140,8 @@ def collect_csv_structure(
     required_fields: list,
     parent_field: str = None,
     logger: Any = None,
-    delimiter: str = ';'
+    delimiter: str = ';',
+    progress: Callable[[int, int], None] = None
 ) -> Tuple[Dict, Dict]:
     """
     Собирает информацию о структуре данных из CSV.
@@ -93,16 +153,24 @@ def collect_csv_structure(
         parent_field: поле с ссылкой на родителя (для иерархии)
         logger: объект логгера (опционально)
         delimiter: разделитель в CSV
+        progress: вызывается каждые PROGRESS_STEP строк и в конце файла
+            с (прочитано строк, прочитано байт) (опционально)
 
     Returns:
-        Tuple[Dict, Dict]: (info_dict, tree_dict) - информация о записях и дерево иерархии
+        Tuple[Dict, Dict]: (info_dict, tree_dict) - записи DepartmentRecord
+        и дерево иерархии
     """
     info_dict = {}
     tree_dict = {}
+    strings = {}
+    rows_read = 0
 
     with open(csv_file_path, encoding=encoding) as csvfile:
         reader = csv.DictReader(csvfile, delimiter=delimiter)
         for row in reader:
+            rows_read += 1
+            if progress is not None and rows_read % PROGRESS_STEP == 0:
+                progress(rows_read, csvfile.buffer.tell())
             ok, _ = check_required_fields(row, required_fields)
             if not ok:
                 continue
@@ -111,22 +179,97 @@ def collect_csv_structure(
             record_id = row[required_fields[2]] if len(
                 required_fields) > 2 else None
             if record_id:
-                info_dict[record_id] = {
-                    field: row.get(field, '') for field in row.keys()
-                }
+                info_dict[record_id] = make_department_record(row, strings)
 
                 # Строим дерево иерархии если указано поле родителя
                 if parent_field and parent_field in row:
                     parent_id = row[parent_field].strip()
                     if parent_id:
+                        parent_id = strings.setdefault(parent_id, parent_id)
                         tree_dict.setdefault(parent_id, set()).add(record_id)
 
+        if progress is not None:
+            progress(rows_read, csvfile.buffer.tell())
+
     return info_dict, tree_dict
 
 
+def collect_csv_data(
+    csv_file_path: str,
+    encoding: str,
+    required_fields: list,
+    parent_field: str = None,
+    logger: Any = None,
+    delimiter: str = ';',
+    progress: Callable[[int, int], None] = None
+) -> Tuple[Dict, Dict, List[Tuple[int, Dict]]]:
+    """
+    Однопроходное чтение CSV: структура и строки для генерации ролей.
+
+    Совмещает collect_csv_structure и iter_csv_rows: файл декодируется
+    и разбирается один раз, валидные строки сохраняются вместе с номерами
+    строк в исходном порядке, ошибки валидации логируются сразу. Строки
+    хранятся как DepartmentRecord (общие с info_dict), а не как словари.
+
+    Args:
+        csv_file_path: путь к CSV файлу
+        encoding: кодировка файла
+        required_fields: список обязательных полей
+        parent_field: поле с ссылкой на родителя (для иерархии)
+        logger: объект логгера (опционально)
+        delimiter: разделитель в CSV
+        progress: вызывается каждые PROGRESS_STEP строк и в конце файла
+            с (прочитано строк, прочитано байт) (опционально)
+
+    Returns:
+        Tuple[Dict, Dict, List[Tuple[int, DepartmentRecord]]]: (info_dict,
+        tree_dict, rows) - записи, дерево иерархии и валидные строки с номерами
+    """
+    info_dict = {}
+    tree_dict = {}
+    strings = {}
+    rows = []
+    line_num = 1
+
+    with open(csv_file_path, encoding=encoding) as csvfile:
+        reader = csv.DictReader(csvfile, delimiter=delimiter)
+        for line_num, row in enumerate(reader, start=2):
+            if progress is not None and line_num % PROGRESS_STEP == 0:
+                progress(line_num - 1, csvfile.buffer.tell())
+            ok, err_msg = check_required_fields(row, required_fields)
+            if not ok:
+                if logger:
+                    logger.error(
+                        "Строка %d: %s. Строка: %s", line_num, err_msg, row)
+                continue
+
+            record = make_department_record(row, strings)
+            rows.append((line_num, record))
+
+            record_id = row[required_fields[2]] if len(
+                required_fields) > 2 else None
+            if record_id:
+                info_dict[record_id] = record
+
+                if parent_field and parent_field in row:
+                    parent_id = row[parent_field].strip()
+                    if parent_id:
+                        parent_id = strings.setdefault(parent_id, parent_id)
+                        tree_dict.setdefault(parent_id, set()).add(record_id)
+
+        if progress is not None:
+            progress(line_num - 1, csvfile.buffer.tell())
+
+    return info_dict, tree_dict, rows
+
+
 def collect_all_children(tree_dict: dict, parent_id: str) -> set:
     """
-    Рекурсивно собирает ID всех потомков и самого родителя.
+    Собирает ID всех потомков и самого родителя.
+
+    Обход в глубину со стеком и множеством посещённых узлов: глубина
+    дерева не ограничена, циклы не зацикливают обход. Для многих узлов
+    одного дерева используйте HierarchyStore: связи строятся один раз.
 
     Args:
         tree_dict: словарь иерархии {родитель: {потомки}}
@@ -135,16 +278,14 @@ def collect_all_children(tree_dict: dict, parent_id: str) -> set:
     Returns:
         set: множество всех потомков включая родителя
     """
-    result = set()
-
-    def crawler(uid: str):
-        result.add(uid)
-        for child in tree_dict.get(uid, []):
-            if child not in result:
-                crawler(child)
-
-    crawler(parent_id)
-    return result
+    visited = {parent_id}
+    stack = [parent_id]
+    while stack:
+        for child in tree_dict.get(stack.pop(), ()):
+            if child not in visited:
+                visited.add(child)
+                stack.append(child)
+    return visited
 
 
 def get_csv_files(directory: str, exclude_files: List[str] = None) -> List[str]:
@@ -0,0 +1,260 @@
+"""
+Модуль разностной модели CIM (md:DifferenceModel)
+Ответственность: чтение объектов модели и сравнение версий по UID объектов
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import lxml.etree as etree
+
+from .compression import open_input
+
+# Пространство имён разностной модели IEC 61970-552
+DIFFERENCE_NAMESPACE = 'http://iec.ch/2002/schema/CIM_difference_model#'
+
+_RDF_NAMESPACE = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#'
+_RDF_ABOUT = '{%s}about' % _RDF_NAMESPACE
+_RDF_RESOURCE = '{%s}resource' % _RDF_NAMESPACE
+
+# Свойство объекта: (тег в нотации Кларка, 'resource' для ссылки или '' для текста, значение)
+ModelProperty = Tuple[str, str, str]
+
+
+class ModelObject(NamedTuple):
+    """Объект модели: тег элемента и его свойства в порядке документа."""
+    tag: str
+    properties: Tuple[ModelProperty, ...]
+
+
+def _local_name(tag: str) -> str:
+    """Возвращает имя тега без пространства имён."""
+    return tag.rsplit('}', 1)[-1]
+
+
+def load_model_objects(xml_file_path: str) -> Tuple[Optional[str], Dict[str, ModelObject]]:
+    """
+    Читает объекты модели из XML потоково (iterparse).
+
+    Заголовки модели (md:FullModel, md:DifferenceModel) в объекты не
+    попадают; rdf:about FullModel возвращается отдельно для
+    md:Model.Supersedes.
+
+    Args:
+        xml_file_path: путь к XML файлу полной модели (.xml.gz и .xml.zst
+            распаковываются при чтении)
+
+    Returns:
+        Tuple[Optional[str], Dict[str, ModelObject]]: (rdf:about FullModel,
+        {rdf:about объекта: объект})
+    """
+    model_about = None
+    objects: Dict[str, ModelObject] = {}
+    depth = 0
+
+    with open_input(xml_file_path) as source:
+        for event, elem in etree.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth != 1:
+                continue
+
+            # Закрыт элемент верхнего уровня внутри rdf:RDF
+            about = elem.get(_RDF_ABOUT)
+            name = _local_name(elem.tag)
+            if name in ('FullModel', 'DifferenceModel'):
+                if name == 'FullModel':
+                    model_about = about
+            elif about is not None:
+                properties = []
+                for child in elem:
+                    if not isinstance(child.tag, str):
+                        continue
+                    resource = child.get(_RDF_RESOURCE)
+                    if resource is not None:
+                        properties.append((child.tag, 'resource', resource))
+                    else:
+                        properties.append((child.tag, '', child.text or ''))
+                objects[about] = ModelObject(elem.tag, tuple(properties))
+
+            # Освобождаем разобранные элементы, чтобы не держать дерево в памяти
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+    return model_about, objects
+
+
+class ModelDifference:
+    """
+    Разница двух версий модели, сравниваемых по rdf:about объектов.
+
+    Attributes:
+        added: новые объекты (полностью в forwardDifferences)
+        removed: удалённые объекты (полностью в reverseDifferences)
+        changed: (about, тег, новые значения, прежние значения) для
+            изменённых свойств, например переименований и DataItems
+    """
+
+    def __init__(self):
+        self.added: List[Tuple[str, ModelObject]] = []
+        self.removed: List[Tuple[str, ModelObject]] = []
+        self.changed: List[Tuple[str, str, Tuple[ModelProperty, ...], Tuple[ModelProperty, ...]]] = []
+
+    def is_empty(self) -> bool:
+        """Возвращает True, если версии совпадают."""
+        return not (self.added or self.removed or self.changed)
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """
+        Подсчитывает изменения по типам объектов.
+
+        Returns:
+            Dict[str, Dict[str, int]]: {тип: {'added'|'removed'|'changed': число}}
+        """
+        result: Dict[str, Dict[str, int]] = {}
+        for key, items in (('added', self.added), ('removed', self.removed)):
+            for _, obj in items:
+                kind = result.setdefault(_local_name(obj.tag), {})
+                kind[key] = kind.get(key, 0) + 1
+        for _, tag, _, _ in self.changed:
+            kind = result.setdefault(_local_name(tag), {})
+            kind['changed'] = kind.get('changed', 0) + 1
+        return result
+
+    def format_counts(self) -> str:
+        """Возвращает сводку изменений для лога."""
+        parts = []
+        for kind, counts in self.counts().items():
+            parts.append(f"{kind}: +{counts.get('added', 0)} "
+                         f"-{counts.get('removed', 0)} ~{counts.get('changed', 0)}")
+        return ', '.join(parts) if parts else 'изменений нет'
+
+
+def _subtract(properties: Tuple[ModelProperty, ...], other: Tuple[ModelProperty, ...]) -> Tuple[ModelProperty, ...]:
+    """Свойства из properties, которых нет в other (с учётом повторов)."""
+    remaining: Dict[ModelProperty, int] = {}
+    for prop in other:
+        remaining[prop] = remaining.get(prop, 0) + 1
+    result = []
+    for prop in properties:
+        if remaining.get(prop):
+            remaining[prop] -= 1
+        else:
+            result.append(prop)
+    return tuple(result)
+
+
+class ModelComparer:
+    """
+    Потоковое сравнение новой версии модели с предыдущей.
+
+    Объекты новой версии подаются в add() по одному в порядке документа
+    (например, по мере генерации XML), поэтому новая версия целиком в
+    памяти не хранится: накапливаются только изменения. Сопоставленные
+    объекты предыдущей версии помечаются в её словаре; оставшиеся после
+    finish() попадают в удалённые. Повтор UID в новой версии учитывается
+    один раз.
+    """
+
+    def __init__(self, previous: Dict[str, ModelObject]):
+        """
+        Инициализация сравнения.
+
+        Args:
+            previous: объекты предыдущей версии (словарь изменяется: у
+                сопоставленных объектов значение заменяется на None)
+        """
+        self.previous: Dict[str, Optional[ModelObject]] = previous
+        self.difference = ModelDifference()
+        self._added = set()
+
+    def add(self, about: str, obj: ModelObject) -> None:
+        """
+        Сравнивает объект новой версии с предыдущей.
+
+        Args:
+            about: rdf:about объекта
+            obj: объект новой версии
+        """
+        if about in self.previous:
+            old = self.previous[about]
+            if old is None:
+                return
+            self.previous[about] = None
+            if old == obj:
+                return
+            if old.tag != obj.tag:
+                # Тот же UID у объекта другого типа - заменяем объект целиком
+                self.difference.removed.append((about, old))
+                self.difference.added.append((about, obj))
+                return
+            self.difference.changed.append((
+                about, obj.tag,
+                _subtract(obj.properties, old.properties),
+                _subtract(old.properties, obj.properties),
+            ))
+        elif about not in self._added:
+            self._added.add(about)
+            self.difference.added.append((about, obj))
+
+    def add_all(self, objects: Iterable[Tuple[str, ModelObject]]) -> None:
+        """Сравнивает несколько объектов новой версии (пары rdf:about, объект)."""
+        for about, obj in objects:
+            self.add(about, obj)
+
+    def finish(self) -> ModelDifference:
+        """
+        Завершает сравнение: несопоставленные объекты предыдущей версии - удалённые.
+
+        Returns:
+            ModelDifference: разница версий
+        """
+        self.difference.removed.extend(
+            (about, obj) for about, obj in self.previous.items() if obj is not None)
+        self.previous = {}
+        return self.difference
+
+
+def compare_model_objects(
+    previous: Dict[str, ModelObject],
+    current: Dict[str, ModelObject]
+) -> ModelDifference:
+    """
+    Сравнивает две версии модели по ключу rdf:about.
+
+    Сравнение корректно, только если UID объектов стабильны между
+    запусками (uid_mode deterministic или persistent). Порядок
+    результата - порядок документов: новые и изменённые объекты по
+    текущей версии, удалённые - по предыдущей.
+
+    Args:
+        previous: объекты предыдущей версии
+        current: объекты текущей версии
+
+    Returns:
+        ModelDifference: разница версий
+    """
+    comparer = ModelComparer(dict(previous))
+    comparer.add_all(current.items())
+    return comparer.finish()
+
+
+# Фабричные функции для удобства
+def create_model_difference(previous_xml: str, current_xml: str) -> Tuple[Optional[str], ModelDifference]:
+    """
+    Сравнивает два XML файла полной модели.
+
+    Args:
+        previous_xml: XML предыдущей версии
+        current_xml: XML текущей версии
+
+    Returns:
+        Tuple[Optional[str], ModelDifference]: (rdf:about предыдущей
+        FullModel, разница версий)
+    """
+    previous_about, previous = load_model_objects(previous_xml)
+    _, current = load_model_objects(current_xml)
+    return previous_about, compare_model_objects(previous, current)
@@ -3,16 +3,12 @@
 Ответственность: работа с файловой системой, управление путями
 """
 
-import sys
+import argparse
 from pathlib import Path
 from datetime import datetime
 from typing import List
 from .config_manager import get_config_value
 
-# В методах класса:
-exclude_files = get_config_value('file_management.exclude_files')
-log_directory = get_config_value('file_management.log_directory')
-
 
 class FileManager:
     """Класс для управления файлами и директориями."""
@@ -27,18 +23,18 @@ class FileManager:
         self.base_directory = Path(base_directory).resolve()
         self.log_directory = get_config_value('file_management.log_directory')
 
-    def get_csv_files(self, exclude_files: List[str] = get_config_value('file_management.exclude_files')) -> List[str]:
+    def get_csv_files(self, exclude_files: List[str] = None) -> List[str]:
         """
         Получает список CSV файлов в базовой директории.
 
         Args:
-            exclude_files: список файлов для исключения
+            exclude_files: список файлов для исключения (None - из config.json)
 
         Returns:
             List[str]: список имен CSV файлов
         """
         if exclude_files is None:
-            exclude_files
+            exclude_files = get_config_value('file_management.exclude_files') or []
 
         exclude_files = [f.lower() for f in exclude_files]
         csv_files = []
@@ -62,7 +58,7 @@ class FileManager:
         Returns:
             str: путь к директории логов
         """
-        self.log_directory = self.base_directory / log_directory
+        self.log_directory = self.base_directory / get_config_value('file_management.log_directory')
         self.log_directory.mkdir(exist_ok=True)
         return str(self.log_directory)
 
@@ -107,24 +103,105 @@ class FileManager:
         date_str = datetime.now().strftime("%Y-%m-%d")
         return str(self.log_directory / f"{basename}_{date_str}.log")
 
+    def get_run_report_path(self, report_name: str) -> str:
+        """
+        Получает путь к JSON-отчёту о запуске пакета.
+
+        Args:
+            report_name: имя файла отчёта из конфигурации (например, run_report.json)
+
+        Returns:
+            str: путь вида [папка логов]/run_report_[дата]_[время].json
+        """
+        if not self.log_directory:
+            self.create_log_directory()
+
+        name = Path(report_name)
+        time_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        return str(self.log_directory / f"{name.stem}_{time_str}{name.suffix or '.json'}")
+
 
 class CLIManager:
     """Класс для управления командной строкой."""
 
     @staticmethod
-    def get_cli_parameters() -> tuple:
+    def parse_cli_arguments(argv: List[str] = None) -> argparse.Namespace:
+        """
+        Разбирает аргументы командной строки.
+
+        Args:
+            argv: список аргументов (по умолчанию sys.argv[1:])
+
+        Returns:
+            argparse.Namespace: folder_uid, csv_dir и опции запуска
+        """
+        parser = argparse.ArgumentParser(
+            description="Пакетный конвертер CSV ➔ XML")
+        parser.add_argument('folder_uid', nargs='?',
+                            help="UID папки для ролей")
+        parser.add_argument('csv_dir', nargs='?',
+                            help="папка с CSV файлами")
+        parser.add_argument('-j', '--jobs', type=int, default=1,
+                            help="число параллельных процессов (по умолчанию 1)")
+        parser.add_argument('--force', action='store_true',
+                            help="обработать все файлы, даже если XML актуален по манифесту")
+        parser.add_argument('--diff', action='store_true',
+                            help="дополнительно сформировать разностную модель [имя].diff.xml "
+                                 "относительно предыдущего XML")
+        parser.add_argument('--diff-from', metavar='DIR',
+                            help="папка с предыдущими версиями ([имя].csv или [имя].xml) "
+                                 "для разностной модели")
+        parser.add_argument('--compress', choices=('gzip', 'zstd', 'none'),
+                            help="сжатие выходных XML при записи: [имя].xml.gz или "
+                                 "[имя].xml.zst (по умолчанию из config.json)")
+        parser.add_argument('--timeout', type=float, metavar='SEC',
+                            help="лимит времени на файл, секунд (0 - без лимита; "
+                                 "по умолчанию из config.json)")
+        parser.add_argument('--profile', choices=('cpu', 'mem'),
+                            help="профилировать обработку каждого файла: cpu - cProfile "
+                                 "([имя]_[дата].prof), mem - снимки tracemalloc "
+                                 "([имя]_[дата].mem.txt); файлы профиля - в папке log")
+        parser.add_argument('--watch', action='store_true',
+                            help="режим отслеживания: обработать папку и далее обрабатывать "
+                                 "новые и изменённые CSV до Ctrl+C")
+        parser.add_argument('--watch-backend', choices=('auto', 'watchdog', 'poll'),
+                            help="способ отслеживания: события файловой системы (пакет "
+                                 "watchdog) или опрос папки (по умолчанию из config.json)")
+        parser.add_argument('--settle', type=float, metavar='SEC',
+                            help="сколько секунд файл не должен меняться до обработки "
+                                 "(по умолчанию из config.json)")
+        parser.add_argument('--poll-interval', type=float, metavar='SEC',
+                            help="период опроса папки, секунд (по умолчанию из config.json)")
+        parser.add_argument('--consolidate', action='store_true',
+                            help="собрать все CSV в одну сводную модель [имя].xml: родитель "
+                                 "подразделения может быть в другом файле")
+        parser.add_argument('--split-by-org', action='store_true',
+                            help="сводная модель отдельным файлом на каждую организацию "
+                                 "[имя]_[организация].xml (включает --consolidate)")
+        parser.add_argument('--output-name', metavar='NAME',
+                            help="имя сводной модели и её лога (по умолчанию consolidated)")
+        return parser.parse_args(argv)
+
+    @staticmethod
+    def get_cli_parameters(options: argparse.Namespace = None) -> tuple:
         """
         Получает параметры из командной строки или запрашивает у пользователя.
 
+        Args:
+            options: разобранные аргументы (по умолчанию разбираются из sys.argv)
+
         Returns:
             tuple: (folder_uid, csv_directory)
         """
         print("="*50)
         print("Пакетный конвертер CSV ➔ XML (поточн. генерация XML)")
 
-        if len(sys.argv) >= 3:
-            folder_uid = sys.argv[1]
-            csv_dir = sys.argv[2]
+        if options is None:
+            options = CLIManager.parse_cli_arguments()
+
+        if options.folder_uid and options.csv_dir:
+            folder_uid = options.folder_uid
+            csv_dir = options.csv_dir
         else:
             folder_uid = input('Введите UID папки для ролей: ').strip()
             csv_dir = input(
@@ -0,0 +1,295 @@
+"""
+Модуль работы с иерархией подразделений
+Ответственность: компактное хранилище связей с замыканием поддеревьев и
+обнаружением циклов
+"""
+
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional
+
+
+class HierarchyStore:
+    """
+    Компактное хранилище иерархии на целочисленных номерах узлов.
+
+    Каждый dep_uid получает плотный номер; связи родитель → потомки
+    хранятся в формате CSR в двух массивах array('i'): offsets (начало
+    списка потомков узла) и targets (номера потомков). Узлы из order
+    получают номера 0..ordered-1 в порядке документа, поэтому поддерево
+    в порядке документа - это отсортированные номера меньше ordered.
+
+    Если у каждого узла не больше одного родителя и циклов нет (обычная
+    оргструктура), поддерево - непрерывный отрезок обхода в глубину.
+    Иначе (несколько родителей, циклы) поддерево собирается обходом с
+    метками посещения; циклы сохраняются в self.cycles для вывода в лог.
+    """
+
+    def __init__(self, dep_tree: Dict[str, Iterable[str]], order: Iterable[str] = ()):
+        """
+        Инициализация хранилища.
+
+        Args:
+            dep_tree: словарь иерархии {родитель: {потомки}}
+            order: UID в порядке документа (например, ключи dep_info);
+                получают номера 0..ordered-1
+        """
+        self.uids: List[str] = list(dict.fromkeys(order))
+        self.ids: Dict[str, int] = {uid: node for node, uid in enumerate(self.uids)}
+        self.ordered = len(self.uids)
+        ids, intern = self.ids, self._intern
+        for parent_uid, children in dep_tree.items():
+            if parent_uid not in ids:
+                intern(parent_uid)
+            for child_uid in children:
+                if child_uid not in ids:
+                    intern(child_uid)
+
+        size = len(self.uids)
+        counts = [0] * (size + 1)
+        for parent_uid, children in dep_tree.items():
+            counts[ids[parent_uid] + 1] = len(children)
+        offsets = array('i', accumulate(counts))
+        targets = array('i', bytes(4 * offsets[size]))
+        for parent_uid, children in dep_tree.items():
+            start = offsets[ids[parent_uid]]
+            # Потомки по возрастанию номеров: порядок обхода не зависит от хэширования
+            targets[start:start + len(children)] = array(
+                'i', sorted([ids[x] for x in children]))
+        self.offsets = offsets
+        self.targets = targets
+
+        self.cycles: List[List[str]] = []
+        self._tin: Optional[array] = None
+        self._size: Optional[array] = None
+        self._order: Optional[array] = None
+        self._marks: Optional[array] = None
+        self._max_depth = 0
+        self._stamp = 0
+        if not self._build_forest():
+            self._find_cycles()
+            self._marks = array('q', bytes(8 * size))
+
+    def _intern(self, uid: str) -> int:
+        """Возвращает номер узла, регистрируя его при первом обращении."""
+        node = self.ids.get(uid)
+        if node is None:
+            node = len(self.uids)
+            self.ids[uid] = node
+            self.uids.append(uid)
+        return node
+
+    def _build_forest(self) -> bool:
+        """
+        Строит обход в глубину, если граф - лес.
+
+        Returns:
+            bool: False, если у узла несколько родителей или есть циклы
+        """
+        size = len(self.uids)
+        offsets, targets = self.offsets, self.targets
+        # parents[x] - номер родителя + 1 (0 у корня)
+        parents = array('i', bytes(4 * size))
+        for parent in range(size):
+            for child in targets[offsets[parent]:offsets[parent + 1]]:
+                if parents[child]:
+                    return False
+                parents[child] = parent + 1
+
+        tin = array('i', bytes(4 * size))
+        subtree_size = array('i', [1]) * size
+        order = array('i')
+        for root in range(size):
+            if parents[root]:
+                continue
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                tin[node] = len(order)
+                order.append(node)
+                stack.extend(reversed(targets[offsets[node]:offsets[node + 1]]))
+        if len(order) < size:
+            # Непосещённые узлы лежат на циклах
+            return False
+
+        for node in reversed(order):
+            parent = parents[node]
+            if parent:
+                subtree_size[parent - 1] += subtree_size[node]
+        # Глубины в порядке обхода: родитель всегда раньше потомка
+        depth = array('i', bytes(4 * size))
+        for node in order:
+            parent = parents[node]
+            if parent:
+                depth[node] = depth[parent - 1] + 1
+        self._max_depth = max(depth, default=0)
+        self._tin, self._size, self._order = tin, subtree_size, order
+        return True
+
+    def _find_cycles(self) -> None:
+        """Находит циклы: компоненты сильной связности (итеративный Тарьян)."""
+        size = len(self.uids)
+        offsets, targets = self.offsets, self.targets
+        index = array('i', [-1]) * size
+        lowlink = array('i', [-1]) * size
+        on_stack = bytearray(size)
+        stack: List[int] = []
+        counter = 0
+
+        for root in range(size):
+            if index[root] >= 0:
+                continue
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [(root, offsets[root])]
+
+            while work:
+                node, position = work[-1]
+                end = offsets[node + 1]
+                while position < end:
+                    child = targets[position]
+                    position += 1
+                    if index[child] < 0:
+                        work[-1] = (node, position)
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = 1
+                        work.append((child, offsets[child]))
+                        break
+                    if on_stack[child]:
+                        lowlink[node] = min(lowlink[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index[node]:
+                        members = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = 0
+                            members.append(member)
+                            if member == node:
+                                break
+                        if len(members) > 1 or node in targets[offsets[node]:end]:
+                            members.reverse()
+                            self.cycles.append([self.uids[x] for x in members])
+
+    def __contains__(self, uid: str) -> bool:
+        return uid in self.ids
+
+    def __len__(self) -> int:
+        return len(self.uids)
+
+    @property
+    def is_forest(self) -> bool:
+        """True, если у каждого узла не больше одного родителя и циклов нет."""
+        return self._order is not None
+
+    def node(self, uid: str) -> int:
+        """Возвращает номер узла или -1, если узла нет."""
+        return self.ids.get(uid, -1)
+
+    def has_children(self, node: int) -> bool:
+        """Проверяет, есть ли у узла непосредственные потомки."""
+        return self.offsets[node + 1] > self.offsets[node]
+
+    def subtree_size(self, node: int) -> int:
+        """
+        Возвращает размер поддерева, включая сам узел.
+
+        Для леса - O(1) по обходу в глубину, иначе - обходом поддерева.
+        """
+        if self._size is not None:
+            return self._size[node]
+        return len(self.subtree_nodes(node))
+
+    def max_depth(self) -> Optional[int]:
+        """Возвращает максимальную глубину леса (у корня 0) или None, если граф не лес."""
+        return self._max_depth if self._order is not None else None
+
+    def subtree_nodes(self, node: int) -> List[int]:
+        """
+        Возвращает номер узла и номера всех его потомков (без повторов).
+
+        Args:
+            node: номер корня поддерева
+
+        Returns:
+            List[int]: номера узлов поддерева в порядке обхода
+        """
+        if self._order is not None:
+            start = self._tin[node]
+            return self._order[start:start + self._size[node]].tolist()
+
+        self._stamp += 1
+        stamp, marks = self._stamp, self._marks
+        offsets, targets = self.offsets, self.targets
+        marks[node] = stamp
+        result = [node]
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for child in targets[offsets[current]:offsets[current + 1]]:
+                if marks[child] != stamp:
+                    marks[child] = stamp
+                    result.append(child)
+                    stack.append(child)
+        return result
+
+    def ordered_subtree(self, node: int) -> List[int]:
+        """
+        Возвращает узлы поддерева из order в порядке документа.
+
+        Args:
+            node: номер корня поддерева
+
+        Returns:
+            List[int]: номера меньше ordered по возрастанию (узел включён,
+            если он есть в order)
+        """
+        nodes = sorted(self.subtree_nodes(node))
+        del nodes[bisect_left(nodes, self.ordered):]
+        return nodes
+
+    def closure(self, uid: str) -> List[str]:
+        """
+        Возвращает ID узла и всех его потомков (без повторов).
+
+        Args:
+            uid: ID родительского элемента
+
+        Returns:
+            List[str]: узел и все потомки
+        """
+        node = self.ids.get(uid)
+        if node is None:
+            return [uid]
+        return [self.uids[x] for x in self.subtree_nodes(node)]
+
+    def format_cycles(self) -> List[str]:
+        """
+        Форматирует найденные циклы для вывода в лог.
+
+        Returns:
+            List[str]: строки вида "a → b → a"
+        """
+        return [' → '.join(members + [members[0]]) for members in self.cycles]
+
+    def nbytes(self) -> int:
+        """Размер массивов связей в байтах (без словаря номеров)."""
+        arrays = (self.offsets, self.targets, self._tin, self._size, self._order, self._marks)
+        return sum(len(x) * x.itemsize for x in arrays if x is not None)
+
+
+# Фабричные функции для удобства
+def create_hierarchy_store(
+    dep_tree: Dict[str, Iterable[str]],
+    order: Iterable[str] = ()
+) -> HierarchyStore:
+    """Создает компактное хранилище иерархии."""
+    return HierarchyStore(dep_tree, order)
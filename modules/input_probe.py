@@ -0,0 +1,306 @@
+"""
+Модуль предварительного анализа входных CSV файлов
+Ответственность: кодировка, разделитель и заголовок за одно чтение, кэш результатов
+"""
+
+import codecs
+import csv
+import json
+import os
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .config_manager import get_config_value
+
+# Размер читаемого начала файла
+PROBE_SIZE = 65536
+
+# Порядок важен: BOM UTF-32 LE начинается с BOM UTF-16 LE
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+_DELIMITER_CANDIDATES = (';', ',', '\t', '|')
+
+
+class InputProbe(NamedTuple):
+    """Результат анализа входного файла."""
+    encoding: str
+    delimiter: str
+    header: Tuple[str, ...]
+    has_bom: bool
+    missing_fields: Tuple[str, ...] = ()
+
+
+def detect_encoding_bytes(raw: bytes, fallback_encoding: str = 'cp1251') -> Tuple[str, bool]:
+    """
+    Определяет кодировку по началу файла.
+
+    Порядок: BOM, строгая проверка UTF-8 и только затем статистическое
+    определение chardet. При низкой уверенности chardet (типично для
+    коротких файлов в cp1251) используется fallback_encoding.
+
+    Args:
+        raw: начало файла
+        fallback_encoding: кодировка при неуверенном определении
+
+    Returns:
+        Tuple[str, bool]: (кодировка, найден ли BOM)
+    """
+    for bom, encoding in _BOMS:
+        if raw.startswith(bom):
+            return encoding, True
+
+    try:
+        raw.decode('utf-8')
+        return 'utf-8', False
+    except UnicodeDecodeError as e:
+        # Обрезанный многобайтовый символ в конце прочитанного блока
+        if e.reason == 'unexpected end of data' and e.start >= len(raw) - 3:
+            return 'utf-8', False
+
+    import chardet
+    detected = chardet.detect(raw)
+    encoding = detected.get('encoding')
+    if encoding and (detected.get('confidence') or 0) >= 0.5:
+        try:
+            raw.decode(encoding)
+            return encoding, False
+        except (UnicodeDecodeError, LookupError):
+            pass
+    return fallback_encoding, False
+
+
+def _parse_header(line: str, delimiter: str) -> Tuple[str, ...]:
+    """Разбирает строку заголовка CSV."""
+    for fields in csv.reader([line], delimiter=delimiter):
+        return tuple(fields)
+    return ()
+
+
+def sniff_delimiter(
+    header_line: str,
+    sample_text: str,
+    required_fields: List[str],
+    default_delimiter: str = ';'
+) -> str:
+    """
+    Определяет разделитель CSV.
+
+    Сначала проверяются default_delimiter и типовые разделители: выбирается
+    первый, при котором в заголовке есть все обязательные поля. Если такого
+    нет - csv.Sniffer по образцу, иначе default_delimiter.
+
+    Args:
+        header_line: первая строка файла
+        sample_text: декодированное начало файла
+        required_fields: обязательные поля
+        default_delimiter: разделитель по умолчанию
+
+    Returns:
+        str: разделитель
+    """
+    candidates = [default_delimiter] + [
+        x for x in _DELIMITER_CANDIDATES if x != default_delimiter]
+    for delimiter in candidates:
+        header = _parse_header(header_line, delimiter)
+        if all(field in header for field in required_fields):
+            return delimiter
+
+    try:
+        return csv.Sniffer().sniff(sample_text, delimiters=''.join(candidates)).delimiter
+    except csv.Error:
+        return default_delimiter
+
+
+class ProbeCache:
+    """
+    Кэш результатов анализа по (путь, размер, mtime).
+
+    Записи хранятся в памяти и, если указан cache_file, в JSON файле,
+    поэтому повторные запуски не повторяют определение кодировки. Новые
+    записи сохраняются в файл не сразу, а вызовом save() - один раз на
+    пакет; рабочие процессы пула передают их родителю (take_new_entries,
+    merge), и файл пишет только он.
+    """
+
+    def __init__(self, cache_file: str = None):
+        """
+        Инициализация кэша.
+
+        Args:
+            cache_file: путь к JSON файлу кэша (None - только в памяти)
+        """
+        self.cache_file = cache_file
+        self._entries: Dict[str, dict] = {}
+        self._new: Dict[str, dict] = {}
+        self._loaded = False
+
+    def _load(self) -> None:
+        """Загружает кэш из файла при первом обращении."""
+        self._loaded = True
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def save(self) -> None:
+        """
+        Атомарно сохраняет новые записи в файл.
+
+        Файл перечитывается перед записью, поэтому записи других запусков
+        не теряются. Без новых записей файл не переписывается.
+        """
+        if not self._new:
+            return
+        new, self._new = self._new, {}
+        if not self.cache_file or not os.path.isdir(os.path.dirname(self.cache_file) or '.'):
+            return
+        self._load()
+        self._entries.update(new)
+        tmp_path = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.cache_file)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def take_new_entries(self) -> Dict[str, dict]:
+        """Возвращает и забирает несохранённые записи (рабочий процесс - родителю)."""
+        new, self._new = self._new, {}
+        return new
+
+    def merge(self, entries: Dict[str, dict]) -> None:
+        """Добавляет записи другого процесса; в файл они попадут при save()."""
+        if not self._loaded:
+            self._load()
+        self._entries.update(entries)
+        self._new.update(entries)
+
+    def get(self, file_path: str, stat: os.stat_result) -> Optional[InputProbe]:
+        """Возвращает результат анализа, если файл не менялся."""
+        if not self._loaded:
+            self._load()
+        entry = self._entries.get(os.path.abspath(file_path))
+        if not entry or entry.get('size') != stat.st_size or entry.get('mtime_ns') != stat.st_mtime_ns:
+            return None
+        return InputProbe(entry['encoding'], entry['delimiter'],
+                          tuple(entry['header']), entry['has_bom'])
+
+    def put(self, file_path: str, stat: os.stat_result, probe: InputProbe) -> None:
+        """Сохраняет результат анализа."""
+        if not self._loaded:
+            self._load()
+        key = os.path.abspath(file_path)
+        self._entries[key] = self._new[key] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'encoding': probe.encoding,
+            'delimiter': probe.delimiter,
+            'header': list(probe.header),
+            'has_bom': probe.has_bom,
+        }
+
+
+def probe_csv_input(
+    file_path: str,
+    required_fields: List[str],
+    default_delimiter: str = None,
+    cache: ProbeCache = None
+) -> InputProbe:
+    """
+    Анализирует CSV файл за одно чтение начала файла.
+
+    Args:
+        file_path: путь к CSV файлу
+        required_fields: обязательные поля заголовка
+        default_delimiter: разделитель по умолчанию (None - из config.json)
+        cache: кэш результатов (опционально)
+
+    Returns:
+        InputProbe: кодировка, разделитель, заголовок и недостающие поля
+    """
+    if default_delimiter is None:
+        default_delimiter = get_config_value(
+            'csv_processing.default_delimiter') or ';'
+
+    stat = os.stat(file_path)
+    probe = cache.get(file_path, stat) if cache is not None else None
+
+    if probe is None:
+        with open(file_path, 'rb') as f:
+            raw = f.read(PROBE_SIZE)
+        fallback_encoding = get_config_value(
+            'csv_processing.fallback_encoding') or 'cp1251'
+        encoding, has_bom = detect_encoding_bytes(raw, fallback_encoding)
+
+        sample_text = raw.decode(encoding, errors='replace')
+        if sample_text.startswith('\ufeff'):
+            sample_text = sample_text[1:]
+        lines = sample_text.splitlines()
+        header_line = lines[0] if lines else ''
+
+        delimiter = sniff_delimiter(
+            header_line, sample_text, required_fields, default_delimiter)
+        probe = InputProbe(encoding, delimiter,
+                           _parse_header(header_line, delimiter), has_bom)
+        if cache is not None:
+            cache.put(file_path, stat, probe)
+
+    missing = tuple(x for x in required_fields if x not in probe.header)
+    return probe._replace(missing_fields=missing)
+
+
+# Кэши по файлам кэша: один объект на путь в пределах процесса
+_probe_caches: Dict[str, ProbeCache] = {}
+
+
+def get_probe_cache(cache_file: str = None) -> ProbeCache:
+    """
+    Получает кэш анализа (один на путь к файлу кэша).
+
+    Args:
+        cache_file: путь к JSON файлу кэша (None - кэш только в памяти)
+
+    Returns:
+        ProbeCache: кэш
+    """
+    key = cache_file or ''
+    if key not in _probe_caches:
+        _probe_caches[key] = ProbeCache(cache_file)
+    return _probe_caches[key]
+
+
+def save_probe_caches() -> None:
+    """Сохраняет новые записи всех кэшей анализа процесса (в конце пакета)."""
+    for cache in _probe_caches.values():
+        cache.save()
+
+
+def take_probe_cache_entries() -> Dict[str, Dict[str, dict]]:
+    """
+    Забирает несохранённые записи всех кэшей процесса.
+
+    Returns:
+        Dict[str, Dict[str, dict]]: {путь к файлу кэша: записи}
+    """
+    taken = {}
+    for key, cache in _probe_caches.items():
+        entries = cache.take_new_entries()
+        if entries:
+            taken[key] = entries
+    return taken
+
+
+def merge_probe_cache_entries(taken: Dict[str, Dict[str, dict]]) -> None:
+    """Добавляет записи, полученные из рабочего процесса (см. take_probe_cache_entries)."""
+    for key, entries in taken.items():
+        get_probe_cache(key or None).merge(entries)
@@ -3,9 +3,14 @@
 Ответственность: настройка и управление системой логирования
 """
 
+import atexit
 import logging
+import os
+import queue
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import Callable, Optional
+from typing import Callable, Iterable, List, Optional
 # from pathlib import Path
 from .config_manager import get_config_value
 
@@ -38,6 +43,25 @@ class UILogHandler(LogHandler):
         except Exception:
             self.handleError(record)
 
+    def emit_batch(
+        self,
+        records: List[logging.LogRecord],
+        format_record: Callable[[logging.LogRecord], str] = None
+    ) -> None:
+        """Отправляет пачку записей в UI одним вызовом callback."""
+        format_record = format_record or self.format
+        lines = []
+        for record in records:
+            try:
+                lines.append(format_record(record) + "\n")
+            except Exception:
+                self.handleError(record)
+        if lines:
+            try:
+                self.callback(''.join(lines))
+            except Exception:
+                self.handleError(records[-1])
+
 
 class FileLogHandler(logging.FileHandler):
     """Расширенный FileHandler с дополнительными возможностями."""
@@ -53,51 +77,375 @@ class FileLogHandler(logging.FileHandler):
         """
         super().__init__(filename, mode, encoding)
 
+    def emit_batch(
+        self,
+        records: List[logging.LogRecord],
+        format_record: Callable[[logging.LogRecord], str] = None
+    ) -> None:
+        """Записывает пачку записей одной операцией записи и одним flush."""
+        format_record = format_record or self.format
+        lines = []
+        for record in records:
+            try:
+                lines.append(format_record(record) + self.terminator)
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        self.acquire()
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(''.join(lines))
+            self.flush()
+        except Exception:
+            self.handleError(records[-1])
+        finally:
+            self.release()
+
+
+class LogListener:
+    """
+    Фоновый поток записи логов (один на процесс).
+
+    Логгеры в режиме очереди только кладут запись в очередь через
+    QueueLogHandler. Поток просыпается не чаще раза в flush_interval,
+    забирает накопившиеся записи пачками до batch_size и передаёт их
+    целевым обработчикам: у кого есть emit_batch (файл, UI), получают
+    пачку одним вызовом, остальные - по записи. Запись с одним
+    форматтером форматируется один раз для всех обработчиков.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 0.1):
+        """
+        Инициализация потока записи.
+
+        Args:
+            batch_size: максимальное число записей в одной пачке
+            flush_interval: пауза накопления записей, секунд (поток не
+                конкурирует с конвертацией за GIL на каждой записи)
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Запускает поток, если он ещё не запущен."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='LogListener', daemon=True)
+                self._thread.start()
+
+    def enqueue(self, targets: tuple, record: logging.LogRecord) -> None:
+        """Ставит запись в очередь для обработчиков targets."""
+        self._queue.put((targets, record))
+
+    def flush(self, timeout: float = None) -> None:
+        """Ждёт записи всех ранее поставленных в очередь сообщений."""
+        if self._thread is None or not self._thread.is_alive() \
+                or threading.current_thread() is self._thread:
+            return
+        done = threading.Event()
+        self._queue.put((None, done))
+        self._wake.set()
+        done.wait(timeout)
+
+    def stop(self) -> None:
+        """Дописывает очередь и останавливает поток."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put((None, None))
+        self._wake.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Цикл потока: ожидание, накопление, раздача пачек обработчикам."""
+        while True:
+            items = [self._queue.get()]
+            if items[0][0] is not None:
+                self._wake.wait(self.flush_interval)
+            self._wake.clear()
+
+            while True:
+                while len(items) < self.batch_size:
+                    try:
+                        items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if self._dispatch(items):
+                    return
+                if len(items) < self.batch_size:
+                    break
+                items = []
+
+    def _dispatch(self, items: list) -> bool:
+        """Раздаёт пачку обработчикам; True - получен сигнал остановки."""
+        batches = {}
+        events = []
+        stop = False
+        for targets, record in items:
+            if targets is None:
+                if record is None:
+                    stop = True
+                else:
+                    events.append(record)
+                continue
+            for handler in targets:
+                batches.setdefault(handler, []).append(record)
+
+        # Отформатированные строки по форматтерам: {id(форматтер): {id(запись): строка}}
+        formatted = {}
+
+        for handler, records in batches.items():
+            records = [x for x in records
+                       if x.levelno >= handler.level and handler.filter(x)]
+            if not records:
+                continue
+            emit_batch = getattr(handler, 'emit_batch', None)
+            if emit_batch is not None:
+                cache = formatted.setdefault(id(handler.formatter), {})
+
+                def format_record(record, handler=handler, cache=cache):
+                    text = cache.get(id(record))
+                    if text is None:
+                        text = cache[id(record)] = handler.format(record)
+                    return text
+                emit_batch(records, format_record)
+            else:
+                for record in records:
+                    handler.handle(record)
+
+        # Сигналы flush - после записи всего, что стояло в очереди перед ними
+        for event in events:
+            event.set()
+        return stop
+
+
+class QueueLogHandler(LogHandler):
+    """
+    Handler режима очереди: передаёт запись в LogListener без форматирования.
+
+    Форматирование и запись в файл/UI выполняются в потоке LogListener,
+    поэтому поток конвертации платит только за постановку в очередь.
+    """
+
+    def __init__(
+        self,
+        listener: LogListener,
+        targets: Iterable[logging.Handler],
+        shared_targets: Iterable[logging.Handler] = ()
+    ):
+        """
+        Инициализация handler.
+
+        Args:
+            listener: поток записи логов
+            targets: собственные целевые обработчики (файл, UI)
+            shared_targets: общие обработчики (например, консоль корневого
+                логгера): получают записи, но не закрываются вместе с handler
+        """
+        super().__init__()
+        self.listener = listener
+        self._owned_targets = tuple(targets)
+        self.targets = self._owned_targets + tuple(shared_targets)
+
+    def handle(self, record):
+        """Ставит запись в очередь без блокировки handler."""
+        rv = self.filter(record)
+        if rv:
+            self.listener.enqueue(self.targets, record)
+        return rv
+
+    def emit(self, record):
+        self.listener.enqueue(self.targets, record)
+
+    def setFormatter(self, fmt):
+        """Формат применяется к собственным целевым обработчикам."""
+        super().setFormatter(fmt)
+        for handler in self._owned_targets:
+            handler.setFormatter(fmt)
+
+    def flush(self):
+        self.listener.flush()
+
+    def close(self):
+        """Дописывает очередь и закрывает собственные целевые обработчики."""
+        self.listener.flush()
+        for handler in self._owned_targets:
+            handler.close()
+        super().close()
+
+
+# Поток записи логов текущего процесса (после fork создаётся заново)
+_listener: Optional[LogListener] = None
+_listener_pid: Optional[int] = None
+
+
+def get_log_listener() -> LogListener:
+    """
+    Получает поток записи логов текущего процесса, запуская его при необходимости.
+
+    Returns:
+        LogListener: поток записи логов
+    """
+    global _listener, _listener_pid
+    if _listener is None or _listener_pid != os.getpid():
+        _listener = LogListener(
+            get_config_value('logging.queue_batch_size') or 500,
+            get_config_value('logging.queue_flush_interval') or 0.1)
+        _listener_pid = os.getpid()
+        atexit.register(_listener.stop)
+    _listener.start()
+    return _listener
+
 
 class LoggerConfig:
     """Конфигурация логгера."""
 
     def __init__(
         self,
-        level: int = get_config_value('logging.level'),
-        format_string: str = get_config_value('logging.format'),
-        date_format: str = get_config_value('logging.date_format')
+        level: int = None,
+        format_string: str = None,
+        date_format: str = None
     ):
         """
         Инициализация конфигурации.
 
         Args:
-            level: уровень логирования
-            format_string: формат сообщений
-            date_format: формат даты
+            level: уровень логирования (None - из config.json)
+            format_string: формат сообщений (None - из config.json)
+            date_format: формат даты (None - из config.json)
         """
+        if level is None:
+            level = get_config_value('logging.level')
+        if format_string is None:
+            format_string = get_config_value('logging.format')
+        if date_format is None:
+            date_format = get_config_value('logging.date_format')
         self.level = level
         self.format_string = format_string
         self.date_format = date_format
         self.formatter = logging.Formatter(format_string, date_format)
 
 
+# Политики логирования строк CSV
+ROW_LOGGING_MODES = ('full', 'sampled', 'errors', 'summary')
+
+
+class RowLogPolicy:
+    """
+    Политика логирования строк CSV.
+
+    full - сообщение на каждую строку; sampled - на каждую sample_every-ю;
+    summary - только итоговые счётчики файла; errors - только ошибки.
+    Ошибки строк логируются полностью при любой политике.
+    """
+
+    def __init__(self, mode: str = None, sample_every: int = None):
+        """
+        Инициализация политики.
+
+        Args:
+            mode: full | sampled | errors | summary
+                (None - logging.row_logging из config.json, по умолчанию full)
+            sample_every: шаг выборки для sampled
+                (None - logging.row_sample_every, по умолчанию 1000)
+        """
+        mode = mode or get_config_value('logging.row_logging') or 'full'
+        if mode not in ROW_LOGGING_MODES:
+            raise ValueError(f"Неизвестная политика логирования строк: {mode} "
+                             f"(допустимые: {', '.join(ROW_LOGGING_MODES)})")
+        self.mode = mode
+        self.sample_every = max(1, int(
+            sample_every or get_config_value('logging.row_sample_every') or 1000))
+
+    @property
+    def log_summary(self) -> bool:
+        """Логировать ли итоговые счётчики файла."""
+        return self.mode != 'errors'
+
+    def row_interval(self, logger: logging.Logger) -> int:
+        """
+        Возвращает шаг логирования строк для логгера.
+
+        Args:
+            logger: логгер файла (учитывается его уровень)
+
+        Returns:
+            int: каждая N-я строка; 0 - строки не логируются
+        """
+        if self.mode == 'full':
+            interval = 1
+        elif self.mode == 'sampled':
+            interval = self.sample_every
+        else:
+            return 0
+        return interval if logger.isEnabledFor(logging.INFO) else 0
+
+    def describe(self) -> str:
+        """Описание политики для лога."""
+        if self.mode == 'sampled':
+            return f"sampled (каждая {self.sample_every}-я строка)"
+        return self.mode
+
+
+# Корневой логгер настраивается один раз на процесс
+_root_logger_configured = False
+
+
 class LoggerManager:
-    """Класс для управления логгерами."""
+    """
+    Класс для управления логгерами.
 
-    def __init__(self, default_config: LoggerConfig = None):
+    Логгеры файлов не регистрируются в logging.getLogger, поэтому не
+    остаются в глобальном реестре после удаления. Открытых логгеров не
+    больше max_open_loggers: при превышении давно не использованный
+    логгер закрывается (LRU) вместе с файлом лога. Логгер следует заново
+    получать через create_logger: у закрытого логгера handlers удалены.
+    """
+
+    def __init__(
+        self,
+        default_config: LoggerConfig = None,
+        queue_mode: bool = None,
+        max_open_loggers: int = None
+    ):
         """
         Инициализация менеджера логов.
 
         Args:
             default_config: конфигурация по умолчанию
+            queue_mode: запись логов через очередь в фоновом потоке
+                (None - logging.queue_mode из config.json)
+            max_open_loggers: максимум открытых логгеров
+                (None - logging.max_open_loggers, по умолчанию 64)
         """
         self.default_config = default_config or LoggerConfig()
-        self.loggers = {}
+        if queue_mode is None:
+            queue_mode = bool(get_config_value('logging.queue_mode'))
+        self.queue_mode = queue_mode
+        self.max_open_loggers = max(1, int(
+            max_open_loggers or get_config_value('logging.max_open_loggers') or 64))
+        self.loggers: 'OrderedDict[str, logging.Logger]' = OrderedDict()
+        self._targets = {}
+        self._lock = threading.RLock()
         self._setup_root_logger()
 
     def _setup_root_logger(self):
-        """Настраивает корневой логгер."""
+        """Настраивает корневой логгер (один раз на процесс)."""
+        global _root_logger_configured
+        if _root_logger_configured:
+            return
         logging.basicConfig(
             level=self.default_config.level,
             format=self.default_config.format_string,
             datefmt=self.default_config.date_format
         )
+        _root_logger_configured = True
 
     def create_logger(
         self,
@@ -118,12 +466,35 @@ class LoggerManager:
         Returns:
             logging.Logger: настроенный логгер
         """
-        # Если логгер уже существует, возвращаем его
-        if name in self.loggers:
-            return self.loggers[name]
-
-        # Создаем новый логгер
-        logger = logging.getLogger(name)
+        with self._lock:
+            # Если логгер уже существует с теми же выводами, возвращаем его
+            if name in self.loggers:
+                if self._targets.get(name) == (log_file_path, ui_callback):
+                    self.loggers.move_to_end(name)
+                    return self.loggers[name]
+                self.remove_logger(name)
+
+            logger = self._create_logger(
+                name, log_file_path, ui_callback, config)
+            self.loggers[name] = logger
+            self._targets[name] = (log_file_path, ui_callback)
+
+            # Закрываем давно не использованные логгеры
+            while len(self.loggers) > self.max_open_loggers:
+                self.remove_logger(next(iter(self.loggers)))
+            return logger
+
+    def _create_logger(
+        self,
+        name: str,
+        log_file_path: str,
+        ui_callback: Callable[[str], None],
+        config: LoggerConfig
+    ) -> logging.Logger:
+        """Создает логгер с файловым и UI выводом."""
+        # Логгер вне реестра logging: не накапливается в loggerDict
+        logger = logging.Logger(name)
+        logger.parent = logging.getLogger()
         config = config or self.default_config
 
         # Устанавливаем уровень
@@ -131,23 +502,38 @@ class LoggerManager:
 
         # Очищаем существующие handlers
         logger.handlers.clear()
+        handlers = []
 
         # Добавляем файловый handler если указан путь
         if log_file_path:
             file_handler = FileLogHandler(
                 log_file_path, mode="a", encoding="utf-8")
             file_handler.setFormatter(config.formatter)
-            logger.addHandler(file_handler)
+            handlers.append(file_handler)
 
         # Добавляем UI handler если передан callback
         if ui_callback:
             ui_handler = UILogHandler(ui_callback)
             ui_handler.setFormatter(config.formatter)
-            logger.addHandler(ui_handler)
+            handlers.append(ui_handler)
+
+        if self.queue_mode and handlers:
+            # Консольный вывод корневого логгера тоже уходит в фоновый поток
+            logger.propagate = False
+            logger.addHandler(QueueLogHandler(
+                get_log_listener(), handlers, logging.getLogger().handlers))
+        else:
+            logger.propagate = True
+            for handler in handlers:
+                logger.addHandler(handler)
 
-        self.loggers[name] = logger
         return logger
 
+    def flush(self) -> None:
+        """Дожидается записи логов, поставленных в очередь."""
+        if self.queue_mode:
+            get_log_listener().flush()
+
     def get_logger(self, name: str) -> Optional[logging.Logger]:
         """
         Получает существующий логгер.
@@ -162,7 +548,7 @@ class LoggerManager:
 
     def remove_logger(self, name: str) -> bool:
         """
-        Удаляет логгер.
+        Удаляет логгер, дописывая очередь и закрывая его файл лога.
 
         Args:
             name: имя логгера
@@ -170,18 +556,29 @@ class LoggerManager:
         Returns:
             bool: True если логгер был удален
         """
-        if name in self.loggers:
-            logger = self.loggers.pop(name)
-            # Очищаем handlers
-            logger.handlers.clear()
-            return True
-        return False
+        with self._lock:
+            logger = self.loggers.pop(name, None)
+            self._targets.pop(name, None)
+        if logger is None:
+            return False
+        self._close_handlers(logger)
+        return True
 
     def cleanup_all_loggers(self):
-        """Очищает все логгеры."""
-        for logger in self.loggers.values():
-            logger.handlers.clear()
-        self.loggers.clear()
+        """Закрывает и удаляет все логгеры."""
+        with self._lock:
+            loggers = list(self.loggers.values())
+            self.loggers.clear()
+            self._targets.clear()
+        for logger in loggers:
+            self._close_handlers(logger)
+
+    @staticmethod
+    def _close_handlers(logger: logging.Logger) -> None:
+        """Закрывает handlers логгера (в режиме очереди - после записи очереди)."""
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
 
     def update_logger_config(self, name: str, config: LoggerConfig) -> bool:
         """
@@ -203,6 +600,28 @@ class LoggerManager:
         return False
 
 
+# Менеджер логов текущего процесса (после fork создаётся заново)
+_process_manager: Optional[LoggerManager] = None
+_process_manager_pid: Optional[int] = None
+
+
+def get_logger_manager() -> LoggerManager:
+    """
+    Получает менеджер логов текущего процесса.
+
+    Один менеджер на процесс: пакетные запуски и сессия UI используют
+    общий кэш логгеров с ограничением числа открытых файлов.
+
+    Returns:
+        LoggerManager: менеджер логов
+    """
+    global _process_manager, _process_manager_pid
+    if _process_manager is None or _process_manager_pid != os.getpid():
+        _process_manager = LoggerManager()
+        _process_manager_pid = os.getpid()
+    return _process_manager
+
+
 class LogManager:
     """Упрощенный интерфейс для управления логами."""
 
@@ -212,7 +631,7 @@ class LogManager:
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(LogManager, cls).__new__(cls)
-            cls._manager = LoggerManager()
+            cls._manager = get_logger_manager()
         return cls._instance
 
     @classmethod
@@ -266,9 +685,9 @@ class LogManager:
 
 
 # Фабричные функции для удобства
-def create_logger_manager(config: LoggerConfig = None) -> LoggerManager:
+def create_logger_manager(config: LoggerConfig = None, queue_mode: bool = None) -> LoggerManager:
     """Создает менеджер логов."""
-    return LoggerManager(config)
+    return LoggerManager(config, queue_mode)
 
 
 def create_logger_config(
@@ -0,0 +1,173 @@
+"""
+Модуль манифеста пакетной обработки
+Ответственность: учёт обработанных входных файлов для инкрементальных запусков
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from . import __version__
+from .config_manager import get_config_manager
+
+# Разделы конфигурации, влияющие на содержимое XML
+_CONFIG_SECTIONS = ('csv_processing', 'xml_generation')
+
+
+def hash_file(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Вычисляет SHA-256 содержимого файла.
+
+    Args:
+        file_path: путь к файлу
+        chunk_size: размер читаемого блока
+
+    Returns:
+        str: hex-дайджест
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_config(extra: Dict[str, Any] = None) -> str:
+    """
+    Вычисляет хэш параметров конфигурации, влияющих на результат.
+
+    Args:
+        extra: дополнительные параметры запуска (например, allow_headdep_recursive)
+
+    Returns:
+        str: hex-дайджест
+    """
+    config = get_config_manager().config
+    relevant = {section: config.get(section) for section in _CONFIG_SECTIONS}
+    relevant['run'] = extra or {}
+    data = json.dumps(relevant, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class BatchManifest:
+    """
+    Манифест входных файлов пакетной обработки.
+
+    Для каждого CSV хранит размер, время изменения и хэш содержимого,
+    хэш конфигурации, UID папки, версию программы и параметры выходного
+    XML. Файл считается актуальным, если всё это совпадает; при
+    неизменных размере и mtime хэш не пересчитывается.
+    """
+
+    def __init__(self, manifest_path: str, config_hash: str, folder_uid: str):
+        """
+        Инициализация манифеста.
+
+        Args:
+            manifest_path: путь к JSON файлу манифеста
+            config_hash: хэш текущей конфигурации (см. hash_config)
+            folder_uid: UID папки для ролей
+        """
+        self.manifest_path = manifest_path
+        self.config_hash = config_hash
+        self.folder_uid = folder_uid
+        self.tool_version = __version__
+        self._entries: Dict[str, dict] = self._load()
+        self._changed = False
+
+    def _load(self) -> Dict[str, dict]:
+        """Загружает манифест; повреждённый файл считается пустым."""
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('files', {})
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def is_up_to_date(self, csv_filename: str, csv_file_path: str, xml_file_path: str) -> bool:
+        """
+        Проверяет, соответствует ли XML текущему CSV и конфигурации.
+
+        Args:
+            csv_filename: имя CSV файла (ключ манифеста)
+            csv_file_path: путь к CSV файлу
+            xml_file_path: путь к выходному XML файлу
+
+        Returns:
+            bool: True если файл можно пропустить
+        """
+        entry = self._entries.get(csv_filename)
+        if not entry:
+            return False
+        if (entry.get('config_hash') != self.config_hash
+                or entry.get('folder_uid') != self.folder_uid
+                or entry.get('tool_version') != self.tool_version):
+            return False
+
+        xml_stat = self._stat(xml_file_path)
+        if xml_stat is None or entry.get('xml_size') != xml_stat.st_size \
+                or entry.get('xml_mtime_ns') != xml_stat.st_mtime_ns:
+            return False
+
+        csv_stat = self._stat(csv_file_path)
+        if csv_stat is None:
+            return False
+        if entry.get('size') == csv_stat.st_size and entry.get('mtime_ns') == csv_stat.st_mtime_ns:
+            return True
+
+        # Файл перезаписан - сравниваем содержимое
+        if entry.get('size') != csv_stat.st_size or entry.get('sha256') != hash_file(csv_file_path):
+            return False
+        entry['mtime_ns'] = csv_stat.st_mtime_ns
+        self._changed = True
+        return True
+
+    def record(self, csv_filename: str, csv_file_path: str, xml_file_path: str) -> None:
+        """
+        Записывает успешно обработанный файл.
+
+        Args:
+            csv_filename: имя CSV файла (ключ манифеста)
+            csv_file_path: путь к CSV файлу
+            xml_file_path: путь к выходному XML файлу
+        """
+        csv_stat = self._stat(csv_file_path)
+        xml_stat = self._stat(xml_file_path)
+        if csv_stat is None or xml_stat is None:
+            return
+        self._entries[csv_filename] = {
+            'size': csv_stat.st_size,
+            'mtime_ns': csv_stat.st_mtime_ns,
+            'sha256': hash_file(csv_file_path),
+            'xml_size': xml_stat.st_size,
+            'xml_mtime_ns': xml_stat.st_mtime_ns,
+            'config_hash': self.config_hash,
+            'folder_uid': self.folder_uid,
+            'tool_version': self.tool_version,
+        }
+        self._changed = True
+
+    def forget(self, csv_filename: str) -> None:
+        """Удаляет запись о файле (например, после ошибки обработки)."""
+        if self._entries.pop(csv_filename, None) is not None:
+            self._changed = True
+
+    def save(self) -> None:
+        """Атомарно сохраняет манифест, если он изменился."""
+        if not self._changed:
+            return
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': self._entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+        self._changed = False
+
+    @staticmethod
+    def _stat(path: str) -> Optional[os.stat_result]:
+        """Возвращает stat файла или None, если его нет."""
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
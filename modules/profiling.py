@@ -0,0 +1,176 @@
+"""
+Модуль профилирования обработки
+Ответственность: профиль CPU (cProfile) и снимки памяти (tracemalloc) для файла
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+# cpu - cProfile ([имя].prof и сводка .prof.txt), mem - снимки tracemalloc (.mem.txt)
+PROFILE_MODES = ('cpu', 'mem')
+
+# Строк в сводках: функции по суммарному времени, места выделения памяти
+PROFILE_TOP = 30
+
+# Глубина стека выделений памяти: сводки группируются по строке выделения
+# (lineno), а каждый лишний кадр многократно замедляет обработку под tracemalloc
+_TRACEMALLOC_FRAMES = 1
+
+# Подписи контрольных точек в снимках памяти
+_CHECKPOINT_TITLES = {
+    'scan': 'после чтения CSV',
+    'emit': 'после записи XML',
+}
+
+
+def check_profile_mode(mode: Optional[str]) -> Optional[str]:
+    """
+    Проверяет режим профилирования.
+
+    Args:
+        mode: cpu | mem | None (пустая строка или 'none' - без профилирования)
+
+    Returns:
+        Optional[str]: режим или None
+
+    Raises:
+        ValueError: неизвестный режим
+    """
+    if not mode or mode == 'none':
+        return None
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Неизвестный режим профилирования: {mode} "
+                         f"(допустимые: {', '.join(PROFILE_MODES)})")
+    return mode
+
+
+def get_profile_base(profile_dir: str, csv_file_path: str) -> str:
+    """Путь без расширения для файлов профиля: [папка]/[имя CSV]_[дата]_[время]."""
+    time_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    return str(Path(profile_dir) / f"{Path(csv_file_path).stem}_{time_str}")
+
+
+class FileProfiler:
+    """
+    Профилировщик обработки одного файла.
+
+    cpu: cProfile работает от start() до stop(), результат - [база].prof
+    (для snakeviz, pstats) и сводка [база].prof.txt по суммарному времени.
+    mem: tracemalloc работает от start() до stop(); в контрольных точках
+    (checkpoint: после чтения CSV, после записи XML) в [база].mem.txt
+    пишутся текущий и пиковый объём, top-N мест выделения и прирост с
+    предыдущей точки. Если tracemalloc уже включён снаружи, он не
+    выключается.
+    """
+
+    def __init__(self, mode: str, base_path: str, top: int = PROFILE_TOP):
+        """
+        Инициализация профилировщика.
+
+        Args:
+            mode: cpu или mem
+            base_path: путь без расширения для файлов профиля
+            top: строк в сводках
+        """
+        self.mode = check_profile_mode(mode)
+        self.base_path = base_path
+        self.top = top
+        self.output_files: List[str] = []
+        self._profile: Optional[cProfile.Profile] = None
+        self._started_tracing = False
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._report: Optional[io.StringIO] = None
+
+    def start(self) -> None:
+        """Начинает профилирование."""
+        if self.mode == 'cpu':
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        elif self.mode == 'mem':
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start(_TRACEMALLOC_FRAMES)
+            tracemalloc.reset_peak()
+            self._previous = None
+            self._report = io.StringIO()
+
+    def checkpoint(self, name: str) -> None:
+        """Контрольная точка этапа: снимок памяти в режиме mem."""
+        if self.mode != 'mem' or self._report is None:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        ))
+        write = self._report.write
+        write(f"== {_CHECKPOINT_TITLES.get(name, name)}: текущий объём "
+              f"{current / 2**20:.1f} МБ, пик {peak / 2**20:.1f} МБ ==\n")
+        write(f"-- top {self.top} мест выделения --\n")
+        for statistic in snapshot.statistics('lineno')[:self.top]:
+            write(f"{statistic}\n")
+        if self._previous is not None:
+            write(f"-- top {self.top} изменений с предыдущей точки --\n")
+            for statistic in snapshot.compare_to(self._previous, 'lineno')[:self.top]:
+                write(f"{statistic}\n")
+        write("\n")
+        self._previous = snapshot
+
+    def stop(self) -> List[str]:
+        """
+        Завершает профилирование и сохраняет результаты.
+
+        Returns:
+            List[str]: пути к сохранённым файлам профиля
+        """
+        if self._profile is not None:
+            self._profile.disable()
+            prof_path = f"{self.base_path}.prof"
+            self._profile.dump_stats(prof_path)
+            summary = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=summary)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+            self._write_text(f"{prof_path}.txt", summary.getvalue())
+            self.output_files += [prof_path, f"{prof_path}.txt"]
+            self._profile = None
+        elif self._report is not None:
+            if self._started_tracing:
+                tracemalloc.stop()
+            mem_path = f"{self.base_path}.mem.txt"
+            self._write_text(mem_path, self._report.getvalue())
+            self.output_files.append(mem_path)
+            self._report = self._previous = None
+        return self.output_files
+
+    @staticmethod
+    def _write_text(file_path: str, text: str) -> None:
+        """Записывает текстовую сводку."""
+        os.makedirs(os.path.dirname(os.path.abspath(file_path)), exist_ok=True)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+# Фабричные функции для удобства
+def create_file_profiler(mode: Optional[str], profile_dir: str, csv_file_path: str) -> Optional[FileProfiler]:
+    """
+    Создает профилировщик файла.
+
+    Args:
+        mode: cpu | mem | None
+        profile_dir: папка для файлов профиля
+        csv_file_path: путь к CSV (имя файлов профиля)
+
+    Returns:
+        Optional[FileProfiler]: профилировщик или None, если профилирование выключено
+    """
+    mode = check_profile_mode(mode)
+    if mode is None:
+        return None
+    return FileProfiler(mode, get_profile_base(profile_dir, csv_file_path))
@@ -0,0 +1,198 @@
+"""
+Модуль отчёта о ходе обработки
+Ответственность: счётчики прогресса пакета, скорость и оценка оставшегося времени
+"""
+
+import os
+import time
+from typing import Callable, Iterable, NamedTuple, Optional
+
+# Доли этапов в обработке файла: чтение CSV и генерация ролей
+_SCAN_WEIGHT = 0.5
+_EMIT_WEIGHT = 1.0 - _SCAN_WEIGHT
+
+
+class ProgressEvent(NamedTuple):
+    """Состояние обработки пакета."""
+    file_name: str
+    file_index: int
+    file_count: int
+    stage: str
+    bytes_read: int
+    bytes_total: int
+    rows: int
+    roles: int
+    elapsed: float
+    fraction: float
+    rows_per_sec: float
+    eta: Optional[float]
+
+
+class ProgressReporter:
+    """
+    Счётчики хода обработки с вызовом callback не чаще min_interval.
+
+    Этапы файла: probe, scan (чтение CSV, байты), hierarchy (построение
+    иерархии), datagroups (запись DataGroup), roles (генерация ролей,
+    строки), difference (разностная модель, если включена), done. Доля готовности пакета считается по размерам файлов,
+    внутри файла - поровну между чтением и генерацией. Скорость - строки
+    CSV в секунду, ETA - по доле готовности.
+    """
+
+    def __init__(self, callback: Callable[[ProgressEvent], None], min_interval: float = 0.25):
+        """
+        Инициализация отчёта.
+
+        Args:
+            callback: получатель событий ProgressEvent
+            min_interval: минимальный интервал между событиями, секунд
+                (смена файла и завершение сообщаются всегда)
+        """
+        self.callback = callback
+        self.min_interval = min_interval
+        self._started = time.monotonic()
+        self._last_emit = 0.0
+        self.file_count = 0
+        self.bytes_total = 0
+        self._bytes_done = 0
+        self._rows_done = 0
+        self._roles_done = 0
+        self._file_index = 0
+        self._file_name = ''
+        self._file_size = 0
+        self._stage = ''
+        self._file_bytes = 0
+        self._file_rows = 0
+        self._file_rows_total = 0
+        self._file_roles = 0
+
+    def begin_batch(self, file_paths: Iterable[str]) -> None:
+        """Начало пакета: число файлов и их общий размер."""
+        file_paths = list(file_paths)
+        self._started = time.monotonic()
+        self.file_count = len(file_paths)
+        self.bytes_total = sum(_file_size(x) for x in file_paths)
+
+    def begin_file(self, file_path: str) -> None:
+        """Начало обработки файла."""
+        if self.file_count == 0:
+            # Отдельный файл вне пакета
+            self.begin_batch([file_path])
+        self._file_index += 1
+        self._file_name = os.path.basename(file_path)
+        self._file_size = _file_size(file_path)
+        self._file_bytes = self._file_rows = self._file_rows_total = self._file_roles = 0
+        self._stage = 'probe'
+        self._emit(force=True)
+
+    def stage(self, name: str) -> None:
+        """Смена этапа обработки файла."""
+        self._stage = name
+        if name in ('datagroups', 'roles'):
+            self._file_rows_total = self._file_rows
+        self._emit(force=True)
+
+    def rows_read(self, rows: int, bytes_read: int) -> None:
+        """Прочитано rows строк CSV, bytes_read байт файла."""
+        self._file_rows = rows
+        self._file_bytes = min(bytes_read, self._file_size)
+        self._emit()
+
+    def roles_emitted(self, roles: int) -> None:
+        """Сформировано roles ролей текущего файла."""
+        self._file_roles = roles
+        self._emit()
+
+    def end_file(self, success: bool = True) -> None:
+        """Завершение обработки файла (успешно или нет)."""
+        self._bytes_done += self._file_size
+        self._rows_done += self._file_rows
+        self._roles_done += self._file_roles
+        self._file_size = self._file_bytes = 0
+        self._file_rows = self._file_rows_total = self._file_roles = 0
+        self._stage = 'done' if success else 'failed'
+        self._emit(force=True)
+
+    def skip_file(self, file_path: str) -> None:
+        """Файл пропущен (например, XML актуален по манифесту)."""
+        self.begin_file(file_path)
+        self.end_file()
+
+    def snapshot(self) -> ProgressEvent:
+        """Возвращает текущее состояние."""
+        elapsed = time.monotonic() - self._started
+        if self._file_rows_total:
+            emit_fraction = min(1.0, self._file_roles / self._file_rows_total)
+        else:
+            emit_fraction = 0.0
+        scan_fraction = self._file_bytes / self._file_size if self._file_size else 0.0
+        if self._stage in ('datagroups', 'roles'):
+            scan_fraction = 1.0
+        current = self._file_size * (_SCAN_WEIGHT * scan_fraction + _EMIT_WEIGHT * emit_fraction)
+
+        if self.bytes_total:
+            fraction = min(1.0, (self._bytes_done + current) / self.bytes_total)
+        else:
+            fraction = self._file_index / self.file_count if self.file_count else 0.0
+
+        rows = self._rows_done + self._file_rows
+        eta = elapsed * (1.0 - fraction) / fraction if fraction > 0 else None
+        return ProgressEvent(
+            file_name=self._file_name,
+            file_index=self._file_index,
+            file_count=self.file_count,
+            stage=self._stage,
+            bytes_read=self._bytes_done + self._file_bytes,
+            bytes_total=self.bytes_total,
+            rows=rows,
+            roles=self._roles_done + self._file_roles,
+            elapsed=elapsed,
+            fraction=fraction,
+            rows_per_sec=rows / elapsed if elapsed > 0 else 0.0,
+            eta=eta,
+        )
+
+    def _emit(self, force: bool = False) -> None:
+        """Передаёт состояние в callback с ограничением частоты."""
+        now = time.monotonic()
+        if not force and now - self._last_emit < self.min_interval:
+            return
+        self._last_emit = now
+        self.callback(self.snapshot())
+
+
+def _file_size(file_path: str) -> int:
+    """Размер файла или 0, если его нет."""
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
+
+
+def format_progress(event: ProgressEvent) -> str:
+    """
+    Формирует компактную строку прогресса для консоли.
+
+    Args:
+        event: состояние обработки
+
+    Returns:
+        str: например '[2/5] 43% b.csv roles 12034 стр/с ETA 0:41'
+    """
+    if event.eta is None:
+        eta = '--:--'
+    else:
+        minutes, seconds = divmod(int(event.eta), 60)
+        eta = f'{minutes}:{seconds:02d}'
+    return (f"[{event.file_index}/{event.file_count}] {event.fraction * 100:3.0f}% "
+            f"{event.file_name} {event.stage} "
+            f"{event.rows_per_sec:.0f} стр/с ETA {eta}")
+
+
+# Фабричные функции для удобства
+def create_progress_reporter(
+    callback: Callable[[ProgressEvent], None],
+    min_interval: float = 0.25
+) -> ProgressReporter:
+    """Создает отчёт о ходе обработки."""
+    return ProgressReporter(callback, min_interval)
@@ -0,0 +1,192 @@
+"""
+Модуль отчёта о запуске
+Ответственность: время этапов и счётчики обработки файлов, JSON-отчёт пакета
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from . import __version__
+
+# Этапы обработки файла в порядке выполнения
+STAGE_NAMES = ('probe', 'scan', 'hierarchy', 'datagroups', 'roles', 'difference')
+
+# Счётчики файла, суммируемые в итогах пакета
+COUNTER_NAMES = ('rows_read', 'rows_rejected', 'datagroups', 'roles',
+                 'data_item_links', 'bytes_read', 'bytes_written')
+
+# Итог файла: ok, failed, timeout (превышен лимит времени), cancelled
+# (прерван отменой), skipped (не начат из-за отмены), up_to_date (XML актуален)
+FILE_STATUSES = ('pending', 'ok', 'failed', 'timeout', 'cancelled', 'skipped', 'up_to_date')
+
+
+class FileRunStats:
+    """
+    Время этапов и счётчики обработки одного файла.
+
+    Этапы переключаются вызовом stage(): время текущего этапа копится по
+    time.perf_counter (монотонный таймер) до следующего stage() или finish().
+    Объект передаётся из рабочего процесса пула в родительский через pickle.
+    """
+
+    def __init__(self, file_name: str):
+        """
+        Инициализация счётчиков файла.
+
+        Args:
+            file_name: имя CSV файла
+        """
+        self.file_name = file_name
+        self.status = 'pending'
+        self.elapsed = 0.0
+        self.stages: Dict[str, float] = {}
+        self.rows_read = 0
+        self.rows_rejected = 0
+        self.datagroups = 0
+        self.roles = 0
+        self.data_item_links = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._started: Optional[float] = None
+        self._stage: Optional[str] = None
+        self._stage_started = 0.0
+
+    def start(self, csv_file_path: str = None) -> None:
+        """Начало обработки файла (размер CSV - в bytes_read)."""
+        self._started = self._stage_started = time.perf_counter()
+        self._stage = None
+        if csv_file_path:
+            try:
+                self.bytes_read = os.path.getsize(csv_file_path)
+            except OSError:
+                pass
+
+    def stage(self, name: Optional[str]) -> None:
+        """Завершает текущий этап и начинает этап name (None - без этапа)."""
+        now = time.perf_counter()
+        if self._stage is not None:
+            self.stages[self._stage] = self.stages.get(self._stage, 0.0) + now - self._stage_started
+        self._stage, self._stage_started = name, now
+
+    def finish(self, status: str) -> None:
+        """Завершает обработку файла с итогом status (FILE_STATUSES)."""
+        self.stage(None)
+        if self._started is not None:
+            self.elapsed = time.perf_counter() - self._started
+            self._started = None
+        self.status = status
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Словарь для JSON-отчёта."""
+        result = {
+            'file': self.file_name,
+            'status': self.status,
+            'elapsed': round(self.elapsed, 4),
+            'stages': {x: round(self.stages[x], 4) for x in STAGE_NAMES if x in self.stages},
+        }
+        for name in COUNTER_NAMES:
+            result[name] = getattr(self, name)
+        result['rows_per_sec'] = round(self.rows_read / self.elapsed, 1) if self.elapsed else 0.0
+        return result
+
+
+class RunReport:
+    """
+    Отчёт о запуске пакета: параметры, итоги и статистика каждого файла.
+
+    Файлы хранятся в порядке списка пакета; итоги (totals) суммируют
+    счётчики и время этапов. Скорость пакета - прочитанные строки CSV
+    в секунду общего времени (при параллельной обработке время этапов
+    файлов в сумме больше общего).
+    """
+
+    def __init__(self, csv_dir: str, folder_uid: str, settings: Dict[str, Any] = None):
+        """
+        Инициализация отчёта.
+
+        Args:
+            csv_dir: директория с CSV файлами
+            folder_uid: UID папки для ролей
+            settings: параметры запуска (процессы, сжатие и т.п.)
+        """
+        self.csv_dir = csv_dir
+        self.folder_uid = folder_uid
+        self.settings = dict(settings or {})
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.elapsed = 0.0
+        self.files: List[FileRunStats] = []
+        self.path: Optional[str] = None
+        self._started = time.perf_counter()
+
+    def add_files(self, stats: Iterable[FileRunStats]) -> None:
+        """Добавляет статистику файлов в порядке пакета."""
+        self.files.extend(stats)
+
+    def finish(self) -> None:
+        """Фиксирует общее время пакета."""
+        self.elapsed = time.perf_counter() - self._started
+
+    def totals(self) -> Dict[str, Any]:
+        """
+        Итоги пакета.
+
+        Returns:
+            Dict[str, Any]: число файлов по итогам, суммы счётчиков и этапов,
+            строки и байты CSV в секунду
+        """
+        statuses: Dict[str, int] = {}
+        stages: Dict[str, float] = {}
+        result: Dict[str, Any] = {'files': len(self.files)}
+        for name in COUNTER_NAMES:
+            result[name] = 0
+        for stats in self.files:
+            statuses[stats.status] = statuses.get(stats.status, 0) + 1
+            for name in COUNTER_NAMES:
+                result[name] += getattr(stats, name)
+            for name, seconds in stats.stages.items():
+                stages[name] = stages.get(name, 0.0) + seconds
+        result['statuses'] = statuses
+        result['stages'] = {x: round(stages[x], 4) for x in STAGE_NAMES if x in stages}
+        processed_bytes = sum(x.bytes_read for x in self.files if x.status != 'up_to_date')
+        result['rows_per_sec'] = round(result['rows_read'] / self.elapsed, 1) if self.elapsed else 0.0
+        result['bytes_per_sec'] = round(processed_bytes / self.elapsed, 1) if self.elapsed else 0.0
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Словарь для JSON-отчёта."""
+        return {
+            'version': __version__,
+            'started_at': self.started_at,
+            'elapsed': round(self.elapsed, 4),
+            'csv_dir': self.csv_dir,
+            'folder_uid': self.folder_uid,
+            'settings': self.settings,
+            'totals': self.totals(),
+            'files': [x.to_dict() for x in self.files],
+        }
+
+    def save(self, report_path: str) -> str:
+        """
+        Атомарно записывает отчёт в JSON.
+
+        Args:
+            report_path: путь к файлу отчёта
+
+        Returns:
+            str: путь к файлу отчёта
+        """
+        tmp_path = f"{report_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, report_path)
+        self.path = report_path
+        return report_path
+
+
+# Фабричные функции для удобства
+def create_run_report(csv_dir: str, folder_uid: str, settings: Dict[str, Any] = None) -> RunReport:
+    """Создает отчёт о запуске пакета."""
+    return RunReport(csv_dir, folder_uid, settings)
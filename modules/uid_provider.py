@@ -0,0 +1,209 @@
+"""
+Модуль генерации UID элементов модели
+Ответственность: случайные, пакетные, детерминированные и сохраняемые UID
+"""
+
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import Dict
+
+from .config_manager import get_config_value
+
+
+def gen_uid() -> str:
+    """Генерирует уникальный идентификатор."""
+    return str(uuid.uuid4())
+
+
+class UIDProvider(ABC):
+    """
+    Базовый поставщик UID.
+
+    kind - тип элемента (FullModel, DataGroup, ObjectReference, Role,
+    Privilege), key - его естественный ключ (например, dep_uid).
+    Случайные поставщики ключ игнорируют.
+    """
+
+    @abstractmethod
+    def uid(self, kind: str, key: str = '') -> str:
+        """
+        Возвращает UID элемента.
+
+        Args:
+            kind: тип элемента
+            key: естественный ключ элемента
+
+        Returns:
+            str: UID в формате 8-4-4-4-12
+        """
+
+    def close(self) -> None:
+        """Завершает работу поставщика (сохраняет состояние, если нужно)."""
+
+
+class RandomUIDProvider(UIDProvider):
+    """UUIDv4 на каждый вызов (поведение по умолчанию)."""
+
+    def uid(self, kind: str, key: str = '') -> str:
+        return str(uuid.uuid4())
+
+
+class BatchedRandomUIDProvider(UIDProvider):
+    """
+    UUIDv4 из одного блока os.urandom на batch_size идентификаторов.
+
+    Биты версии и варианта выставляются так же, как в uuid.uuid4().
+    """
+
+    def __init__(self, batch_size: int = 4096):
+        """
+        Инициализация поставщика.
+
+        Args:
+            batch_size: число UID, получаемых из одного вызова os.urandom
+        """
+        self.batch_size = batch_size
+        self._pool = []
+
+    def _refill(self) -> None:
+        """Заполняет запас UID одним чтением os.urandom."""
+        block = os.urandom(16 * self.batch_size)
+        pool = [str(uuid.UUID(bytes=block[offset:offset + 16], version=4))
+                for offset in range(0, len(block), 16)]
+        pool.reverse()
+        self._pool = pool
+
+    def uid(self, kind: str, key: str = '') -> str:
+        if not self._pool:
+            self._refill()
+        return self._pool.pop()
+
+
+class DeterministicUIDProvider(UIDProvider):
+    """
+    UUIDv5 от (scope, kind, key): одинаковые входные данные дают одинаковые UID.
+
+    scope - обычно UID папки ролей. Повторные запросы того же (kind, key)
+    (например, дубли dep_uid в CSV) получают порядковый суффикс, поэтому
+    UID в документе не повторяются.
+    """
+
+    # Базовое пространство имён для UIDv5 модели доступа
+    BASE_NAMESPACE = uuid.UUID('6f1b4a52-3d0e-5c1a-9b7e-2f6a0d4c8e11')
+
+    def __init__(self, scope: str = '', namespace: str = None):
+        """
+        Инициализация поставщика.
+
+        Args:
+            scope: область уникальности (например, folder_uid)
+            namespace: базовый UUID пространства имён (по умолчанию BASE_NAMESPACE)
+        """
+        base = uuid.UUID(namespace) if namespace else self.BASE_NAMESPACE
+        self._namespace = uuid.uuid5(base, scope)
+        self._occurrences: Dict[str, int] = {}
+
+    def name_for(self, kind: str, key: str = '') -> str:
+        """Возвращает уникальное в пределах поставщика имя элемента."""
+        name = f'{kind}|{key}'
+        count = self._occurrences.get(name, 0)
+        self._occurrences[name] = count + 1
+        return f'{name}|{count}' if count else name
+
+    def uid(self, kind: str, key: str = '') -> str:
+        return str(uuid.uuid5(self._namespace, self.name_for(kind, key)))
+
+
+class PersistentUIDProvider(DeterministicUIDProvider):
+    """
+    Случайные UID, сохраняемые в JSON файле по имени элемента.
+
+    При повторном запуске элементы с тем же (scope, kind, key) получают
+    ранее выданные UID; новые элементы - случайные.
+    """
+
+    def __init__(self, mapping_file: str, scope: str = ''):
+        """
+        Инициализация поставщика.
+
+        Args:
+            mapping_file: путь к JSON файлу соответствий
+            scope: область уникальности (например, folder_uid)
+        """
+        super().__init__(scope)
+        self.mapping_file = mapping_file
+        self._scope = scope
+        self._random = BatchedRandomUIDProvider()
+        self._mapping: Dict[str, str] = {}
+        self._changed = False
+        if os.path.exists(mapping_file):
+            try:
+                with open(mapping_file, 'r', encoding='utf-8') as f:
+                    self._mapping = json.load(f).get(scope, {})
+            except (OSError, ValueError):
+                self._mapping = {}
+
+    def uid(self, kind: str, key: str = '') -> str:
+        name = self.name_for(kind, key)
+        value = self._mapping.get(name)
+        if value is None:
+            value = self._mapping[name] = self._random.uid(kind, key)
+            self._changed = True
+        return value
+
+    def close(self) -> None:
+        """Сохраняет новые соответствия в файл."""
+        if not self._changed:
+            return
+        data = {}
+        if os.path.exists(self.mapping_file):
+            try:
+                with open(self.mapping_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+        data[self._scope] = self._mapping
+        tmp_path = f"{self.mapping_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.mapping_file)
+        self._changed = False
+
+
+UID_MODES = ('random', 'batched', 'deterministic', 'persistent')
+
+
+def create_uid_provider(
+    mode: str = None,
+    scope: str = '',
+    mapping_file: str = None
+) -> UIDProvider:
+    """
+    Создает поставщика UID.
+
+    Args:
+        mode: random | batched | deterministic | persistent
+            (None - xml_generation.uid_mode из config.json, по умолчанию random)
+        scope: область уникальности для deterministic/persistent (folder_uid)
+        mapping_file: файл соответствий для режима persistent
+
+    Returns:
+        UIDProvider: поставщик UID
+    """
+    mode = mode or get_config_value('xml_generation.uid_mode') or 'random'
+    namespace = get_config_value('xml_generation.uid_namespace')
+
+    if mode == 'random':
+        return RandomUIDProvider()
+    if mode == 'batched':
+        return BatchedRandomUIDProvider()
+    if mode == 'deterministic':
+        return DeterministicUIDProvider(scope, namespace)
+    if mode == 'persistent':
+        if not mapping_file:
+            raise ValueError("Для режима UID 'persistent' нужен файл соответствий")
+        return PersistentUIDProvider(mapping_file, scope)
+    raise ValueError(
+        f"Неизвестный режим UID: {mode} (допустимые: {', '.join(UID_MODES)})")
@@ -0,0 +1,241 @@
+"""
+Модуль отслеживания папки с CSV
+Ответственность: обнаружение новых и изменённых CSV, ожидание окончания записи
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .cancellation import CancellationToken
+from .file_manager import FileManager
+
+# auto - watchdog (inotify, ReadDirectoryChangesW), если пакет установлен,
+# иначе опрос; watchdog - только события; poll - периодический опрос папки
+WATCH_BACKENDS = ('auto', 'watchdog', 'poll')
+
+# Период полной проверки папки при работе по событиям: страховка от
+# потерянных событий (сетевые папки, переполнение очереди inotify)
+_RESCAN_INTERVAL = 60.0
+
+# Период проверки токена отмены во время ожидания, секунд
+_CANCEL_CHECK_INTERVAL = 0.25
+
+
+def _import_watchdog():
+    """Импортирует необязательный пакет watchdog."""
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        raise ValueError(
+            "Для отслеживания по событиям нужен пакет watchdog (pip install watchdog)") from None
+    return Observer, FileSystemEventHandler
+
+
+def check_watch_backend(backend: Optional[str]) -> str:
+    """
+    Проверяет способ отслеживания и выбирает доступный.
+
+    Args:
+        backend: auto | watchdog | poll (None или пустая строка - auto)
+
+    Returns:
+        str: watchdog или poll
+
+    Raises:
+        ValueError: неизвестный способ или не установлен watchdog
+    """
+    backend = backend or 'auto'
+    if backend not in WATCH_BACKENDS:
+        raise ValueError(f"Неизвестный способ отслеживания: {backend} "
+                         f"(допустимые: {', '.join(WATCH_BACKENDS)})")
+    if backend == 'poll':
+        return backend
+    try:
+        _import_watchdog()
+    except ValueError:
+        if backend == 'watchdog':
+            raise
+        return 'poll'
+    return 'watchdog'
+
+
+class FolderWatcher:
+    """
+    Отслеживание CSV в папке FileManager.
+
+    Файл считается готовым к обработке, когда его размер и время изменения
+    не менялись settle_time секунд и его удаётся открыть на чтение - так
+    пропускаются файлы, которые ещё копируются или выгружаются. Готовый
+    файл выдаётся poll() один раз; повторно - только после нового
+    изменения. При первом вызове poll() готовыми считаются все CSV папки
+    (актуальные отсеивает манифест пакетной обработки).
+
+    Со способом watchdog события файловой системы будят wait() сразу, а
+    папка проверяется тем же сравнением размера и времени изменения;
+    с poll папка опрашивается каждые poll_interval секунд.
+    """
+
+    def __init__(
+        self,
+        file_manager: FileManager,
+        settle_time: float = 2.0,
+        poll_interval: float = 1.0,
+        backend: str = 'auto'
+    ):
+        """
+        Инициализация отслеживания.
+
+        Args:
+            file_manager: менеджер файлов папки с CSV
+            settle_time: сколько секунд файл не должен меняться до обработки
+            poll_interval: период опроса папки, секунд
+            backend: auto | watchdog | poll
+
+        Raises:
+            ValueError: неизвестный способ или не установлен watchdog
+        """
+        self.file_manager = file_manager
+        self.settle_time = max(0.0, float(settle_time))
+        self.poll_interval = max(0.05, float(poll_interval))
+        self.backend = check_watch_backend(backend)
+        # Имя CSV -> (размер, mtime_ns) выданной на обработку версии
+        self._dispatched: Dict[str, Tuple[int, int]] = {}
+        # Имя CSV -> ((размер, mtime_ns), время последнего изменения по monotonic)
+        self._pending: Dict[str, Tuple[Tuple[int, int], float]] = {}
+        self._wakeup = threading.Event()
+        self._observer = None
+
+    def start(self) -> None:
+        """Запускает наблюдение за папкой (для watchdog - поток событий)."""
+        if self.backend != 'watchdog' or self._observer is not None:
+            return
+        Observer, FileSystemEventHandler = _import_watchdog()
+        # watchdog пишет каждое событие inotify в DEBUG корневого логгера
+        logging.getLogger('watchdog').setLevel(logging.WARNING)
+        wakeup = self._wakeup
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = (getattr(event, 'src_path', ''), getattr(event, 'dest_path', ''))
+                if any(str(x).lower().endswith('.csv') for x in paths):
+                    wakeup.set()
+
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), str(self.file_manager.base_directory), recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+
+    def stop(self) -> None:
+        """Останавливает наблюдение и будит wait()."""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        self._wakeup.set()
+
+    def wait(self, timeout: float = None, cancel: CancellationToken = None) -> None:
+        """
+        Ждёт изменений в папке или следующего опроса.
+
+        Args:
+            timeout: наибольшее время ожидания, секунд (None - по способу
+                отслеживания и ожидающим файлам)
+            cancel: токен отмены; ожидание прерывается сразу после отмены
+        """
+        if timeout is None:
+            timeout = self.next_timeout()
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if cancel is not None:
+                remaining = min(remaining, _CANCEL_CHECK_INTERVAL)
+            if self._wakeup.wait(remaining) or (cancel is not None and cancel.cancelled):
+                break
+        self._wakeup.clear()
+
+    def next_timeout(self) -> float:
+        """Время до следующей проверки папки, секунд."""
+        if self.backend == 'poll':
+            return self.poll_interval
+        if not self._pending:
+            return _RESCAN_INTERVAL
+        now = time.monotonic()
+        remaining = min(changed + self.settle_time - now for _, changed in self._pending.values())
+        return min(self.poll_interval, max(0.05, remaining))
+
+    def poll(self) -> List[str]:
+        """
+        Проверяет папку.
+
+        Returns:
+            List[str]: имена CSV, готовых к обработке (новые и изменённые,
+            запись которых закончилась), по алфавиту
+        """
+        now = time.monotonic()
+        present = {}
+        for csv_filename in self.file_manager.get_csv_files():
+            signature = self._stat(csv_filename)
+            if signature is not None:
+                present[csv_filename] = signature
+
+        ready = []
+        for csv_filename, signature in present.items():
+            if self._dispatched.get(csv_filename) == signature:
+                self._pending.pop(csv_filename, None)
+                continue
+            pending = self._pending.get(csv_filename)
+            if pending is None or pending[0] != signature:
+                # Новый или снова изменившийся файл: отсчёт settle_time заново
+                self._pending[csv_filename] = (signature, now)
+                pending = self._pending[csv_filename]
+            if now - pending[1] >= self.settle_time and self._is_readable(csv_filename):
+                del self._pending[csv_filename]
+                self._dispatched[csv_filename] = signature
+                ready.append(csv_filename)
+
+        # Удалённые файлы при появлении снова обрабатываются как новые
+        for csv_filename in list(self._dispatched):
+            if csv_filename not in present:
+                del self._dispatched[csv_filename]
+        for csv_filename in list(self._pending):
+            if csv_filename not in present:
+                del self._pending[csv_filename]
+        return sorted(ready)
+
+    @property
+    def pending(self) -> List[str]:
+        """CSV, которые изменились, но ещё записываются (ждут settle_time)."""
+        return sorted(self._pending)
+
+    def _stat(self, csv_filename: str) -> Optional[Tuple[int, int]]:
+        """Размер и время изменения файла (None, если файл исчез)."""
+        try:
+            stat = os.stat(self.file_manager.base_directory / csv_filename)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _is_readable(self, csv_filename: str) -> bool:
+        """Файл открывается на чтение (в Windows занятый записью файл - нет)."""
+        try:
+            with open(self.file_manager.base_directory / csv_filename, 'rb'):
+                return True
+        except OSError:
+            return False
+
+
+# Фабричные функции для удобства
+def create_folder_watcher(
+    file_manager: FileManager,
+    settle_time: float = 2.0,
+    poll_interval: float = 1.0,
+    backend: str = 'auto'
+) -> FolderWatcher:
+    """Создает отслеживание папки с CSV."""
+    return FolderWatcher(file_manager, settle_time, poll_interval, backend)
@@ -3,49 +3,246 @@
 Масштабируемый для любого проекта
 """
 
-import uuid
+import io
+import re
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import islice
 import lxml.etree as etree
 from lxml.etree import xmlfile
-from typing import Dict, List, Callable, Tuple
+from typing import Dict, List, Callable, Tuple, Iterable, Any
 from .config_manager import get_config_value
+from .uid_provider import UIDProvider, RandomUIDProvider, create_uid_provider, gen_uid
+from .difference_model import DIFFERENCE_NAMESPACE, ModelDifference, ModelObject
+from .compression import open_output, compression_from_path
 
 
-def gen_uid() -> str:
-    """Генерирует уникальный идентификатор."""
-    return str(uuid.uuid4())
+# Символы, которые lxml не допускает в XML 1.0
+_XML_INVALID_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+_TEXT_SPECIAL_CHARS = re.compile('[&<>\r]')
+_ATTR_SPECIAL_CHARS = re.compile('[&<>"\n\r\t]')
+_TEXT_ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '\r': '&#13;'}
+_ATTR_ESCAPES = {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;',
+                 '\n': '&#10;', '\r': '&#13;', '\t': '&#9;'}
+
+
+def _check_xml_chars(value: str) -> None:
+    """Проверяет строку так же, как lxml при записи."""
+    if _XML_INVALID_CHARS.search(value):
+        raise ValueError(
+            "All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters")
+
+
+def escape_xml_text(value) -> str:
+    """Экранирует текстовое содержимое элемента так же, как lxml."""
+    value = value if isinstance(value, str) else str(value)
+    _check_xml_chars(value)
+    if _TEXT_SPECIAL_CHARS.search(value) is None:
+        return value
+    return _TEXT_SPECIAL_CHARS.sub(lambda m: _TEXT_ESCAPES[m.group()], value)
+
+
+def escape_xml_attr(value) -> str:
+    """Экранирует значение атрибута так же, как lxml."""
+    value = value if isinstance(value, str) else str(value)
+    _check_xml_chars(value)
+    if _ATTR_SPECIAL_CHARS.search(value) is None:
+        return value
+    return _ATTR_SPECIAL_CHARS.sub(lambda m: _ATTR_ESCAPES[m.group()], value)
 
 
 class XMLGenerator:
     """Генератор XML файлов с настраиваемыми параметрами."""
 
-    def __init__(self, namespaces: Dict[str, str] = None):
+    # Методы, пишущие готовые байты в write(bytes) вместо xmlfile
+    raw_writer_methods = frozenset()
+
+    def __init__(self, namespaces: Dict[str, str] = None, uid_provider: UIDProvider = None):
         """
         Инициализация генератора XML.
+
+        Args:
+            namespaces: не используется, namespaces берутся из config.json
+            uid_provider: поставщик UID для элементов без явно переданного UID
+                (по умолчанию - по xml_generation.uid_mode)
         """
+        self.uid_provider = uid_provider or create_uid_provider()
         # Загружаем namespaces из config.json
         self.namespaces = get_config_value('xml_generation.namespaces') or {}
         self.default_model_version = get_config_value(
             'csv_processing.model_version') or "1.0.0"
         self.default_model_name = get_config_value(
             'csv_processing.model_name') or "GeneratedModel"
+        self.compression_level = get_config_value('xml_generation.compression_level')
+
+    def _open_output(self, output_file: str, compression: str = None):
+        """
+        Открывает выходной файл через компрессор (см. compression.open_output).
+
+        Args:
+            output_file: путь к выходному файлу
+            compression: gzip | zstd | None (None - по суффиксу output_file)
+        """
+        return open_output(output_file, compression, self.compression_level)
+
+    @contextmanager
+    def _xmlfile(self, output_file: str, encoding: str, compression: str = None):
+        """xmlfile для записи документа; со сжатием - через _open_output."""
+        compression = compression or compression_from_path(output_file)
+        if compression is None:
+            with xmlfile(output_file, encoding=encoding) as xf:
+                yield xf
+            return
+        with self._open_output(output_file, compression) as output, \
+                xmlfile(output, encoding=encoding) as xf:
+            yield xf
 
     def generate_xml(
         self,
         output_file: str,
         content_generator: Callable,
-        encoding: str = 'utf-8'
+        encoding: str = 'utf-8',
+        compression: str = None
     ) -> None:
         """
         Генерирует XML файл используя переданный генератор контента.
+
+        compression (gzip | zstd) - потоковое сжатие при записи; None -
+        по суффиксу output_file (.gz, .zst), без суффикса - без сжатия.
         """
-        with xmlfile(output_file, encoding=encoding) as xf:
+        with self._xmlfile(output_file, encoding, compression) as xf:
             # Добавляем XML декларацию
             xf.write_declaration()
 
             with xf.element('{%s}RDF' % self.namespaces['rdf'], nsmap=self.namespaces):
                 content_generator(xf)
 
+    def generate_xml_raw(
+        self,
+        output_file: str,
+        head_generator: Callable,
+        body_writer: Callable[[Callable[[bytes], Any]], None],
+        encoding: str = 'utf-8',
+        compression: str = None
+    ) -> None:
+        """
+        Генерирует XML файл, где тело пишется готовыми байтами.
+
+        Начало документа формирует head_generator через xmlfile, тело -
+        body_writer, которому передаётся функция записи байтов (для
+        шаблонных методов write_*). Результат совпадает с generate_xml.
+
+        Args:
+            output_file: путь к выходному файлу
+            head_generator: генератор начала документа (например, FullModel)
+            body_writer: функция, получающая write(bytes)
+            encoding: кодировка документа
+            compression: gzip | zstd | None (None - по суффиксу output_file)
+        """
+        head, tail = self._render_document_frame(head_generator, encoding)
+        with self._open_output(output_file, compression) as output:
+            output.write(head)
+            body_writer(output.write)
+            output.write(tail)
+
+    def generate_xml_parallel(
+        self,
+        output_file: str,
+        head_generator: Callable,
+        sections: Iterable[Tuple[str, Iterable[tuple]]],
+        max_workers: int,
+        chunk_size: int = 2000,
+        encoding: str = 'utf-8',
+        compression: str = None
+    ) -> None:
+        """
+        Генерирует XML файл, сериализуя секции фрагментами в пуле процессов.
+
+        Заголовок документа (декларация, открывающий rdf:RDF и всё, что
+        пишет head_generator) формируется в текущем процессе. Записи секций
+        разбиваются на блоки по chunk_size; каждый блок рабочий процесс
+        сериализует вызовом метода генератора для каждой записи. Готовые
+        фрагменты склеиваются в исходном порядке, поэтому документ
+        совпадает с результатом generate_xml с точностью до UID.
+
+        Args:
+            output_file: путь к выходному файлу
+            head_generator: генератор начала документа (например, FullModel)
+            sections: пары (имя метода генератора, записи - кортежи аргументов
+                метода без xf); итерируются строго по порядку
+            max_workers: число рабочих процессов
+            chunk_size: число записей в одном фрагменте
+            encoding: кодировка документа
+            compression: gzip | zstd | None (None - по суффиксу output_file);
+                сжатие выполняется в текущем процессе при записи фрагментов
+        """
+        head, tail = self._render_document_frame(head_generator, encoding)
+
+        with self._open_output(output_file, compression) as output, \
+                ProcessPoolExecutor(max_workers=max_workers) as executor:
+            output.write(head)
+
+            # Ограничиваем число блоков в работе, чтобы не держать в памяти весь документ
+            pending = deque()
+            for method_name, records in sections:
+                records = iter(records)
+                while True:
+                    chunk = list(islice(records, chunk_size))
+                    if not chunk:
+                        break
+                    pending.append(executor.submit(
+                        _render_fragment, type(self), method_name, chunk, encoding))
+                    if len(pending) >= max_workers * 2:
+                        output.write(pending.popleft().result())
+
+            while pending:
+                output.write(pending.popleft().result())
+
+            output.write(tail)
+
+    def _render_document_frame(self, head_generator: Callable, encoding: str) -> Tuple[bytes, bytes]:
+        """Возвращает начало документа (с содержимым head_generator) и закрывающий тег."""
+        buffer = io.BytesIO()
+        with xmlfile(buffer, encoding=encoding) as xf:
+            xf.write_declaration()
+            with xf.element('{%s}RDF' % self.namespaces['rdf'], nsmap=self.namespaces):
+                head_generator(xf)
+        document = buffer.getvalue()
+        split_at = document.rindex(b'</')
+        return document[:split_at], document[split_at:]
+
+    def render_fragment(self, method_name: str, records: List[tuple], encoding: str = 'utf-8') -> bytes:
+        """
+        Сериализует записи во фрагмент содержимого rdf:RDF.
+
+        Элементы пишутся внутри временного корня с теми же namespaces,
+        поэтому префиксы совпадают с потоковой генерацией; сам корень
+        в результат не попадает.
+
+        Args:
+            method_name: имя метода генератора (например, 'add_data_group')
+            records: кортежи аргументов метода без xf
+            encoding: кодировка документа
+
+        Returns:
+            bytes: сериализованный фрагмент
+        """
+        buffer = io.BytesIO()
+        method = getattr(self, method_name)
+        if method_name in self.raw_writer_methods:
+            for record in records:
+                method(buffer.write, *record)
+            return buffer.getvalue()
+
+        with xmlfile(buffer, encoding=encoding) as xf:
+            with xf.element('{%s}RDF' % self.namespaces['rdf'], nsmap=self.namespaces):
+                for record in records:
+                    method(xf, *record)
+        fragment = buffer.getvalue()
+        return fragment[fragment.index(b'>') + 1:fragment.rindex(b'</')]
+
     def _add_newline(self, xf: xmlfile) -> None:
         """Добавляет перенос строки."""
         xf.write('\n')
@@ -54,49 +251,411 @@ class XMLGenerator:
         self,
         xf: xmlfile,
         model_version: str = None,
-        model_name: str = None
+        model_name: str = None,
+        model_uid: str = None
     ) -> str:
         """
         Добавляет элемент FullModel с метаданными.
         """
-        model_uid = gen_uid()
-        model_version = model_version or self.default_model_version
-        model_name = model_name or self.default_model_name
+        model_uid = model_uid or self.uid_provider.uid('FullModel')
 
         with xf.element('{%s}FullModel' % self.namespaces.get('md', ''),
                         attrib={'{%s}about' % self.namespaces['rdf']: '#_' + model_uid}):
-            time_str = datetime.now().strftime('%Y-%m-%dT%H:%M:%S') + "Z"
+            self._add_model_header(xf, model_version, model_name)
 
-            # Используем xf.element для правильных префиксов
-            with xf.element('{%s}Model.created' % self.namespaces.get('md', '')):
-                xf.write(time_str)
-            self._add_newline(xf)
+        self._add_newline(xf)
+        return model_uid
 
-            with xf.element('{%s}Model.version' % self.namespaces.get('md', '')):
-                xf.write(model_version)
-            self._add_newline(xf)
+    def _add_model_header(self, xf: xmlfile, model_version: str = None, model_name: str = None) -> None:
+        """Добавляет Model.created, Model.version и Model.name в заголовок модели."""
+        model_version = model_version or self.default_model_version
+        model_name = model_name or self.default_model_name
+        time_str = datetime.now().strftime('%Y-%m-%dT%H:%M:%S') + "Z"
 
-            # Добавляем Model.name с пространством имен из config
-            me_namespace = get_config_value('xml_generation.me_namespace')
-            if me_namespace:
-                with xf.element('{%s}Model.name' % me_namespace, nsmap={'me': me_namespace}):
-                    xf.write(model_name)
-            else:
-                # fallback если не указано в config
-                with xf.element('{%s}Model.name' % self.namespaces.get('md', '')):
-                    xf.write(model_name)
-            self._add_newline(xf)
+        # Используем xf.element для правильных префиксов
+        with xf.element('{%s}Model.created' % self.namespaces.get('md', '')):
+            xf.write(time_str)
+        self._add_newline(xf)
 
+        with xf.element('{%s}Model.version' % self.namespaces.get('md', '')):
+            xf.write(model_version)
         self._add_newline(xf)
+
+        # Добавляем Model.name с пространством имен из config
+        me_namespace = get_config_value('xml_generation.me_namespace')
+        if me_namespace:
+            with xf.element('{%s}Model.name' % me_namespace, nsmap={'me': me_namespace}):
+                xf.write(model_name)
+        else:
+            # fallback если не указано в config
+            with xf.element('{%s}Model.name' % self.namespaces.get('md', '')):
+                xf.write(model_name)
+        self._add_newline(xf)
+
+    def generate_difference_model(
+        self,
+        output_file: str,
+        difference: ModelDifference,
+        supersedes: str = None,
+        model_version: str = None,
+        model_name: str = None,
+        model_uid: str = None,
+        encoding: str = 'utf-8',
+        compression: str = None
+    ) -> str:
+        """
+        Генерирует XML файл разностной модели (md:DifferenceModel).
+
+        Новые объекты пишутся целиком в dm:forwardDifferences, удалённые -
+        в dm:reverseDifferences; у изменённых объектов в rdf:Description
+        попадают только изменившиеся свойства (новые значения - вперёд,
+        прежние - назад).
+
+        Args:
+            output_file: путь к выходному файлу
+            difference: разница версий (см. compare_model_objects)
+            supersedes: rdf:about заменяемой модели для md:Model.Supersedes
+            model_version: версия модели
+            model_name: название модели
+            model_uid: UID разностной модели (по умолчанию - новый случайный)
+            encoding: кодировка документа
+            compression: gzip | zstd | None (None - по суффиксу output_file)
+
+        Returns:
+            str: UID разностной модели
+        """
+        model_uid = model_uid or gen_uid()
+        rdf, md = self.namespaces['rdf'], self.namespaces.get('md', '')
+        nsmap = dict(self.namespaces)
+        nsmap.setdefault('dm', DIFFERENCE_NAMESPACE)
+        statements = {'{%s}parseType' % rdf: 'Statements'}
+
+        with self._xmlfile(output_file, encoding, compression) as xf:
+            xf.write_declaration()
+
+            with xf.element('{%s}RDF' % rdf, nsmap=nsmap):
+                with xf.element('{%s}DifferenceModel' % md,
+                                attrib={'{%s}about' % rdf: '#_' + model_uid}):
+                    self._add_model_header(xf, model_version, model_name)
+                    if supersedes:
+                        with xf.element('{%s}Model.Supersedes' % md,
+                                        attrib={'{%s}resource' % rdf: supersedes}):
+                            pass
+                        self._add_newline(xf)
+
+                    with xf.element('{%s}forwardDifferences' % DIFFERENCE_NAMESPACE, attrib=statements):
+                        self._add_newline(xf)
+                        for about, obj in difference.added:
+                            self._add_model_object(xf, obj.tag, about, obj.properties)
+                        for about, tag, forward, _ in difference.changed:
+                            if forward:
+                                self._add_model_object(
+                                    xf, '{%s}Description' % rdf, about, forward)
+                    self._add_newline(xf)
+
+                    with xf.element('{%s}reverseDifferences' % DIFFERENCE_NAMESPACE, attrib=statements):
+                        self._add_newline(xf)
+                        for about, obj in difference.removed:
+                            self._add_model_object(xf, obj.tag, about, obj.properties)
+                        for about, tag, _, reverse in difference.changed:
+                            if reverse:
+                                self._add_model_object(
+                                    xf, '{%s}Description' % rdf, about, reverse)
+                    self._add_newline(xf)
+
+                self._add_newline(xf)
+
         return model_uid
 
+    def _add_model_object(self, xf: xmlfile, tag: str, about: str, properties: Iterable[tuple]) -> None:
+        """Добавляет объект модели: свойства - (тег, 'resource' или '', значение)."""
+        rdf = self.namespaces['rdf']
+        with xf.element(tag, attrib={'{%s}about' % rdf: about}):
+            for prop_tag, kind, value in properties:
+                if kind == 'resource':
+                    with xf.element(prop_tag, attrib={'{%s}resource' % rdf: value}):
+                        pass
+                else:
+                    with xf.element(prop_tag):
+                        xf.write(value)
+                self._add_newline(xf)
+        self._add_newline(xf)
+
 
 class AccessXMLGenerator(XMLGenerator):
     """Специализированный генератор XML для системы доступа."""
 
-    def __init__(self):
-        """Инициализация генератора для системы доступа."""
-        super().__init__()
+    raw_writer_methods = frozenset(
+        {'write_data_group', 'write_role_with_privilege'})
+
+    # Фиксированные ресурсы модели
+    DATAGROUP_PARENT_RESOURCE = "#_50000dc6-0000-0000-c000-0000006d746c"
+    DATAGROUP_CATEGORY_RESOURCE = "#_20000db8-0000-0000-c000-0000006d746c"
+    DATAGROUP_CLASS_RESOURCE = "#_50000dc6-0000-0000-c000-0000006d746c"
+    PRIVILEGE_OPERATION_RESOURCE = "#_2000065d-0000-0000-c000-0000006d746c"
+
+    def __init__(self, encoding: str = 'utf-8', uid_provider: UIDProvider = None):
+        """
+        Инициализация генератора для системы доступа.
+
+        Args:
+            encoding: кодировка документа для шаблонных методов write_*
+            uid_provider: поставщик UID (по умолчанию - по config.json)
+        """
+        super().__init__(uid_provider=uid_provider)
+        self.encoding = encoding
+        self.role_template = get_config_value('csv_processing.role_template') or \
+            "Чтение записей по подр-ю {org_name}\\{dep_name}"
+        self.role_template_with_headdep = get_config_value('csv_processing.role_template_with_headdep') or \
+            "Чтение записей по подр-ю {org_name}\\{headdep_name}\\{dep_name}"
+        self._build_templates()
+
+    def _build_templates(self) -> None:
+        """
+        Предвычисляет неизменяемые сегменты DataGroup/ObjectReference и Role/Privilege.
+
+        Сегменты повторяют вывод xmlfile (префиксы из namespaces, пустые
+        элементы с закрывающим тегом, переносы строк после элементов),
+        поэтому на каждую запись остаётся только подставить
+        экранированные переменные части.
+        """
+        # Префиксы совпадают с ключами namespaces, переданными как nsmap корня
+        rdf, cim = 'rdf', 'cim'
+
+        def start(tag, attr=None, value=None):
+            if attr is None:
+                return f'<{cim}:{tag}>'
+            return f'<{cim}:{tag} {rdf}:{attr}="{escape_xml_attr(value)}">'
+
+        def end(tag):
+            return f'</{cim}:{tag}>'
+
+        def empty(tag, attr, value):
+            return start(tag, attr, value) + end(tag) + '\n'
+
+        def text(tag, value):
+            return start(tag) + value + end(tag) + '\n'
+
+        self._dg_segments = (
+            f'<{cim}:DataGroup {rdf}:about="#_',
+            '">' + start('IdentifiedObject.name'),
+            end('IdentifiedObject.name') + '\n'
+            + empty('IdentifiedObject.ParentObject', 'resource', self.DATAGROUP_PARENT_RESOURCE)
+            + text('DataItem.isHostRestricted', 'false')
+            + text('DataItem.isUserRestricted', 'true')
+            + empty('DataItem.Category', 'resource', self.DATAGROUP_CATEGORY_RESOURCE)
+            + empty('DataGroup.Class', 'resource', self.DATAGROUP_CLASS_RESOURCE)
+            + f'<{cim}:DataGroup.Objects {rdf}:resource="#_',
+            '">' + end('DataGroup.Objects') + '\n' + end('DataGroup') + '\n'
+            + f'<{cim}:ObjectReference {rdf}:about="#_',
+            '">' + start('ObjectReference.objectUid'),
+            end('ObjectReference.objectUid') + '\n'
+            + f'<{cim}:ObjectReference.Group {rdf}:resource="#_',
+            '">' + end('ObjectReference.Group') + '\n'
+            + end('ObjectReference') + '\n',
+        )
+
+        self._role_segments = (
+            f'<{cim}:Role {rdf}:about="#_',
+            '">' + start('IdentifiedObject.name'),
+            end('IdentifiedObject.name') + '\n'
+            + f'<{cim}:IdentifiedObject.ParentObject {rdf}:resource="#_',
+            '">' + end('IdentifiedObject.ParentObject') + '\n'
+            + text('Role.isHost', 'false')
+            + text('Role.isUser', 'true')
+            + empty('Role.kind', 'resource', 'cim:RoleKind.allow')
+            + f'<{cim}:Role.Privileges {rdf}:resource="#_',
+            '">' + end('Role.Privileges') + '\n' + end('Role') + '\n'
+            + f'<{cim}:Privilege {rdf}:about="#_',
+            '">' + f'<{cim}:Privilege.Role {rdf}:resource="#_',
+            '">' + end('Privilege.Role') + '\n',
+        )
+        self._data_item_segments = (
+            f'<{cim}:Privilege.DataItems {rdf}:resource="#_',
+            '">' + end('Privilege.DataItems') + '\n',
+        )
+        self._privilege_tail = (
+            empty('Privilege.Operation', 'resource', self.PRIVILEGE_OPERATION_RESOURCE)
+            + end('Privilege') + '\n'
+        )
+
+    def format_datagroup_name(self, org_name, dep_name, headdep_name=None) -> str:
+        """Формирует IdentifiedObject.name для DataGroup."""
+        org_name_str = org_name if isinstance(org_name, str) else str(org_name)
+        dep_name_str = dep_name if isinstance(dep_name, str) else str(dep_name)
+        if headdep_name:
+            headdep_name_str = headdep_name if isinstance(
+                headdep_name, str) else str(headdep_name)
+            return f'{org_name_str}\\{headdep_name_str}\\{dep_name_str}'
+        return f'{org_name_str}\\{dep_name_str}'
+
+    def format_role_name(self, org_name, dep_name, headdep_name=None) -> str:
+        """Формирует IdentifiedObject.name для Role по шаблонам из config."""
+        org_name_str = org_name if isinstance(org_name, str) else str(org_name)
+        dep_name_str = dep_name if isinstance(dep_name, str) else str(dep_name)
+        if headdep_name:
+            headdep_name_str = headdep_name if isinstance(
+                headdep_name, str) else str(headdep_name)
+            return self.role_template_with_headdep.format(
+                org_name=org_name_str,
+                headdep_name=headdep_name_str,
+                dep_name=dep_name_str
+            )
+        return self.role_template.format(
+            org_name=org_name_str,
+            dep_name=dep_name_str
+        )
+
+    def write_data_group(
+        self,
+        write: Callable[[bytes], Any],
+        org_name: str,
+        dep_name: str,
+        dep_uid: str,
+        datagroup_uid: str = None,
+        headdep_name: str = None,
+        objectref_uid: str = None
+    ) -> Tuple[str, str]:
+        """
+        Шаблонный вариант add_data_group: пишет готовые байты через write.
+
+        Returns:
+            Tuple[str, str]: (datagroup_uid, objectref_uid)
+        """
+        dg_uid = datagroup_uid or self.uid_provider.uid('DataGroup', dep_uid)
+        objectref_uid = objectref_uid or self.uid_provider.uid(
+            'ObjectReference', dep_uid)
+        dg_attr = escape_xml_attr(dg_uid)
+        objectref_attr = escape_xml_attr(objectref_uid)
+        seg = self._dg_segments
+
+        write(''.join((
+            seg[0], dg_attr,
+            seg[1], escape_xml_text(self.format_datagroup_name(
+                org_name, dep_name, headdep_name)),
+            seg[2], objectref_attr,
+            seg[3], objectref_attr,
+            seg[4], escape_xml_text(dep_uid),
+            seg[5], dg_attr,
+            seg[6],
+        )).encode(self.encoding, 'xmlcharrefreplace'))
+
+        return dg_uid, objectref_uid
+
+    def write_role_with_privilege(
+        self,
+        write: Callable[[bytes], Any],
+        org_name: str,
+        dep_name: str,
+        folder_uid: str,
+        datagroup_uids: List[str] = None,
+        headdep_name: str = None,
+        role_uid: str = None,
+        privilege_uid: str = None
+    ) -> Tuple[str, str]:
+        """
+        Шаблонный вариант add_role_with_privilege: пишет готовые байты через write.
+
+        Returns:
+            Tuple[str, str]: (role_uid, privilege_uid)
+        """
+        r_uid = role_uid or self.uid_provider.uid('Role')
+        privilege_uid = privilege_uid or self.uid_provider.uid('Privilege')
+        role_attr = escape_xml_attr(r_uid)
+        privilege_attr = escape_xml_attr(privilege_uid)
+        seg = self._role_segments
+
+        parts = [
+            seg[0], role_attr,
+            seg[1], escape_xml_text(self.format_role_name(
+                org_name, dep_name, headdep_name)),
+            seg[2], escape_xml_attr(folder_uid),
+            seg[3], privilege_attr,
+            seg[4], privilege_attr,
+            seg[5], role_attr,
+            seg[6],
+        ]
+        item_start, item_end = self._data_item_segments
+        for dg_uid in datagroup_uids or ():
+            parts.append(item_start)
+            parts.append(escape_xml_attr(dg_uid))
+            parts.append(item_end)
+        parts.append(self._privilege_tail)
+
+        write(''.join(parts).encode(self.encoding, 'xmlcharrefreplace'))
+
+        return r_uid, privilege_uid
+
+    def data_group_objects(
+        self,
+        org_name: str,
+        dep_name: str,
+        dep_uid: str,
+        datagroup_uid: str,
+        headdep_name: str = None,
+        objectref_uid: str = None
+    ) -> List[Tuple[str, ModelObject]]:
+        """
+        Объекты DataGroup и ObjectReference записи add_data_group.
+
+        Совпадают с тем, что load_model_objects читает из документа, поэтому
+        разностная модель строится без повторного чтения записанного XML.
+
+        Returns:
+            List[Tuple[str, ModelObject]]: пары (rdf:about, объект)
+        """
+        cim = '{%s}' % self.namespaces['cim']
+        dg_about, objectref_about = '#_' + datagroup_uid, '#_' + objectref_uid
+        data_group = ModelObject(cim + 'DataGroup', (
+            (cim + 'IdentifiedObject.name', '',
+             self.format_datagroup_name(org_name, dep_name, headdep_name)),
+            (cim + 'IdentifiedObject.ParentObject', 'resource', self.DATAGROUP_PARENT_RESOURCE),
+            (cim + 'DataItem.isHostRestricted', '', 'false'),
+            (cim + 'DataItem.isUserRestricted', '', 'true'),
+            (cim + 'DataItem.Category', 'resource', self.DATAGROUP_CATEGORY_RESOURCE),
+            (cim + 'DataGroup.Class', 'resource', self.DATAGROUP_CLASS_RESOURCE),
+            (cim + 'DataGroup.Objects', 'resource', objectref_about),
+        ))
+        object_reference = ModelObject(cim + 'ObjectReference', (
+            (cim + 'ObjectReference.objectUid', '', str(dep_uid)),
+            (cim + 'ObjectReference.Group', 'resource', dg_about),
+        ))
+        return [(dg_about, data_group), (objectref_about, object_reference)]
+
+    def role_objects(
+        self,
+        org_name: str,
+        dep_name: str,
+        folder_uid: str,
+        datagroup_uids: List[str],
+        headdep_name: str,
+        role_uid: str,
+        privilege_uid: str
+    ) -> List[Tuple[str, ModelObject]]:
+        """
+        Объекты Role и Privilege записи add_role_with_privilege (см. data_group_objects).
+
+        Returns:
+            List[Tuple[str, ModelObject]]: пары (rdf:about, объект)
+        """
+        cim = '{%s}' % self.namespaces['cim']
+        role_about, privilege_about = '#_' + role_uid, '#_' + privilege_uid
+        role = ModelObject(cim + 'Role', (
+            (cim + 'IdentifiedObject.name', '',
+             self.format_role_name(org_name, dep_name, headdep_name)),
+            (cim + 'IdentifiedObject.ParentObject', 'resource', '#_' + str(folder_uid)),
+            (cim + 'Role.isHost', '', 'false'),
+            (cim + 'Role.isUser', '', 'true'),
+            (cim + 'Role.kind', 'resource', 'cim:RoleKind.allow'),
+            (cim + 'Role.Privileges', 'resource', privilege_about),
+        ))
+        data_items = cim + 'Privilege.DataItems'
+        privilege = ModelObject(cim + 'Privilege', (
+            (cim + 'Privilege.Role', 'resource', role_about),
+            *((data_items, 'resource', '#_' + x) for x in datagroup_uids or ()),
+            (cim + 'Privilege.Operation', 'resource', self.PRIVILEGE_OPERATION_RESOURCE),
+        ))
+        return [(role_about, role), (privilege_about, privilege)]
 
     def add_data_group(
         self,
@@ -105,7 +664,8 @@ class AccessXMLGenerator(XMLGenerator):
         dep_name: str,
         dep_uid: str,
         datagroup_uid: str = None,
-        headdep_name: str = None  # Добавлен параметр
+        headdep_name: str = None,  # Добавлен параметр
+        objectref_uid: str = None
     ) -> Tuple[str, str]:
         """
         Добавляет DataGroup и связанный ObjectReference.
@@ -117,30 +677,21 @@ class AccessXMLGenerator(XMLGenerator):
             dep_uid: UID подразделения
             datagroup_uid: UID группы данных (опционально)
             headdep_name: название головного подразделения (опционально)
+            objectref_uid: UID ObjectReference (опционально)
 
         Returns:
             Tuple[str, str]: (datagroup_uid, objectref_uid)
         """
-        dg_uid = datagroup_uid or gen_uid()
-        objectref_uid = gen_uid()
+        dg_uid = datagroup_uid or self.uid_provider.uid('DataGroup', dep_uid)
+        objectref_uid = objectref_uid or self.uid_provider.uid(
+            'ObjectReference', dep_uid)
 
         # Добавляем DataGroup
         dg_attrib = {'{%s}about' % self.namespaces['rdf']: "#_" + dg_uid}
         with xf.element('{%s}DataGroup' % self.namespaces['cim'], attrib=dg_attrib):
             # IdentifiedObject.name - формируем с учетом иерархии
-            org_name_str = org_name if isinstance(
-                org_name, str) else str(org_name)
-            dep_name_str = dep_name if isinstance(
-                dep_name, str) else str(dep_name)
-
-            if headdep_name:
-                # Формат с головным подразделением
-                headdep_name_str = headdep_name if isinstance(
-                    headdep_name, str) else str(headdep_name)
-                full_name = f'{org_name_str}\\{headdep_name_str}\\{dep_name_str}'
-            else:
-                # Формат без головного подразделения
-                full_name = f'{org_name_str}\\{dep_name_str}'
+            full_name = self.format_datagroup_name(
+                org_name, dep_name, headdep_name)
 
             with xf.element('{%s}IdentifiedObject.name' % self.namespaces['cim']):
                 xf.write(full_name)
@@ -213,47 +764,23 @@ class AccessXMLGenerator(XMLGenerator):
         dep_name: str,
         folder_uid: str,
         datagroup_uids: List[str] = None,
-        headdep_name: str = None
+        headdep_name: str = None,
+        role_uid: str = None,
+        privilege_uid: str = None
     ) -> Tuple[str, str]:
         # Обеспечиваем совместимость с возможными вызовами без datagroup_uids
         if datagroup_uids is None:
             datagroup_uids = []
 
-        r_uid = gen_uid()
-        privilege_uid = gen_uid()
-
-        # Определение шаблона
-        if headdep_name:
-            # Используем шаблон из конфига для случая с HeadDepartment
-            role_template = get_config_value('csv_processing.role_template_with_headdep') or \
-                "Чтение записей по подр-ю {org_name}\\{headdep_name}\\{dep_name}"
-        else:
-            # Используем стандартный шаблон
-            role_template = get_config_value('csv_processing.role_template') or \
-                "Чтение записей по подр-ю {org_name}\\{dep_name}"
+        r_uid = role_uid or self.uid_provider.uid('Role')
+        privilege_uid = privilege_uid or self.uid_provider.uid('Privilege')
 
         # Добавляем Role
         role_attrib = {'{%s}about' % self.namespaces['rdf']: "#_" + r_uid}
         with xf.element('{%s}Role' % self.namespaces['cim'], attrib=role_attrib):
             # IdentifiedObject.name
-            org_name_str = org_name if isinstance(
-                org_name, str) else str(org_name)
-            dep_name_str = dep_name if isinstance(
-                dep_name, str) else str(dep_name)
-
-            if headdep_name:
-                headdep_name_str = headdep_name if isinstance(
-                    headdep_name, str) else str(headdep_name)
-                role_name = role_template.format(
-                    org_name=org_name_str,
-                    headdep_name=headdep_name_str,
-                    dep_name=dep_name_str
-                )
-            else:
-                role_name = role_template.format(
-                    org_name=org_name_str,
-                    dep_name=dep_name_str
-                )
+            role_name = self.format_role_name(
+                org_name, dep_name, headdep_name)
 
             with xf.element('{%s}IdentifiedObject.name' % self.namespaces['cim']):
                 xf.write(role_name)
@@ -323,7 +850,21 @@ class AccessXMLGenerator(XMLGenerator):
         return r_uid, privilege_uid
 
 
+# Генераторы рабочего процесса: создаются один раз на класс
+_worker_generators: Dict[type, Any] = {}
+
+
+def _render_fragment(generator_class: type, method_name: str, records: List[tuple], encoding: str) -> bytes:
+    """Сериализует блок записей в рабочем процессе пула."""
+    generator = _worker_generators.get(generator_class)
+    if generator is None:
+        # UID элементов передаются в записях, поставщик нужен только как запасной
+        generator = _worker_generators[generator_class] = generator_class(
+            uid_provider=RandomUIDProvider())
+    return generator.render_fragment(method_name, records, encoding)
+
+
 # Фабричные функции для обратной совместимости
-def create_access_generator() -> AccessXMLGenerator:
+def create_access_generator(uid_provider: UIDProvider = None) -> AccessXMLGenerator:
     """Создает генератор для системы доступа."""
-    return AccessXMLGenerator()
+    return AccessXMLGenerator(uid_provider=uid_provider)
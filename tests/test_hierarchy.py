@@ -0,0 +1,128 @@
+"""
+Тесты хранилища иерархии подразделений (modules/hierarchy.py)
+"""
+
+from modules.hierarchy import HierarchyStore, create_hierarchy_store
+
+
+def _store(edges, order=()):
+    """Хранилище по списку рёбер (родитель, потомок)."""
+    dep_tree = {}
+    for parent, child in edges:
+        dep_tree.setdefault(parent, set()).add(child)
+    return create_hierarchy_store(dep_tree, order)
+
+
+def _uids(store, nodes):
+    return [store.uids[x] for x in nodes]
+
+
+# Оргструктура:  root → a → a1, a2;  root → b → b1 → b11
+TREE = [('root', 'a'), ('a', 'a1'), ('a', 'a2'),
+        ('root', 'b'), ('b', 'b1'), ('b1', 'b11')]
+TREE_ORDER = ['root', 'a', 'a1', 'a2', 'b', 'b1', 'b11']
+
+
+def test_forest_subtree_is_contiguous_range_of_dfs_order():
+    store = _store(TREE, TREE_ORDER)
+
+    assert store.is_forest
+    assert store.cycles == []
+    order = store._order.tolist()
+    for uid in TREE_ORDER:
+        node = store.node(uid)
+        start = store._tin[node]
+        # Поддерево - отрезок обхода, начинающийся с самого узла
+        assert order[start] == node
+        assert order[start:start + store.subtree_size(node)] == store.subtree_nodes(node)
+
+    assert sorted(store.closure('b')) == ['b', 'b1', 'b11']
+    assert sorted(store.closure('a')) == ['a', 'a1', 'a2']
+    assert store.closure('a1') == ['a1']
+    assert sorted(store.closure('root')) == sorted(TREE_ORDER)
+
+
+def test_forest_subtree_sizes_and_depth():
+    store = _store(TREE, TREE_ORDER)
+
+    sizes = {uid: store.subtree_size(store.node(uid)) for uid in TREE_ORDER}
+    assert sizes == {'root': 7, 'a': 3, 'a1': 1, 'a2': 1, 'b': 3, 'b1': 2, 'b11': 1}
+    assert store.max_depth() == 3
+    assert store.has_children(store.node('b1'))
+    assert not store.has_children(store.node('b11'))
+
+
+def test_subtree_membership_matches_ancestor_chains():
+    store = _store(TREE, TREE_ORDER)
+    parent = {child: head for head, child in TREE}
+
+    def ancestors(uid):
+        chain = [uid]
+        while chain[-1] in parent:
+            chain.append(parent[chain[-1]])
+        return chain
+
+    for uid in TREE_ORDER:
+        for root in TREE_ORDER:
+            in_subtree = uid in store.closure(root)
+            assert in_subtree == (root in ancestors(uid)), (uid, root)
+
+
+def test_ordered_subtree_keeps_document_order_and_drops_unordered_nodes():
+    # 'x' есть только как потомок в dep_tree, в порядке документа его нет
+    store = _store([('b', 'x'), ('a', 'b'), ('a', 'c')], ['c', 'b', 'a'])
+
+    assert store.ordered == 3
+    assert _uids(store, store.ordered_subtree(store.node('a'))) == ['c', 'b', 'a']
+    assert _uids(store, store.ordered_subtree(store.node('b'))) == ['b']
+    assert 'x' in store.closure('b')
+
+
+def test_deep_chain_does_not_recurse():
+    depth = 20000
+    uids = [f'd{i}' for i in range(depth + 1)]
+    store = _store(zip(uids, uids[1:]), uids)
+
+    assert store.is_forest
+    assert store.max_depth() == depth
+    assert store.subtree_size(0) == depth + 1
+    assert store.ordered_subtree(store.node('d19998')) == [19998, 19999, 20000]
+
+
+def test_multi_parent_node_is_collected_once():
+    # 'shared' подчинено и 'a', и 'b'
+    edges = [('root', 'a'), ('root', 'b'), ('a', 'shared'), ('b', 'shared'),
+             ('shared', 'leaf')]
+    store = _store(edges, ['root', 'a', 'b', 'shared', 'leaf'])
+
+    assert not store.is_forest
+    assert store.cycles == []
+    assert store.max_depth() is None
+    closure = store.closure('root')
+    assert len(closure) == len(set(closure)) == 5
+    assert sorted(store.closure('a')) == ['a', 'leaf', 'shared']
+    assert store.subtree_size(store.node('b')) == 3
+
+
+def test_cycles_are_reported_and_closure_terminates():
+    edges = [('root', 'a'), ('a', 'b'), ('b', 'c'), ('c', 'a'), ('self', 'self')]
+    store = _store(edges, ['root', 'a', 'b', 'c', 'self'])
+
+    assert not store.is_forest
+    assert sorted(sorted(cycle) for cycle in store.cycles) == [['a', 'b', 'c'], ['self']]
+    assert 'self → self' in store.format_cycles()
+    assert any(line.startswith('a → ') and line.endswith(' → a')
+               for line in store.format_cycles())
+    assert sorted(store.closure('b')) == ['a', 'b', 'c']
+    assert sorted(store.closure('root')) == ['a', 'b', 'c', 'root']
+    assert store.closure('self') == ['self']
+    # Повторный обход с новой меткой посещения даёт тот же результат
+    assert sorted(store.closure('b')) == ['a', 'b', 'c']
+
+
+def test_unknown_uid():
+    store = HierarchyStore({'a': {'b'}}, ['a', 'b'])
+
+    assert store.node('missing') == -1
+    assert 'missing' not in store
+    assert store.closure('missing') == ['missing']
@@ -1,6 +1,8 @@
 import sys
 import os
 import threading
+import multiprocessing
+from datetime import datetime
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
 from PyQt5.QtGui import *
@@ -36,18 +38,105 @@ try:
             sys.path.insert(0, script_dir)
 
     from main import process_all_csv_from_list
+    from modules.cancellation import CancellationToken
     IMPORT_SUCCESS = True
 except ImportError as e:
     print(f"Import error: {e}")
     IMPORT_SUCCESS = False
 
-    def process_all_csv_from_list(folder_uid, csv_dir, file_list, log_callback, allow_headdep_recursive=True):
+    def process_all_csv_from_list(folder_uid, csv_dir, file_list, log_callback, allow_headdep_recursive=True, **kwargs):
         log_callback(f'Ошибка импорта: {e}\n')
         for fn in file_list:
             log_callback(f'Обрабатывается (заглушка): {fn}\n')
         log_callback('Выполнено (заглушка)\n')
 
 
+class QtLogSink(QObject):
+    """
+    Потокобезопасный приёмник лога для QPlainTextEdit.
+
+    write() можно вызывать из любого потока: текст только копится в
+    списке под блокировкой. Таймер в потоке GUI раз в interval_ms выводит
+    накопленное одним appendPlainText. Виджет хранит последние max_lines
+    строк, полный лог пишется в файл (см. set_log_file).
+    """
+
+    def __init__(self, widget, max_lines=5000, interval_ms=100, parent=None):
+        super().__init__(parent)
+        self.widget = widget
+        self.widget.setMaximumBlockCount(max_lines)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._log_file = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    def write(self, text):
+        """Добавляет сообщение в лог (из любого потока); сообщение - отдельная строка."""
+        if not text.endswith('\n'):
+            text += '\n'
+        with self._lock:
+            self._pending.append(text)
+            if self._log_file is not None:
+                try:
+                    self._log_file.write(text)
+                except OSError:
+                    self._close_log_file()
+
+    def set_log_file(self, path):
+        """Начинает запись полного лога в файл; возвращает True при успехе."""
+        with self._lock:
+            self._close_log_file()
+            try:
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                self._log_file = open(path, 'a', encoding='utf-8')
+            except OSError:
+                return False
+        return True
+
+    def flush(self):
+        """Выводит накопленный текст в виджет (в потоке GUI)."""
+        with self._lock:
+            chunks, self._pending = self._pending, []
+            if self._log_file is not None:
+                self._log_file.flush()
+        if not chunks:
+            return
+
+        text = ''.join(chunks)
+        if text.endswith('\n'):
+            text = text[:-1]
+        # Прокручиваем вниз, только если пользователь не листает лог выше
+        scrollbar = self.widget.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        self.widget.appendPlainText(text)
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def clear(self):
+        """Очищает виджет и невыведенный текст."""
+        with self._lock:
+            self._pending = []
+        self.widget.clear()
+
+    def close(self):
+        """Выводит остаток и закрывает файл лога."""
+        self._timer.stop()
+        self.flush()
+        with self._lock:
+            self._close_log_file()
+
+    def _close_log_file(self):
+        if self._log_file is not None:
+            try:
+                self._log_file.close()
+            except OSError:
+                pass
+            self._log_file = None
+
+
 class CSVProcessorApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -233,6 +322,19 @@ class CSVProcessorApp(QMainWindow):
             }
         """)
         options_layout.addWidget(self.recursive_checkbox)
+
+        self.force_checkbox = QCheckBox(
+            "Обработать заново неизменённые файлы")
+        self.force_checkbox.setChecked(False)
+        self.force_checkbox.setStyleSheet(self.recursive_checkbox.styleSheet())
+        options_layout.addWidget(self.force_checkbox)
+
+        self.diff_checkbox = QCheckBox(
+            "Разностная модель относительно предыдущего XML")
+        self.diff_checkbox.setChecked(bool(get_config_value(
+            'xml_generation.difference_model')))
+        self.diff_checkbox.setStyleSheet(self.recursive_checkbox.styleSheet())
+        options_layout.addWidget(self.diff_checkbox)
         options_layout.addStretch()
 
         main_layout.addLayout(options_layout)
@@ -262,6 +364,31 @@ class CSVProcessorApp(QMainWindow):
         """)
         self.start_button.clicked.connect(self.start_conversion)
 
+        # Отмена: текущий файл прерывается (XML не меняется), остальные пропускаются
+        self.stop_button = QPushButton("Стоп")
+        self.stop_button.setStyleSheet("""
+            QPushButton {
+                background-color: #c0392b;
+                color: white;
+                border: none;
+                padding: 12px 25px;
+                border-radius: 6px;
+                font-weight: bold;
+                font-size: 11px;
+                min-width: 100px;
+            }
+            QPushButton:hover {
+                background-color: #a93226;
+            }
+            QPushButton:disabled {
+                background-color: #d5d8dc;
+            }
+        """)
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_conversion)
+        self.cancel_token = None
+        self._job_thread = None
+
         self.open_folder_button = QPushButton("Открыть папку с результатами")
         self.open_folder_button.setStyleSheet("""
             QPushButton {
@@ -284,11 +411,27 @@ class CSVProcessorApp(QMainWindow):
         self.open_folder_button.clicked.connect(self.open_results_folder)
 
         buttons_layout.addWidget(self.start_button)
+        buttons_layout.addWidget(self.stop_button)
         buttons_layout.addStretch()
         buttons_layout.addWidget(self.open_folder_button)
 
         main_layout.addLayout(buttons_layout)
 
+        # Ход обработки: поток обработки сохраняет последнее событие, таймер выводит его
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setTextVisible(False)
+        self.progress_label = QLabel("")
+        self.progress_label.setStyleSheet("color: #5a6668; font-size: 9pt;")
+        main_layout.addWidget(self.progress_bar)
+        main_layout.addWidget(self.progress_label)
+        self._progress_event = None
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(200)
+        self.progress_timer.timeout.connect(self.update_progress)
+        self.progress_timer.start()
+
         # Лог
         log_group = QGroupBox("Протокол / лог")
         log_group.setStyleSheet("""
@@ -324,6 +467,14 @@ class CSVProcessorApp(QMainWindow):
             }
         """)
 
+        # Вывод лога: пачками по таймеру, ограниченная история в окне
+        self.log_sink = QtLogSink(
+            self.log_text,
+            max_lines=get_config_value('ui.log_max_lines', 5000),
+            interval_ms=get_config_value('ui.log_flush_interval_ms', 100),
+            parent=self
+        )
+
         log_layout.addWidget(self.log_text)
         log_group.setLayout(log_layout)
         main_layout.addWidget(log_group)
@@ -461,6 +612,8 @@ class CSVProcessorApp(QMainWindow):
                 selected_files.append(checkbox.text())
 
         allow_recursive = self.recursive_checkbox.isChecked()
+        force = self.force_checkbox.isChecked()
+        difference_model = self.diff_checkbox.isChecked()
 
         # Валидация
         if not uid:
@@ -475,14 +628,23 @@ class CSVProcessorApp(QMainWindow):
             QMessageBox.warning(self, "Внимание!", "Выделите хотя бы 1 файл!")
             return
 
-        # Очищаем лог
-        self.log_text.clear()
+        # Очищаем лог; полный лог запуска сохраняется в папке логов
+        self.log_sink.clear()
+        session_log = os.path.join(
+            csv_dir, get_config_value('file_management.log_directory', 'log'),
+            f"ui_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}.log")
         self.add_log("=== Начало обработки ===\n")
+        if self.log_sink.set_log_file(session_log):
+            self.add_log(f"Полный лог: {session_log}\n")
         self.add_log(f"UID: {uid}\n")
         self.add_log(f"CSV директория: {csv_dir}\n")
         self.add_log(f"Выбрано файлов: {len(selected_files)}\n")
         self.add_log(f"Рекурсивный режим: {allow_recursive}\n")
         self.add_log("========================\n")
+        self._progress_event = None
+        self.progress_bar.setValue(0)
+        self.progress_label.setText("")
+        cancel_token = self.cancel_token = CancellationToken() if IMPORT_SUCCESS else None
 
         # Запускаем обработку в отдельном потоке
         def run_job():
@@ -492,25 +654,68 @@ class CSVProcessorApp(QMainWindow):
                 else:
                     self.add_log("Импорт main.py не удался\n")
 
-                process_all_csv_from_list(
+                results = process_all_csv_from_list(
                     uid, csv_dir, selected_files, self.add_log,
-                    allow_headdep_recursive=allow_recursive
+                    allow_headdep_recursive=allow_recursive,
+                    force=force,
+                    difference_model=difference_model,
+                    progress_callback=self.set_progress,
+                    cancel=cancel_token
                 )
-                self.add_log("Обработка завершена.\n")
+                skipped = getattr(results, 'cancelled', []) + getattr(results, 'skipped', [])
+                if skipped:
+                    self.add_log(f"Обработка отменена. Не обработаны (XML не изменён): "
+                                 f"{', '.join(skipped)}\n")
+                else:
+                    self.add_log("Обработка завершена.\n")
             except Exception as e:
                 import traceback
                 self.add_log(f"Ошибка: {str(e)}\n")
                 self.add_log(f"Traceback: {traceback.format_exc()}\n")
 
-        thread = threading.Thread(target=run_job, daemon=True)
-        thread.start()
+        self._job_thread = threading.Thread(target=run_job, daemon=True)
+        self._job_thread.start()
+        self.start_button.setEnabled(False)
+        self.stop_button.setEnabled(cancel_token is not None)
+
+    def stop_conversion(self):
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+            self.stop_button.setEnabled(False)
+            self.add_log("Отмена обработки...\n")
+
+    def set_progress(self, event):
+        # Вызывается из потока обработки: только запоминаем последнее событие
+        self._progress_event = event
+
+    def update_progress(self):
+        """Выводит последнее событие хода обработки (в потоке GUI)."""
+        if self._job_thread is not None and not self._job_thread.is_alive():
+            self._job_thread = None
+            self.cancel_token = None
+            self.start_button.setEnabled(True)
+            self.stop_button.setEnabled(False)
+
+        event, self._progress_event = self._progress_event, None
+        if event is None:
+            return
+        self.progress_bar.setValue(int(event.fraction * 1000))
+        text = (f"Файл {event.file_index}/{event.file_count}: {event.file_name} "
+                f"({event.stage}), {event.rows_per_sec:.0f} стр/с")
+        if event.eta is not None and event.fraction < 1:
+            minutes, seconds = divmod(int(event.eta), 60)
+            text += f", осталось ~{minutes}:{seconds:02d}"
+        self.progress_label.setText(text)
 
     def add_log(self, text):
-        # Исправленный метод для обновления лога из другого потока
-        self.log_text.appendPlainText(text)
-        # Прокручиваем вниз
-        self.log_text.verticalScrollBar().setValue(
-            self.log_text.verticalScrollBar().maximum())
+        # Вызывается из любого потока: виджет обновляет таймер QtLogSink
+        self.log_sink.write(text)
+
+    def closeEvent(self, event):
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+        self.log_sink.close()
+        super().closeEvent(event)
 
     def open_results_folder(self):
         folder = self.csv_path_input.text()
@@ -532,6 +737,8 @@ class CSVProcessorApp(QMainWindow):
 
 
 def main():
+    # Нужно для пула процессов в собранном .exe
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     app.setStyle('Fusion')  # Используем Fusion стиль для лучшего внешнего вида
 